@@ -1,6 +1,8 @@
 from flask import Flask
 from flask_cors import CORS
+from app.config import DB_MIGRATE_ON_START
 from app.db import init_db
+from app.local_lookup import local_lookup
 
 def create_app():
     app = Flask(__name__, template_folder="../templates", static_folder="../static")
@@ -8,8 +10,27 @@ def create_app():
 
     CORS(app)  # Enable CORS
 
-    # Initialize database
-    init_db()
+    # Fingerprinted, precompressed static files served with far-future caching
+    from app.assets import assets
+    assets.init_app(app)
+
+    # Initialize database (a single PRAGMA read once it is up to date)
+    if DB_MIGRATE_ON_START:
+        init_db()
+
+    # Load the department tables once for local answers (falls back to Bedrock if this fails)
+    try:
+        local_lookup.load()
+    except Exception as e:
+        print(f"Local data lookup disabled: {e}")
+
+    # Resize any new gallery photos without holding up startup
+    from app.gallery import gallery
+    gallery.warm()
+
+    # Build the Bedrock client off the startup path, before the first question needs it
+    from app.bedrock_client import bedrock_client
+    bedrock_client.warm()
 
     from app.routes import chatbot_bp
     app.register_blueprint(chatbot_bp)
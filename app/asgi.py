@@ -0,0 +1,230 @@
+"""
+ASGI entry point with async /chat and /chat/stream paths.
+
+POST /chat and POST /chat/stream are handled natively on the event loop:
+the agent call is awaited through query_bedrock_async, and a streamed
+answer is pulled piece by piece on BedrockClient's executor, so one worker
+process can hold hundreds of conversations in flight instead of one per
+WSGI thread. Every other route is served by the regular Flask app through
+asgiref's WSGI adapter.
+
+Run with an ASGI server, e.g.  uvicorn asgi:app --workers 2
+"""
+import asyncio
+import json
+
+from asgiref.wsgi import WsgiToAsgi
+from werkzeug.http import dump_cookie, parse_cookie
+
+from app.bedrock_client import bedrock_client
+from app.bedrock_proxy import get_bedrock_session_id, query_bedrock_async, response_cache_key
+from app.cache import single_flight
+from app.chatbot import get_response_stream
+from app.history import history_store
+from app.routes import resolve_user_context
+
+
+class ChatASGIApp:
+    """Serves POST /chat and /chat/stream asynchronously and forwards everything else to Flask"""
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.wsgi_app = WsgiToAsgi(flask_app)
+        self.session_interface = flask_app.session_interface
+        self._streams = {}  # Shared cache key -> future set when the leading /chat/stream answer is done
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and scope['method'] == 'POST' and scope['path'] == '/chat':
+            await self.chat(scope, receive, send)
+        elif scope['type'] == 'http' and scope['method'] == 'POST' and scope['path'] == '/chat/stream':
+            await self.chat_stream(scope, receive, send)
+        else:
+            await self.wsgi_app(scope, receive, send)
+
+    # ---------------- SESSION COOKIE ----------------
+    def _load_session(self, scope):
+        """Decode the signed Flask session cookie into a plain dict"""
+        serializer = self.session_interface.get_signing_serializer(self.flask_app)
+        cookie_name = self.session_interface.get_cookie_name(self.flask_app)
+        headers = dict(scope['headers'])
+        cookies = parse_cookie(headers.get(b'cookie', b'').decode('latin-1'))
+        value = cookies.get(cookie_name)
+        if not value or serializer is None:
+            return {}
+        max_age = int(self.flask_app.permanent_session_lifetime.total_seconds())
+        try:
+            return dict(serializer.loads(value, max_age=max_age))
+        except Exception:
+            return {}
+
+    def _session_cookie(self, user_session):
+        """Set-Cookie header value for an updated session, same attributes Flask uses"""
+        app = self.flask_app
+        interface = self.session_interface
+        value = interface.get_signing_serializer(app).dumps(user_session)
+        return dump_cookie(
+            interface.get_cookie_name(app),
+            value,
+            domain=interface.get_cookie_domain(app),
+            path=interface.get_cookie_path(app),
+            secure=interface.get_cookie_secure(app),
+            httponly=interface.get_cookie_httponly(app),
+            samesite=interface.get_cookie_samesite(app),
+        )
+
+    # ---------------- CHAT ----------------
+    @staticmethod
+    async def _read_json(receive):
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+        return json.loads(body or b'{}')
+
+    async def chat(self, scope, receive, send):
+        try:
+            data = await self._read_json(receive)
+            message = data.get('message', '')
+            if not message:
+                await self._send_json(send, 400, {'response': 'No message provided.'})
+                return
+
+            user_session = self._load_session(scope)
+            had_bedrock_session = 'bedrock_session_id' in user_session
+            user_type, department, role, user_name = resolve_user_context(data, user_session)
+
+            response = await query_bedrock_async(message, user_type, department, role, user_name,
+                                                 session=user_session)
+            history_store.record(get_bedrock_session_id(user_session), message, response)
+
+            cookie = None
+            if 'bedrock_session_id' in user_session and not had_bedrock_session:
+                cookie = self._session_cookie(user_session)
+            await self._send_json(send, 200, {'response': response}, cookie)
+
+        except Exception as e:
+            print("❌ Async chat route error:", e)
+            await self._send_json(send, 500, {'response': 'Internal server error occurred.'})
+
+    async def chat_stream(self, scope, receive, send):
+        """
+        Same as the Flask /chat/stream route: each piece is sent as
+        `data: {"delta": "..."}` in its own body event, followed by an `event: done`.
+        """
+        loop = asyncio.get_running_loop()
+        executor = bedrock_client.async_executor
+        leading = None
+        try:
+            data = await self._read_json(receive)
+            message = data.get('message', '')
+            if not message:
+                await self._send_json(send, 400, {'response': 'No message provided.'})
+                return
+
+            user_session = self._load_session(scope)
+            had_bedrock_session = 'bedrock_session_id' in user_session
+            user_type, department, role, user_name = resolve_user_context(data, user_session)
+            leading = await self._wait_for_identical_stream(
+                response_cache_key(message, user_type, department, user_session))
+            # Policy, local and cached answers are decided here; the agent is only called once iterated
+            pieces = await loop.run_in_executor(executor, lambda: get_response_stream(
+                message, user_type, department, role, user_name, session=user_session, coalesce=False))
+            history_session_id = get_bedrock_session_id(user_session)
+        except Exception as e:
+            print("❌ Async chat stream route error:", e)
+            self._release_stream(leading)
+            await self._send_json(send, 500, {'response': 'Internal server error occurred.'})
+            return
+
+        headers = self._headers(b'text/event-stream')
+        headers += [(b'cache-control', b'no-cache'), (b'x-accel-buffering', b'no')]
+        if 'bedrock_session_id' in user_session and not had_bedrock_session:
+            headers += self._cookie_headers(self._session_cookie(user_session))
+
+        answer = []
+        try:
+            await send({'type': 'http.response.start', 'status': 200, 'headers': headers})
+            while True:
+                try:
+                    # Each next() blocks until Bedrock sends the next chunk, so it runs on the executor
+                    piece = await loop.run_in_executor(executor, next, pieces, None)
+                except Exception as e:
+                    print("❌ Chat stream error:", e)
+                    await self._send_delta(send, 'Internal server error occurred.')
+                    break
+                if piece is None:
+                    break
+                answer.append(piece)
+                await self._send_delta(send, piece)
+            history_store.record(history_session_id, message, "".join(answer))
+            await send({'type': 'http.response.body', 'body': b"event: done\ndata: {}\n\n"})
+        finally:
+            # Also when the client went away mid-answer: stops the agent stream now
+            await loop.run_in_executor(executor, self._close_stream, pieces)
+            self._release_stream(leading)
+
+    async def _wait_for_identical_stream(self, shared_key):
+        """
+        Single-flight for streamed answers, kept on the event loop: followers of
+        single_flight would block an executor thread each while the leader needs
+        those same threads for its chunks. The first request for a key leads and
+        gets back (key, future); later ones wait here for the leader to finish
+        and then usually find its answer in the response cache.
+        """
+        if shared_key is None:
+            return None
+        waiting = self._streams.get(shared_key)
+        if waiting is None:
+            future = asyncio.get_running_loop().create_future()
+            self._streams[shared_key] = future
+            return shared_key, future
+        try:
+            await asyncio.wait_for(asyncio.shield(waiting), single_flight.timeout)
+        except asyncio.TimeoutError:
+            pass  # Ask the agent ourselves, as single_flight does
+        return None
+
+    def _release_stream(self, leading):
+        if leading is None:
+            return
+        shared_key, future = leading
+        if self._streams.get(shared_key) is future:
+            del self._streams[shared_key]
+        if not future.done():
+            future.set_result(None)
+
+    @staticmethod
+    async def _send_delta(send, piece):
+        event = f"data: {json.dumps({'delta': piece})}\n\n"
+        await send({'type': 'http.response.body', 'body': event.encode('utf-8'), 'more_body': True})
+
+    @staticmethod
+    def _close_stream(pieces):
+        try:
+            pieces.close()
+        except ValueError:
+            pass  # Still inside next() after a cancellation; it finishes on its own
+
+    @staticmethod
+    def _headers(content_type, length=None):
+        headers = [
+            (b'content-type', content_type),
+            (b'access-control-allow-origin', b'*'),  # Same as CORS(app) for the Flask routes
+        ]
+        if length is not None:
+            headers.append((b'content-length', str(length).encode()))
+        return headers
+
+    @staticmethod
+    def _cookie_headers(cookie):
+        return [(b'set-cookie', cookie.encode('latin-1')), (b'vary', b'Cookie')]
+
+    async def _send_json(self, send, status, payload, cookie=None):
+        body = json.dumps(payload).encode('utf-8')
+        headers = self._headers(b'application/json', len(body))
+        if cookie:
+            headers += self._cookie_headers(cookie)
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
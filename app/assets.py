@@ -0,0 +1,187 @@
+"""
+Static asset pipeline.
+
+Every file under static/ gets a fingerprinted name with a hash of its
+content ('css/style.css' -> 'css/style.1a2b3c4d5e.css'), and url_for('static')
+returns that name. Since the URL changes whenever the file does, responses
+are cached by browsers as immutable for a year; repeat visits fetch nothing.
+Text assets are also compressed once, at build time, with gzip (and brotli
+if the brotli package is installed), and the best variant the browser
+accepts is served as is. Files in dot-directories (.build, .gallery) are
+left alone.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import threading
+
+from flask import current_app, request, send_file
+
+from app.config import ASSET_BUILD_DIR, ASSET_COMPRESS_MIN_SIZE, ASSET_MAX_AGE, STATIC_DIR
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip only
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.txt', '.html', '.map', '.xml')
+
+# Content-Encoding -> (file suffix, compress function), most preferred first
+ENCODINGS = [('gzip', '.gz', lambda data: gzip.compress(data, 9, mtime=0))]
+if brotli is not None:
+    ENCODINGS.insert(0, ('br', '.br', lambda data: brotli.compress(data, quality=11)))
+
+MANIFEST_FILE = 'assets.json'
+HASH_LENGTH = 10
+
+
+def fingerprint(filename, digest):
+    root, extension = os.path.splitext(filename)
+    return f"{root}.{digest[:HASH_LENGTH]}{extension}"
+
+
+class AssetPipeline:
+    """
+    Fingerprints and precompresses the static folder, and serves the result.
+
+    build() hashes the files (only those changed since the saved manifest)
+    and writes the compressed variants into build_dir. init_app() builds,
+    makes url_for('static', ...) return fingerprinted names and replaces the
+    static view. Names without a fingerprint are still served by Flask's
+    own static handler.
+    """
+
+    def __init__(self, static_dir=STATIC_DIR, build_dir=ASSET_BUILD_DIR, max_age=ASSET_MAX_AGE,
+                 min_size=ASSET_COMPRESS_MIN_SIZE):
+        self.static_dir = static_dir
+        self.build_dir = build_dir
+        self.max_age = max_age
+        self.min_size = min_size
+        self.files = {}      # name -> (digest, fingerprinted name)
+        self.originals = {}  # fingerprinted name -> name
+        self.encodings = {}  # fingerprinted name -> set of Content-Encodings available
+        self._lock = threading.Lock()
+
+    # ---------------- BUILD ----------------
+    def _walk(self):
+        for root, dirs, names in os.walk(self.static_dir):
+            dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+            for name in sorted(names):
+                if not name.startswith('.'):
+                    path = os.path.join(root, name)
+                    yield os.path.relpath(path, self.static_dir).replace(os.sep, '/'), path
+
+    def _load_manifest(self):
+        try:
+            with open(os.path.join(self.build_dir, MANIFEST_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_manifest(self, manifest):
+        path = os.path.join(self.build_dir, MANIFEST_FILE)
+        temporary = path + '.tmp'
+        with open(temporary, 'w') as f:
+            json.dump(manifest, f, indent=0, sort_keys=True)
+        os.replace(temporary, path)
+
+    def variant_path(self, fingerprinted, suffix):
+        return os.path.join(self.build_dir, fingerprinted + suffix)
+
+    def build(self):
+        """Fingerprint and compress the static folder; returns the number of files"""
+        saved = self._load_manifest()
+        manifest, files, originals, encodings = {}, {}, {}, {}
+        os.makedirs(self.build_dir, exist_ok=True)
+
+        for name, path in self._walk():
+            stat = os.stat(path)
+            entry = saved.get(name)
+            if entry and entry[:2] == [stat.st_mtime_ns, stat.st_size]:
+                digest = entry[2]
+            else:
+                with open(path, 'rb') as f:
+                    digest = hashlib.sha256(f.read()).hexdigest()
+            manifest[name] = [stat.st_mtime_ns, stat.st_size, digest]
+            fingerprinted = fingerprint(name, digest)
+            files[name] = (digest, fingerprinted)
+            originals[fingerprinted] = name
+            if name.endswith(COMPRESSIBLE_EXTENSIONS) and stat.st_size >= self.min_size:
+                encodings[fingerprinted] = self._compress(path, fingerprinted)
+
+        try:
+            self._save_manifest(manifest)
+        except OSError as e:
+            print(f"Could not save asset manifest: {e}")
+        with self._lock:
+            self.files, self.originals, self.encodings = files, originals, encodings
+        return len(files)
+
+    def _compress(self, path, fingerprinted):
+        """Write any missing compressed variants (their names carry the hash, so existing ones are current)"""
+        available = set()
+        data = None
+        for encoding, suffix, compress in ENCODINGS:
+            target = self.variant_path(fingerprinted, suffix)
+            if not os.path.exists(target):
+                if data is None:
+                    with open(path, 'rb') as f:
+                        data = f.read()
+                compressed = compress(data)
+                if len(compressed) >= len(data):
+                    continue  # No gain: serve the original
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with open(target + '.tmp', 'wb') as f:
+                    f.write(compressed)
+                os.replace(target + '.tmp', target)
+            available.add(encoding)
+        return available
+
+    # ---------------- URLS ----------------
+    def url_name(self, filename):
+        """Fingerprinted name of a static file, or the name itself if it isn't known"""
+        entry = self.files.get(filename)
+        return entry[1] if entry else filename
+
+    def init_app(self, app):
+        if app.static_folder:
+            self.static_dir = app.static_folder
+        self.build()
+        app.url_defaults(self._url_defaults)
+        app.view_functions['static'] = self.serve
+
+    def _url_defaults(self, endpoint, values):
+        if endpoint == 'static' and 'filename' in values:
+            values['filename'] = self.url_name(values['filename'])
+
+    # ---------------- SERVING ----------------
+    def serve(self, filename):
+        """Static view: fingerprinted names are immutable and served precompressed when possible"""
+        name = self.originals.get(filename)
+        if name is None:
+            return current_app.send_static_file(filename)
+
+        digest = self.files[name][0]
+        path, etag, content_encoding = os.path.join(self.static_dir, name), digest, None
+        available = self.encodings.get(filename)
+        if available:
+            for encoding, suffix, _ in ENCODINGS:
+                if encoding in available and request.accept_encodings[encoding]:
+                    path, etag, content_encoding = self.variant_path(filename, suffix), f"{digest}-{encoding}", encoding
+                    break
+
+        mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        response = send_file(path, mimetype=mimetype, etag=etag, max_age=self.max_age)
+        if content_encoding:
+            response.headers['Content-Encoding'] = content_encoding
+        if available:
+            response.vary.add('Accept-Encoding')
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+
+
+# Global instance
+assets = AssetPipeline()
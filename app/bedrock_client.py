@@ -1,7 +1,23 @@
 import os
-import boto3
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
 import json
 from botocore.exceptions import ClientError, NoCredentialsError
+from app.bedrock_transport import (
+    CircuitBreaker, CircuitOpenError, DeadlineExceeded, TIMEOUT_ERRORS,
+    backoff_delay, build_client_config, is_degraded, is_retryable, is_throttling,
+)
+from app.metrics import (
+    BEDROCK_ERRORS, BEDROCK_FIRST_CHUNK_SECONDS, BEDROCK_RETRIEVED_REFERENCES, BEDROCK_STREAM_SECONDS,
+    access_labels,
+)
+from app.retrieval import DEFAULT_PROFILE, to_kb_filter
+from app.config import (
+    BEDROCK_ASYNC_WORKERS, BEDROCK_CALL_DEADLINE, BEDROCK_MAX_ATTEMPTS, BEDROCK_RETRY_BASE_DELAY, BEDROCK_WARM_CLIENT,
+)
 
 # Optional: load environment variables from a .env file if present
 try:
@@ -11,6 +27,44 @@ except Exception:
     # dotenv is optional; safe to continue if not installed
     pass
 
+# Prefixes of the messages chat() returns instead of an agent answer
+ERROR_RESPONSE_PREFIXES = (
+    "AWS Bedrock Agent client not initialized",
+    "Access denied.",
+    "Invalid request.",
+    "Agent not found.",
+    "AWS Bedrock Agent error:",
+    "No AWS credentials found.",
+    "Unexpected error:",
+    "Sorry, I couldn't",
+    "PKonnect is busy",
+    "PKonnect is temporarily unavailable",
+    "PKonnect took too long",
+)
+
+def is_error_response(text):
+    """Check whether a chat() result is an error/fallback message rather than an answer"""
+    return not text or text.startswith(ERROR_RESPONSE_PREFIXES)
+
+def retrieved_reference_count(trace_event):
+    """
+    Number of knowledge base references in an invoke_agent trace event, or
+    None if it isn't a knowledge base lookup. The event payload nests the
+    trace itself under a second "trace" key.
+    """
+    trace = trace_event.get("trace", {})
+    observation = trace.get("orchestrationTrace", {}).get("observation", {})
+    kb_output = observation.get("knowledgeBaseLookupOutput")
+    if kb_output is None:
+        return None
+    return len(kb_output.get("retrievedReferences", []))
+
+def metric_error_code(error):
+    """AWS error code of an exception (e.g. ThrottlingException), else its class name"""
+    if isinstance(error, ClientError):
+        return error.response.get('Error', {}).get('Code') or type(error).__name__
+    return type(error).__name__
+
 class BedrockClient:
     def __init__(self):
         """
@@ -26,20 +80,63 @@ class BedrockClient:
         self.agent_id = os.getenv("AGENT_ID", "KGNSQQYWQD")
         self.alias_id = os.getenv("AGENT_ALIAS_ID", "Y5HBOIBFJR")
         self.session_id = os.getenv("SESSION_ID", "session-001")
-        aws_profile = os.getenv("AWS_PROFILE")
-        
+        self.aws_profile = os.getenv("AWS_PROFILE")
+
+        # Transport behaviour (see app/bedrock_transport.py)
+        self.call_deadline = BEDROCK_CALL_DEADLINE
+        self.max_attempts = BEDROCK_MAX_ATTEMPTS
+        self.retry_base_delay = BEDROCK_RETRY_BASE_DELAY
+        self.breaker = CircuitBreaker()
+        self._async_executor = None
+        self._executor_lock = threading.Lock()
+
+        # The boto3 client is built on first use (see bedrock_agent), so importing
+        # the app doesn't pay for importing boto3 and loading the service model
+        self.session = None
+        self._bedrock_agent = None
+        self._agent_built = False
+        self._agent_lock = threading.Lock()
+
+    @property
+    def bedrock_agent(self):
+        """The bedrock-agent-runtime client (None if it couldn't be created), built on first use"""
+        if not self._agent_built:
+            with self._agent_lock:
+                if not self._agent_built:
+                    self._bedrock_agent = self._build_agent()
+                    self._agent_built = True
+        return self._bedrock_agent
+
+    @bedrock_agent.setter
+    def bedrock_agent(self, agent):
+        with self._agent_lock:
+            self._bedrock_agent = agent
+            self._agent_built = True
+
+    def _build_agent(self):
         try:
+            import boto3
+
             # Use a session so we can honor AWS_PROFILE if provided
-            if aws_profile:
-                self.session = boto3.Session(profile_name=aws_profile, region_name=self.region)
+            if self.aws_profile:
+                self.session = boto3.Session(profile_name=self.aws_profile, region_name=self.region)
             else:
                 self.session = boto3.Session(region_name=self.region)
             
-            self.bedrock_agent = self.session.client("bedrock-agent-runtime")
+            # Shared by all worker threads: pooled, with timeouts and adaptive retries
+            return self.session.client("bedrock-agent-runtime", config=build_client_config())
         except NoCredentialsError:
-            self.bedrock_agent = None
+            return None
         except Exception as e:
-            self.bedrock_agent = None
+            return None
+
+    def warm(self):
+        """Build the client in a background thread, so neither startup nor the first question waits for it"""
+        if self._agent_built or not BEDROCK_WARM_CLIENT:
+            return None
+        thread = threading.Thread(target=lambda: self.bedrock_agent, name='bedrock-warm', daemon=True)
+        thread.start()
+        return thread
     
     def set_agent_config(self, agent_id, alias_id, session_id=None):
         """Set the agent configuration"""
@@ -71,93 +168,176 @@ class BedrockClient:
         
         return text.strip()
     
-    def chat(self, user_message, session_id=None, metadata_filter=None):
+    def _build_request(self, user_message, session_id=None, metadata_filter=None, retrieval=None):
+        """Build the invoke_agent parameters for a message, retrieving as `retrieval` (a RetrievalProfile) says"""
+        # Use provided session_id or default
+        current_session_id = session_id or self.session_id
+
+        # Build the request parameters
+        request_params = {
+            'agentId': self.agent_id,
+            'agentAliasId': self.alias_id,
+            'sessionId': current_session_id,
+            'inputText': user_message,
+        }
+
+        # Add session state with knowledge base configuration
+        # Retrieval depth depends on the question: a few chunks for general
+        # questions, up to 50 for lists of students (see app/retrieval.py)
+        retrieval = retrieval or DEFAULT_PROFILE
+        kb_config = {
+            'knowledgeBaseId': '4DD13OSHSU',  # pkstudents-knowledgebase
+            'retrievalConfiguration': {
+                'vectorSearchConfiguration': {
+                    'numberOfResults': retrieval.number_of_results,
+                    'overrideSearchType': retrieval.search_type  # HYBRID adds keyword matching for names
+                }
+            }
+        }
+
+        # Add metadata filter if provided, so the search only returns permitted chunks
+        kb_filter = to_kb_filter(metadata_filter)
+        if kb_filter:
+            kb_config['retrievalConfiguration']['vectorSearchConfiguration']['filter'] = kb_filter
+
+        request_params['sessionState'] = {
+            'knowledgeBaseConfigurations': [kb_config],
+            # Add prompt session attributes to guide the agent
+            'promptSessionAttributes': {
+                'retrievalMode': retrieval.mode,
+                'includeAllResults': 'true' if retrieval.mode == 'comprehensive' else 'false'
+            }
+        }
+        return request_params
+
+    def _iter_chunks(self, request_params, labels=None):
+        """
+        Invoke the agent and yield each decoded text chunk as it arrives.
+
+        botocore already retries the invoke_agent call itself. Throttling or
+        server errors raised from the event stream before any text was
+        produced are retried here with jittered backoff. The whole call is
+        bounded by call_deadline and guarded by the circuit breaker.
+
+        `labels` are the (access_level, department, profile) metric labels;
+        time to first chunk, stream duration, retrieved references and errors
+        are recorded under them.
+        """
+        labels = labels or self._metric_labels(None, None)
+        started = time.perf_counter()
+        try:
+            yield from self._invoke_with_retries(request_params, labels, started)
+        except Exception as e:
+            BEDROCK_ERRORS.labels(*labels, metric_error_code(e)).inc()
+            raise
+        BEDROCK_STREAM_SECONDS.labels(*labels).observe(time.perf_counter() - started)
+
+    def _invoke_with_retries(self, request_params, labels, started):
+        deadline = time.monotonic() + self.call_deadline if self.call_deadline else None
+        attempt = 0
+        first_chunk = True
+        while True:
+            if not self.breaker.allow():
+                raise CircuitOpenError("Bedrock circuit breaker is open")
+
+            attempt += 1
+            stream_started = False
+            produced_text = False
+            try:
+                # Invoke the Bedrock Agent
+                response_stream = self.bedrock_agent.invoke_agent(**request_params)
+                stream_started = True
+
+                # The response is an event stream of "chunks"
+                for event in response_stream.get("completion", []):
+                    if deadline is not None and time.monotonic() > deadline:
+                        raise DeadlineExceeded(f"Agent call exceeded {self.call_deadline}s deadline")
+                    if "chunk" in event:
+                        chunk_data = event["chunk"]
+                        if "bytes" in chunk_data:
+                            if first_chunk:
+                                BEDROCK_FIRST_CHUNK_SECONDS.labels(*labels).observe(time.perf_counter() - started)
+                                first_chunk = False
+                            produced_text = True
+                            yield chunk_data["bytes"].decode("utf-8")
+                    elif "trace" in event:
+                        references = retrieved_reference_count(event["trace"])
+                        if references is not None:
+                            BEDROCK_RETRIEVED_REFERENCES.labels(*labels).observe(references)
+            except Exception as e:
+                if not is_degraded(e):
+                    # Bedrock answered (e.g. AccessDenied): the service itself is healthy
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                if not stream_started or produced_text or not is_retryable(e) or attempt >= self.max_attempts:
+                    raise
+                delay = backoff_delay(attempt, self.retry_base_delay)
+                if deadline is not None and time.monotonic() + delay > deadline:
+                    raise
+                print(f"Bedrock stream error ({e}), retrying in {delay:.2f}s")
+                time.sleep(delay)
+                continue
+            except BaseException:
+                # Abandoned mid-stream (GeneratorExit when the client disconnects): text already
+                # sent counts as a success, otherwise just free a half-open trial slot
+                if produced_text:
+                    self.breaker.record_success()
+                else:
+                    self.breaker.release()
+                raise
+
+            self.breaker.record_success()
+            return
+
+    @staticmethod
+    def _metric_labels(labels, retrieval):
+        """(access_level, department) from the caller plus the retrieval profile name"""
+        return tuple(labels or access_labels(None, None)) + ((retrieval or DEFAULT_PROFILE).name,)
+
+    def _error_message(self, error):
+        """Map an exception raised while talking to the agent to a user-facing message"""
+        if is_throttling(error):
+            return "PKonnect is busy answering lots of questions right now. Please try again in a moment."
+        if isinstance(error, CircuitOpenError):
+            return "PKonnect is temporarily unavailable. Please try again shortly."
+        if isinstance(error, (DeadlineExceeded,) + TIMEOUT_ERRORS):
+            return "PKonnect took too long to respond. Please try again."
+        if isinstance(error, ClientError):
+            error_code = error.response['Error']['Code']
+            if error_code == 'AccessDeniedException':
+                return "Access denied. Please check your AWS permissions for Bedrock Agents."
+            elif error_code == 'ValidationException':
+                return "Invalid request. Please check the agent ID and alias ID."
+            elif error_code == 'ResourceNotFoundException':
+                return "Agent not found. Please check your agent ID and alias ID."
+            else:
+                return f"AWS Bedrock Agent error: {error_code}"
+        if isinstance(error, NoCredentialsError):
+            return "No AWS credentials found. Set AWS_PROFILE or AWS_ACCESS_KEY_ID/SECRET and try again."
+        return f"Unexpected error: {str(error)}"
+
+    def chat(self, user_message, session_id=None, metadata_filter=None, labels=None, retrieval=None):
         """
         Send a message to AWS Bedrock Agent and get response
         
         Args:
             user_message: The message to send to the agent
             session_id: Optional session ID for conversation continuity
-            metadata_filter: Optional dict for filtering knowledge base results
-                            Example: {'department': 'BSc CSIT'}
+            metadata_filter: Optional dict for filtering knowledge base results, either
+                            Bedrock's filter format or a plain mapping (see to_kb_filter)
+                            Example: {'department': 'BSc CSIT', 'record_type': ['college', 'teacher']}
+            labels: Optional (access_level, department) metric labels
+            retrieval: Optional RetrievalProfile (knowledge base search depth and type)
         """
         if not self.bedrock_agent:
             return "AWS Bedrock Agent client not initialized. Please check your credentials."
         
-        # Use provided session_id or default
-        current_session_id = session_id or self.session_id
-        
         try:
-            # Build the request parameters
-            request_params = {
-                'agentId': self.agent_id,
-                'agentAliasId': self.alias_id,
-                'sessionId': current_session_id,
-                'inputText': user_message,
-            }
-            
-            # Add session state with knowledge base configuration
-            # Significantly increased chunks for comprehensive retrieval
-            # More chunks = better chance of finding all students and their complete data
-            kb_config = {
-                'knowledgeBaseId': '4DD13OSHSU',  # pkstudents-knowledgebase
-                'retrievalConfiguration': {
-                    'vectorSearchConfiguration': {
-                        'numberOfResults': 50,  # Increased to 50 for queries involving multiple students
-                        'overrideSearchType': 'HYBRID'  # Use hybrid search (semantic + keyword) for better accuracy
-                    }
-                }
-            }
-            
-            # Add metadata filter if provided
-            if metadata_filter:
-                kb_config['retrievalConfiguration']['vectorSearchConfiguration']['filter'] = {
-                    'equals': {
-                        'key': 'department',
-                        'value': metadata_filter.get('department', '')
-                    }
-                }
-            
-            request_params['sessionState'] = {
-                'knowledgeBaseConfigurations': [kb_config],
-                # Add prompt session attributes to guide the agent
-                'promptSessionAttributes': {
-                    'retrievalMode': 'comprehensive',
-                    'includeAllResults': 'true'
-                }
-            }
-            
-            # Invoke the Bedrock Agent
-            response_stream = self.bedrock_agent.invoke_agent(**request_params)
-            
+            request_params = self._build_request(user_message, session_id, metadata_filter, retrieval)
+
             # Collect the reply from the event stream
-            output_text = []
-            citations = []
-            
-            # The response is an event stream of "chunks"
-            for event in response_stream.get("completion", []):
-                if "chunk" in event:
-                    chunk_data = event["chunk"]
-                    if "bytes" in chunk_data:
-                        chunk = chunk_data["bytes"].decode("utf-8")
-                        output_text.append(chunk)
-                    # Collect citations to see what sources were used
-                    if "attribution" in chunk_data:
-                        citations.extend(chunk_data.get("attribution", {}).get("citations", []))
-                elif "trace" in event:
-                    # Log trace for debugging retrieval issues
-                    trace = event.get("trace", {})
-                    if "orchestrationTrace" in trace:
-                        orch_trace = trace["orchestrationTrace"]
-                        # Log retrieval results count for debugging
-                        if "observation" in orch_trace:
-                            obs = orch_trace["observation"]
-                            if "knowledgeBaseLookupOutput" in obs:
-                                kb_output = obs["knowledgeBaseLookupOutput"]
-                                retrieved_refs = kb_output.get("retrievedReferences", [])
-                                print(f"DEBUG: Retrieved {len(retrieved_refs)} documents from knowledge base")
-            
-            result = "".join(output_text)
+            result = "".join(self._iter_chunks(request_params, self._metric_labels(labels, retrieval)))
             
             # Format the response to handle escaped characters and markdown
             if result:
@@ -165,20 +345,114 @@ class BedrockClient:
             
             return result if result else "Sorry, I couldn't generate a response."
                 
-        except ClientError as e:
-            error_code = e.response['Error']['Code']
-            if error_code == 'AccessDeniedException':
-                return "Access denied. Please check your AWS permissions for Bedrock Agents."
-            elif error_code == 'ValidationException':
-                return "Invalid request. Please check the agent ID and alias ID."
-            elif error_code == 'ResourceNotFoundException':
-                return "Agent not found. Please check your agent ID and alias ID."
-            else:
-                return f"AWS Bedrock Agent error: {error_code}"
-        except NoCredentialsError:
-            return "No AWS credentials found. Set AWS_PROFILE or AWS_ACCESS_KEY_ID/SECRET and try again."
         except Exception as e:
-            return f"Unexpected error: {str(e)}"
+            return self._error_message(e)
+
+    @property
+    def async_executor(self):
+        """Bounded thread pool that runs blocking agent calls for the async path"""
+        if self._async_executor is None:
+            with self._executor_lock:
+                if self._async_executor is None:
+                    self._async_executor = ThreadPoolExecutor(
+                        max_workers=BEDROCK_ASYNC_WORKERS, thread_name_prefix="bedrock-async")
+        return self._async_executor
+
+    async def achat(self, user_message, session_id=None, metadata_filter=None, labels=None, retrieval=None):
+        """
+        Async variant of chat(). The boto3 event stream is consumed on
+        async_executor, so awaiting callers don't block the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.async_executor, lambda: self.chat(user_message, session_id, metadata_filter, labels, retrieval))
+
+    def chat_stream(self, user_message, session_id=None, metadata_filter=None, labels=None, retrieval=None):
+        """
+        Send a message to AWS Bedrock Agent and yield the formatted response
+        incrementally, one piece per completion chunk.
+
+        Joining everything yielded gives the same text chat() would return.
+        Errors are yielded as a single message, just like chat() returns them.
+        """
+        if not self.bedrock_agent:
+            yield "AWS Bedrock Agent client not initialized. Please check your credentials."
+            return
+
+        formatter = StreamFormatter(self._format_response)
+        try:
+            request_params = self._build_request(user_message, session_id, metadata_filter, retrieval)
+            # closing(): if our caller abandons us, the agent stream is closed now, not when collected
+            with closing(self._iter_chunks(request_params, self._metric_labels(labels, retrieval))) as chunks:
+                for chunk in chunks:
+                    delta = formatter.feed(chunk)
+                    if delta:
+                        yield delta
+        except Exception as e:
+            if not formatter.emitted:
+                yield self._error_message(e)
+                return
+            print(f"Bedrock stream interrupted: {e}")
+
+        delta = formatter.flush()
+        if delta:
+            yield delta
+        if not formatter.emitted:
+            yield "Sorry, I couldn't generate a response."
+
+
+class StreamFormatter:
+    """
+    Applies a whole-text formatter to a stream of chunks, in linear time.
+
+    _format_response only rewrites backslash escapes and whitespace runs and
+    strips the ends, so the raw text can be cut wherever two ordinary
+    characters meet (neither whitespace nor a backslash, and not the letter
+    of an escape): formatting the parts separately gives the same text as
+    formatting the whole. Each feed() formats and returns only the raw text
+    up to the last such cut; the rest waits for the next chunk or flush().
+    """
+
+    def __init__(self, format_fn):
+        self._format = format_fn
+        self._pending = ""  # Raw text after the last cut
+        self._before = ""   # Raw character just before _pending
+        self.emitted = False
+
+    def feed(self, chunk):
+        checked = len(self._pending)
+        self._pending += chunk
+        cut = self._last_cut(max(1, checked))
+        if cut is None:
+            return ""
+        part, self._pending = self._pending[:cut], self._pending[cut:]
+        self._before = part[-1]
+        return self._emit(part)
+
+    def flush(self):
+        part, self._pending = self._pending, ""
+        return self._emit(part) if part else ""
+
+    def _last_cut(self, lowest):
+        """Last position in _pending (at or after `lowest`) between two ordinary characters"""
+        text = self._pending
+        for cut in range(len(text) - 1, lowest - 1, -1):
+            if self._ordinary(text[cut]) and self._ordinary(text[cut - 1]):
+                escape = text[cut - 2] if cut >= 2 else self._before
+                if escape != '\\':
+                    return cut
+        return None
+
+    @staticmethod
+    def _ordinary(char):
+        return char != '\\' and not char.isspace()
+
+    def _emit(self, part):
+        # Only the first part can start with whitespace (stripped, as for the whole text)
+        delta = self._format(part)
+        if delta:
+            self.emitted = True
+        return delta
 
 # Global instance
 bedrock_client = BedrockClient()
\ No newline at end of file
@@ -1,24 +1,33 @@
-from app.bedrock_client import bedrock_client
+from app.bedrock_client import bedrock_client, is_error_response
+from app.cache import response_cache, single_flight
+from app.local_lookup import local_lookup
+from app.retrieval import access_filter, select_profile
+from app.config import KB_METADATA_FILTERS
+from app.metrics import CACHE_LOOKUPS, POLICY_SHORT_CIRCUITS, REQUEST_SECONDS, RESPONSE_BYTES, access_labels
+from app.policy import check_policy
+from app.utils import normalized_words, recognize_intent, is_follow_up
 from flask import session as flask_session
+import asyncio
+import time
 import uuid
 
-# ---------------- QUERY BEDROCK AGENT ----------------
-def query_bedrock(prompt, user_type="guest", department=None, role=None, user_name=None):
+# ---------------- BEDROCK SESSION ----------------
+def get_bedrock_session_id(session=None):
     """
-    Query AWS Bedrock Agent with access-based control.
-    The agent is configured with knowledge about Padma Kanya College and access levels.
+    Return the Bedrock session id for this user, creating one on first use.
+    `session` defaults to the Flask session; the ASGI chat path passes its own dict.
+    """
+    if session is None:
+        session = flask_session
+    if 'bedrock_session_id' not in session:
+        session['bedrock_session_id'] = f"session-{uuid.uuid4().hex[:8]}"
+    return session['bedrock_session_id']
+
+# ---------------- BUILD PROMPT ----------------
+def build_prompt(prompt, user_type="guest", department=None, user_name=None):
+    """
+    Wrap the user's question with the access control context for their level.
     """
-    
-    is_new_session = 'bedrock_session_id' not in flask_session
-    
-    if is_new_session:
-        flask_session['bedrock_session_id'] = f"session-{uuid.uuid4().hex[:8]}"
-    
-    session_id = flask_session['bedrock_session_id']
-    
-    # ALWAYS add access control context to maintain restrictions throughout conversation
-    metadata_filter = None  # For knowledge base filtering
-    
     # Build user identity string if name is available
     user_identity = f"User: {user_name}" if user_name else "User"
     
@@ -56,19 +65,229 @@ Full access to all information."""
 User question: {prompt}
 
 RESTRICTION: Only general college information."""
-        
+
+    return enhanced_prompt
+
+# ---------------- RESPONSE CACHE ----------------
+def response_cache_key(prompt, user_type="guest", department=None, session=None):
+    """
+    Cache key for a question, or None if the answer must not be shared.
+
+    Guest questions are always cacheable; logged-in users only share answers
+    to general questions, and only within their own access level and department.
+    Prompts for cacheable questions are built without the user's name, so a
+    shared answer never addresses someone else.
+    Follow-ups ("what about his email?") depend on the Bedrock session and
+    are never cached once a conversation is under way.
+    """
+    if user_type not in ("student", "teacher"):
+        user_type = "guest"
+        department = None
+    elif recognize_intent(prompt) != "general":
+        return None
+
+    if session is None:
+        session = flask_session
+    if 'bedrock_session_id' in session and is_follow_up(prompt):
+        return None
+
+    words = normalized_words(prompt)
+    if not words:
+        return None
+    return (user_type, department or "", " ".join(words))
+
+# ---------------- RETRIEVAL FILTER ----------------
+def retrieval_filter(user_type="guest", department=None):
+    """
+    Knowledge base filter enforcing the user's access level in the vector
+    search itself, when KB_METADATA_FILTERS is on (the documents need the
+    metadata); the prompt instructions stay as a second line of defence.
+    """
+    if not KB_METADATA_FILTERS:
+        return None
+    return access_filter(user_type, department)
+
+# ---------------- METRICS ----------------
+def cached_response(shared_key, labels):
+    """response_cache lookup that also counts the hit or miss"""
+    cached = response_cache.get(shared_key)
+    CACHE_LOOKUPS.labels(*labels, 'miss' if cached is None else 'hit').inc()
+    return cached
+
+def policy_response(prompt, user_type, role, labels):
+    """The policy stage's canned answer or refusal (counted as a saved agent call), or None"""
+    decision = check_policy(prompt, user_type, role)
+    if decision is None:
+        return None
+    POLICY_SHORT_CIRCUITS.labels(*labels, decision.action, decision.intent).inc()
+    return decision.response
+
+def observe_answer(labels, source, started, response):
+    """Record the time taken and the size of an answer; source is policy, local, cache or agent"""
+    REQUEST_SECONDS.labels(*labels, source).observe(time.perf_counter() - started)
+    RESPONSE_BYTES.labels(*labels, source).observe(len(response.encode('utf-8')) if response else 0)
+
+def _observed_stream(pieces, labels, source, started):
+    """Pass pieces through, recording the answer once the stream ends"""
+    size = 0
     try:
-        # Temporarily disable metadata filter to test if data is accessible
-        # We'll rely on prompt-based filtering for now
+        for piece in pieces:
+            size += len(piece.encode('utf-8'))
+            yield piece
+    finally:
+        REQUEST_SECONDS.labels(*labels, source).observe(time.perf_counter() - started)
+        RESPONSE_BYTES.labels(*labels, source).observe(size)
+
+# ---------------- QUERY BEDROCK AGENT ----------------
+def query_bedrock(prompt, user_type="guest", department=None, role=None, user_name=None, session=None):
+    """
+    Query AWS Bedrock Agent with access-based control.
+    The agent is configured with knowledge about Padma Kanya College and access levels.
+    Before it is called, small talk and topics the user may not ask about are
+    handled by the policy stage (app/policy.py), teaching-assignment questions
+    are answered from local_lookup, and repeated guest/general questions from
+    response_cache; identical questions arriving together share a single agent
+    call (single_flight).
+    """
+    started = time.perf_counter()
+    labels = access_labels(user_type, department)
+
+    canned = policy_response(prompt, user_type, role, labels)
+    if canned is not None:
+        observe_answer(labels, 'policy', started, canned)
+        return canned
+    
+    local_answer = local_lookup.answer(prompt, user_type, department)
+    if local_answer is not None:
+        observe_answer(labels, 'local', started, local_answer)
+        return local_answer
+
+    shared_key = response_cache_key(prompt, user_type, department, session)
+    if shared_key is not None:
+        cached = cached_response(shared_key, labels)
+        if cached is not None:
+            observe_answer(labels, 'cache', started, cached)
+            return cached
+
+    session_id = get_bedrock_session_id(session)
+    
+    # ALWAYS add access control context to maintain restrictions throughout conversation.
+    # A cached answer is served to other users too, so its prompt leaves out the name.
+    enhanced_prompt = build_prompt(prompt, user_type, department, None if shared_key else user_name)
+    retrieval = select_profile(prompt, user_type)
+    metadata_filter = retrieval_filter(user_type, department)
+
+    def ask_agent():
         response = bedrock_client.chat(
             user_message=enhanced_prompt,
             session_id=session_id,
-            metadata_filter=None  # Disabled for now
+            metadata_filter=metadata_filter,
+            labels=labels,
+            retrieval=retrieval,
         )
-        return response if response else "Sorry, I couldn't process your request at the moment."
+        if shared_key is not None and not is_error_response(response):
+            response_cache.set(shared_key, response)
+        return response
+        
+    try:
+        if shared_key is not None:
+            response = single_flight.do(shared_key, ask_agent)
+        else:
+            response = ask_agent()
+        response = response if response else "Sorry, I couldn't process your request at the moment."
     except Exception as e:
         print(f"Bedrock Agent API error: {e}")
-        return "Sorry, I couldn't process your request at the moment."
+        response = "Sorry, I couldn't process your request at the moment."
+    observe_answer(labels, 'agent', started, response)
+    return response
+
+def query_bedrock_stream(prompt, user_type="guest", department=None, role=None, user_name=None, session=None,
+                         coalesce=True):
+    """
+    Streaming variant of query_bedrock: returns a generator of response text pieces.
+
+    The Bedrock session is resolved before the generator is returned, because
+    the Flask session can no longer be changed once the response has started.
+    `session` defaults to the Flask session; the ASGI path passes its own dict.
+    With coalesce=False the answer is still cached but identical questions are
+    not shared through single_flight: the ASGI path waits for those itself.
+    """
+    started = time.perf_counter()
+    labels = access_labels(user_type, department)
+
+    canned = policy_response(prompt, user_type, role, labels)
+    if canned is not None:
+        return _observed_stream([canned], labels, 'policy', started)
+
+    local_answer = local_lookup.answer(prompt, user_type, department)
+    if local_answer is not None:
+        return _observed_stream([local_answer], labels, 'local', started)
+
+    shared_key = response_cache_key(prompt, user_type, department, session)
+    if shared_key is not None:
+        cached = cached_response(shared_key, labels)
+        if cached is not None:
+            return _observed_stream([cached], labels, 'cache', started)
+
+    session_id = get_bedrock_session_id(session)
+    enhanced_prompt = build_prompt(prompt, user_type, department, None if shared_key else user_name)  # See query_bedrock
+    pieces = bedrock_client.chat_stream(
+        user_message=enhanced_prompt,
+        session_id=session_id,
+        metadata_filter=retrieval_filter(user_type, department),
+        labels=labels,
+        retrieval=select_profile(prompt, user_type),
+    )
+    if shared_key is not None and not coalesce:
+        pieces = _lead_stream(pieces, shared_key)
+    elif shared_key is not None:
+        flight, is_leader = single_flight.begin(shared_key)
+        if is_leader:
+            pieces = _lead_stream(pieces, shared_key, flight)
+        else:
+            pieces = _follow_stream(pieces, flight)
+    return _observed_stream(pieces, labels, 'agent', started)
+
+def _lead_stream(pieces, shared_key, flight=None):
+    """Pass pieces through, then cache and share the full answer with waiting followers"""
+    collected = []
+    response = None
+    try:
+        for piece in pieces:
+            collected.append(piece)
+            yield piece
+        response = "".join(collected)
+        if not is_error_response(response):
+            response_cache.set(shared_key, response)
+    finally:
+        if flight is not None:
+            single_flight.finish(shared_key, flight, response)
+
+def _follow_stream(pieces, flight):
+    """Wait for the leader's answer; ask the agent ourselves only if the leader failed"""
+    response = single_flight.wait(flight)
+    if response is None:
+        yield from pieces
+    else:
+        yield response
+
+async def query_bedrock_async(prompt, user_type="guest", department=None, role=None, user_name=None,
+                              session=None):
+    """
+    Async variant of query_bedrock for the ASGI chat path (app/asgi.py).
+
+    The blocking boto3 call runs on BedrockClient's bounded executor, so the
+    event loop can hold many conversations in flight at once. `session` is a
+    plain dict holding the decoded Flask session; bedrock_session_id is set
+    on it for the caller to persist.
+    """
+    if session is None:
+        session = {}
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        bedrock_client.async_executor,
+        lambda: query_bedrock(prompt, user_type, department, role, user_name, session=session),
+    )
 
 # ---------------- HANDLE USER QUERY ----------------
 def handle_user_query(user_query, user_type="guest", department=None, role=None, user_name=None):
@@ -0,0 +1,141 @@
+import random
+import threading
+import time
+
+from botocore.exceptions import ClientError, ConnectionClosedError, ConnectTimeoutError, \
+    EndpointConnectionError, ReadTimeoutError
+
+from app.config import (
+    BEDROCK_BREAKER_FAILURES, BEDROCK_BREAKER_RESET, BEDROCK_CONNECT_TIMEOUT, BEDROCK_MAX_ATTEMPTS,
+    BEDROCK_MAX_POOL_CONNECTIONS, BEDROCK_READ_TIMEOUT, BEDROCK_RETRY_MAX_DELAY, BEDROCK_RETRY_MODE,
+)
+
+# Error codes (lowercased) that mean "slow down" - the event stream spells them in camelCase
+THROTTLING_CODES = {'throttlingexception', 'toomanyrequestsexception', 'servicequotaexceededexception'}
+
+# Error codes (lowercased) for a degraded service that are worth retrying
+SERVER_ERROR_CODES = {
+    'internalserverexception', 'serviceunavailableexception',
+    'dependencyfailedexception', 'badgatewayexception',
+}
+
+TIMEOUT_ERRORS = (ReadTimeoutError, ConnectTimeoutError, ConnectionClosedError, EndpointConnectionError)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling Bedrock while the circuit breaker is open"""
+
+
+class DeadlineExceeded(Exception):
+    """Raised when an agent call runs past its per-call deadline"""
+
+
+def build_client_config():
+    """
+    botocore config for the bedrock-agent-runtime client: pool sized for the
+    server's threads, explicit timeouts and adaptive (rate-limited) retries.
+    """
+    from botocore.config import Config  # Slow to import; only needed once the client is built
+    return Config(
+        max_pool_connections=BEDROCK_MAX_POOL_CONNECTIONS,
+        connect_timeout=BEDROCK_CONNECT_TIMEOUT,
+        read_timeout=BEDROCK_READ_TIMEOUT,
+        retries={'mode': BEDROCK_RETRY_MODE, 'max_attempts': BEDROCK_MAX_ATTEMPTS},
+        tcp_keepalive=True,
+    )
+
+
+def error_code(error):
+    """Lowercased AWS error code of an exception, or '' if it has none"""
+    if isinstance(error, ClientError):
+        return error.response.get('Error', {}).get('Code', '').lower()
+    return ''
+
+
+def is_throttling(error):
+    return error_code(error) in THROTTLING_CODES
+
+
+def is_retryable(error):
+    """Throttling, transient server errors and dropped connections can be retried"""
+    code = error_code(error)
+    return code in THROTTLING_CODES or code in SERVER_ERROR_CODES or isinstance(error, TIMEOUT_ERRORS)
+
+
+def is_degraded(error):
+    """Errors that say Bedrock itself is unhealthy (and count towards the breaker)"""
+    return is_retryable(error) or isinstance(error, DeadlineExceeded)
+
+
+def backoff_delay(attempt, base, cap=BEDROCK_RETRY_MAX_DELAY):
+    """Exponential backoff with full jitter for retry number `attempt` (1-based)"""
+    return random.uniform(0, min(cap, base * (2 ** (attempt - 1))))
+
+
+class CircuitBreaker:
+    """
+    Fails fast while Bedrock is degraded.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    allow() returns False for `reset_timeout` seconds. Then one trial call
+    is let through (half-open); its success closes the circuit again,
+    its failure re-opens it. A trial abandoned with neither outcome (the
+    client went away) just frees the slot with release().
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=BEDROCK_BREAKER_FAILURES, reset_timeout=BEDROCK_BREAKER_RESET,
+                 clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return self.CLOSED
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self):
+        """Whether a call may go to Bedrock right now"""
+        if self.failure_threshold <= 0:
+            return True
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def release(self):
+        """Free the half-open trial slot without recording an outcome"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+            self._trial_in_flight = False
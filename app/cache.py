@@ -0,0 +1,161 @@
+import threading
+import time
+from collections import OrderedDict
+
+from app.config import BEDROCK_CALL_DEADLINE, RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU cache with a time-to-live per entry.
+
+    Used by query_bedrock to answer repeated guest/general questions
+    without another Bedrock Agent invocation.
+    """
+
+    def __init__(self, max_size=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        return self.max_size > 0 and self.ttl > 0
+
+    def get(self, key):
+        """Return the cached value for key, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """Store value under key, evicting the least recently used entries if full"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key):
+        """Forget key (no-op if it isn't cached)"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+            }
+
+
+
+class _Flight:
+    """One in-flight call that followers can wait on"""
+
+    def __init__(self, started_at):
+        self.started_at = started_at
+        self.done = threading.Event()
+        self.result = None
+        self.failed = False
+
+
+class SingleFlight:
+    """
+    Collapses concurrent identical calls into one.
+
+    The first caller for a key becomes the leader and does the work;
+    callers arriving while it runs wait for its result instead of making
+    their own call. If the leader fails, followers fall back to calling
+    themselves. A flight older than `timeout` is treated as abandoned.
+    """
+
+    def __init__(self, timeout=BEDROCK_CALL_DEADLINE or 120, clock=time.monotonic):
+        self.timeout = timeout
+        self._clock = clock
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.followers = 0
+
+    def begin(self, key):
+        """Return (flight, is_leader) for key"""
+        with self._lock:
+            flight = self._flights.get(key)
+            now = self._clock()
+            if flight is None or now - flight.started_at > self.timeout:
+                flight = _Flight(now)
+                self._flights[key] = flight
+                self.leaders += 1
+                return flight, True
+            self.followers += 1
+            return flight, False
+
+    def finish(self, key, flight, result=None, failed=False):
+        """Publish the leader's result (or failure) and release the followers"""
+        flight.result = result
+        flight.failed = failed or result is None
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.done.set()
+
+    def wait(self, flight):
+        """Wait for the leader; returns its result, or None if it failed or timed out"""
+        remaining = self.timeout - (self._clock() - flight.started_at)
+        if not flight.done.wait(max(remaining, 0)) or flight.failed:
+            return None
+        return flight.result
+
+    def do(self, key, fn):
+        """Run fn() once for all concurrent callers with the same key"""
+        flight, leader = self.begin(key)
+        if not leader:
+            result = self.wait(flight)
+            return result if result is not None else fn()
+
+        result = None
+        try:
+            result = fn()
+            return result
+        finally:
+            self.finish(key, flight, result)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'leaders': self.leaders,
+                'followers': self.followers,
+                'in_flight': len(self._flights),
+            }
+
+
+# Global instances
+response_cache = ResponseCache()
+single_flight = SingleFlight()
@@ -1,4 +1,4 @@
-from app.bedrock_proxy import query_bedrock
+from app.bedrock_proxy import query_bedrock, query_bedrock_stream
 
 def get_response(user_query, user_type="guest", department=None, role=None, user_name=None):
     """
@@ -8,3 +8,11 @@ def get_response(user_query, user_type="guest", department=None, role=None, user
     
     # Route all queries to Bedrock with access control
     return query_bedrock(user_query, user_type, department, role, user_name)
+
+def get_response_stream(user_query, user_type="guest", department=None, role=None, user_name=None, session=None,
+                        coalesce=True):
+    """
+    Streaming variant of get_response: yields the Bedrock answer piece by piece.
+    """
+    return query_bedrock_stream(user_query, user_type, department, role, user_name, session=session,
+                                coalesce=coalesce)
@@ -1,3 +1,5 @@
+import os
+
 # AWS Bedrock Agent Configuration
 
 # AWS Region (change as needed)
@@ -21,4 +23,86 @@ BEDROCK_MODELS = {
 }
 
 # Note: Bedrock Agents handle their own token limits and model selection
-# These settings are managed in the AWS Bedrock console
\ No newline at end of file
+# These settings are managed in the AWS Bedrock console
+
+# Response cache for guest and general questions (see app/cache.py)
+# Set RESPONSE_CACHE_SIZE=0 to disable caching
+RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', '900'))  # seconds
+RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', '512'))  # entries
+
+# Bedrock transport (see app/bedrock_transport.py)
+# One pooled connection per server thread, so threads never queue on the pool
+SERVER_THREADS = int(os.getenv('SERVER_THREADS', '16'))
+# Worker threads for the async (ASGI) chat path: the cap on concurrent agent calls there
+BEDROCK_ASYNC_WORKERS = int(os.getenv('BEDROCK_ASYNC_WORKERS', '128'))
+BEDROCK_MAX_POOL_CONNECTIONS = int(os.getenv('BEDROCK_MAX_POOL_CONNECTIONS',
+                                             str(max(SERVER_THREADS, BEDROCK_ASYNC_WORKERS))))
+BEDROCK_CONNECT_TIMEOUT = float(os.getenv('BEDROCK_CONNECT_TIMEOUT', '5'))  # seconds
+BEDROCK_READ_TIMEOUT = float(os.getenv('BEDROCK_READ_TIMEOUT', '60'))  # seconds between bytes
+BEDROCK_RETRY_MODE = os.getenv('BEDROCK_RETRY_MODE', 'adaptive')  # legacy | standard | adaptive
+BEDROCK_MAX_ATTEMPTS = int(os.getenv('BEDROCK_MAX_ATTEMPTS', '4'))
+BEDROCK_RETRY_BASE_DELAY = float(os.getenv('BEDROCK_RETRY_BASE_DELAY', '0.5'))  # seconds
+BEDROCK_RETRY_MAX_DELAY = float(os.getenv('BEDROCK_RETRY_MAX_DELAY', '8'))  # seconds
+BEDROCK_CALL_DEADLINE = float(os.getenv('BEDROCK_CALL_DEADLINE', '90'))  # seconds per agent call, 0 = none
+BEDROCK_BREAKER_FAILURES = int(os.getenv('BEDROCK_BREAKER_FAILURES', '5'))  # consecutive failures to open
+BEDROCK_BREAKER_RESET = float(os.getenv('BEDROCK_BREAKER_RESET', '30'))  # seconds before a trial call
+# Build the boto3 client in the background at startup instead of on the first question
+BEDROCK_WARM_CLIENT = os.getenv('BEDROCK_WARM_CLIENT', 'true').lower() in ('1', 'true', 'yes')
+
+# Knowledge base retrieval (see app/retrieval.py)
+# Filter retrieval by the documents' department / record_type metadata according to the
+# user's access level. Opt-in: documents without that metadata match no filter, so
+# guests and students would retrieve nothing. Every document needs a .metadata.json:
+#   {"metadataAttributes": {"record_type": "college" | "teacher" | "student",
+#                           "department": "BIT"}}   (department on student records)
+KB_METADATA_FILTERS = os.getenv('KB_METADATA_FILTERS', 'false').lower() in ('1', 'true', 'yes')
+
+# Department data (see app/dataloader.py)
+# Parsed tables are snapshotted here so spreadsheets aren't re-parsed on every start; empty = off
+DATA_SNAPSHOT_DIR = os.getenv('DATA_SNAPSHOT_DIR', os.path.join(os.path.dirname(__file__), '..', 'data', '.cache'))
+
+# SQLite (see app/db.py): one pooled WAL connection per thread
+SQLITE_BUSY_TIMEOUT = float(os.getenv('SQLITE_BUSY_TIMEOUT', '5'))  # seconds to wait for a lock
+SQLITE_CACHE_SIZE_KB = int(os.getenv('SQLITE_CACHE_SIZE_KB', '8192'))  # page cache per connection
+SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', str(64 * 1024 * 1024)))  # bytes, 0 = off
+SQLITE_STATEMENT_CACHE = int(os.getenv('SQLITE_STATEMENT_CACHE', '256'))  # prepared statements per connection
+# Set to false when the deployment runs utils/migrate_db.py once, so workers skip schema setup
+DB_MIGRATE_ON_START = os.getenv('DB_MIGRATE_ON_START', 'true').lower() in ('1', 'true', 'yes')
+
+# Login records cached by verify_user; changes made by another process show up after the TTL
+USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', '60'))  # seconds, 0 = off
+USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', '1024'))  # users
+
+# Password hashing (see app/passwords.py). scrypt memory per hash is 128 * N * r bytes (16 MB by default)
+PASSWORD_SCRYPT_N = int(os.getenv('PASSWORD_SCRYPT_N', str(2 ** 14)))
+PASSWORD_SCRYPT_R = int(os.getenv('PASSWORD_SCRYPT_R', '8'))
+PASSWORD_SCRYPT_P = int(os.getenv('PASSWORD_SCRYPT_P', '1'))
+PASSWORD_WORKERS = int(os.getenv('PASSWORD_WORKERS', str(os.cpu_count() or 2)))  # hashes computed at once
+PASSWORD_QUEUE_LIMIT = int(os.getenv('PASSWORD_QUEUE_LIMIT', '64'))  # logins waiting beyond that get a 503
+PASSWORD_TIMEOUT = float(os.getenv('PASSWORD_TIMEOUT', '10'))  # seconds a login waits for its hash
+
+# Landing page photo gallery (see app/gallery.py)
+STATIC_DIR = os.path.join(os.path.dirname(__file__), '..', 'static')
+GALLERY_DIR = os.getenv('GALLERY_DIR', os.path.join(STATIC_DIR, 'img', 'PKonnect_gallery'))
+# Resized copies go under static/ so they are served like any other static file
+GALLERY_CACHE_DIR = os.getenv('GALLERY_CACHE_DIR', os.path.join(STATIC_DIR, 'img', '.gallery'))
+GALLERY_WIDTHS = [int(w) for w in os.getenv('GALLERY_WIDTHS', '320,640,1280').split(',') if w]  # srcset widths
+GALLERY_FULL_WIDTH = int(os.getenv('GALLERY_FULL_WIDTH', '1920'))  # shown in the lightbox
+
+# Static assets (see app/assets.py): fingerprinted URLs and precompressed copies
+ASSET_BUILD_DIR = os.getenv('ASSET_BUILD_DIR', os.path.join(STATIC_DIR, '.build'))
+ASSET_MAX_AGE = int(os.getenv('ASSET_MAX_AGE', str(365 * 86400)))  # seconds; URLs change with the content
+ASSET_COMPRESS_MIN_SIZE = int(os.getenv('ASSET_COMPRESS_MIN_SIZE', '256'))  # bytes; smaller files aren't worth it
+
+# Feature flags sent to the chat page by /bootstrap
+CHAT_STREAMING = os.getenv('CHAT_STREAMING', 'true').lower() in ('1', 'true', 'yes')  # else the page uses /chat
+
+# Conversation history (see app/history.py)
+HISTORY_DATABASE = os.getenv('HISTORY_DATABASE', os.path.join(os.path.dirname(__file__), '..', 'history.db'))
+HISTORY_RING_SIZE = int(os.getenv('HISTORY_RING_SIZE', '50'))  # turns kept in memory per active session
+HISTORY_HOT_SESSIONS = int(os.getenv('HISTORY_HOT_SESSIONS', '2048'))  # sessions kept in memory
+HISTORY_MAX_TURNS = int(os.getenv('HISTORY_MAX_TURNS', '500'))  # turns kept on disk per session, 0 = all
+HISTORY_TTL_DAYS = float(os.getenv('HISTORY_TTL_DAYS', '90'))  # 0 = keep forever
+HISTORY_COMPACT_INTERVAL = float(os.getenv('HISTORY_COMPACT_INTERVAL', '3600'))  # seconds
+HISTORY_QUEUE_SIZE = int(os.getenv('HISTORY_QUEUE_SIZE', '10000'))  # turns waiting for the writer
+HISTORY_BATCH_SIZE = int(os.getenv('HISTORY_BATCH_SIZE', '200'))  # turns per write transaction
@@ -0,0 +1,319 @@
+import numpy as np
+import bisect
+import os
+import re
+import threading
+from collections import OrderedDict
+from app.config import DATA_SNAPSHOT_DIR
+from app.query_filter import QueryFilter, semester_from_word
+
+# Where department tables are looked up, in order
+DATA_DIRS = [
+    os.path.join(os.path.dirname(__file__), '..', 'data'),
+    os.path.join(os.path.dirname(__file__), '..', 'archive', 'data'),
+]
+
+# Source files per department: teacher table first, then the student roster
+DEPARTMENT_FILES = {
+    'BSC CSIT': ['bsc_csit_data.csv', 'batch2078.xlsx'],
+    'BIT': ['bit_data.csv'],
+}
+
+def find_data_file(filename):
+    """Return the path of the first data directory holding filename, or None"""
+    for base_path in DATA_DIRS:
+        filepath = os.path.join(base_path, filename)
+        if os.path.exists(filepath):
+            return filepath
+    return None
+
+class Table:
+    """
+    Column-oriented copy of one source file.
+
+    Numeric columns stay numeric numpy arrays; text columns become fixed-width
+    unicode arrays with missing cells as ''. Row dicts are only built on demand.
+    """
+
+    def __init__(self, columns, source=None, version=None):
+        self.columns = columns  # column name -> numpy array, in file order
+        self.source = source
+        self.version = version  # (mtime_ns, size) of the source file when read
+        self._records = None
+
+    def __len__(self):
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    @classmethod
+    def from_dataframe(cls, df, source=None):
+        import pandas as pd  # Only needed when a file is parsed, not for snapshots
+        columns = {}
+        for name in df.columns:
+            series = df[name]
+            if pd.api.types.is_numeric_dtype(series):
+                columns[str(name)] = series.to_numpy()
+            else:
+                columns[str(name)] = series.fillna('').astype(str).to_numpy(dtype=str)
+        return cls(columns, source)
+
+    def records(self):
+        """Rows as a list of dicts (built once, then reused)"""
+        if self._records is None:
+            names = list(self.columns)
+            values = [self.columns[name].tolist() for name in names]
+            self._records = [dict(zip(names, row)) for row in zip(*values)]
+        return self._records
+
+    def save(self, path):
+        """Write a pickle-free binary snapshot"""
+        arrays = {f"col{i}": values for i, values in enumerate(self.columns.values())}
+        np.savez(path, __columns__=np.array(list(self.columns), dtype=str), **arrays)
+
+    @classmethod
+    def load(cls, path, source=None):
+        with np.load(path, allow_pickle=False) as snapshot:
+            names = snapshot['__columns__'].tolist()
+            return cls({name: snapshot[f"col{i}"] for i, name in enumerate(names)}, source)
+
+class DataStore:
+    """
+    Parses each source file once and keeps it as a Table.
+
+    A table is re-read when its file's mtime or size changes. When a
+    snapshot directory is configured, parsed tables are also written there
+    as .npz files keyed by file name, mtime and size. A new process then
+    loads the snapshot instead of parsing the CSV/XLSX again (openpyxl is slow).
+    """
+
+    def __init__(self, snapshot_dir=DATA_SNAPSHOT_DIR):
+        self.snapshot_dir = snapshot_dir
+        self._tables = {}       # path -> (version, Table)
+        self._departments = {}  # department -> (versions, records)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _version(filepath):
+        stat = os.stat(filepath)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _snapshot_path(self, filepath, version):
+        name = f"{os.path.basename(filepath)}.{version[0]}.{version[1]}.npz"
+        return os.path.join(self.snapshot_dir, name)
+
+    def get_table(self, filepath):
+        """Return the Table for filepath, re-reading it only if the file changed"""
+        version = self._version(filepath)
+        with self._lock:
+            cached = self._tables.get(filepath)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            table = self._read(filepath, version)
+            table.version = version
+            self._tables[filepath] = (version, table)
+            return table
+
+    def _read(self, filepath, version):
+        snapshot = self._snapshot_path(filepath, version) if self.snapshot_dir else None
+        if snapshot and os.path.exists(snapshot):
+            try:
+                return Table.load(snapshot, filepath)
+            except Exception as e:
+                print(f"Ignoring unreadable data snapshot {snapshot}: {e}")
+
+        import pandas as pd  # Slow to import (as is openpyxl, which it loads for .xlsx)
+        if filepath.endswith('.xlsx'):
+            df = pd.read_excel(filepath)
+        else:
+            df = pd.read_csv(filepath)
+        table = Table.from_dataframe(df, filepath)
+
+        if snapshot:
+            try:
+                os.makedirs(self.snapshot_dir, exist_ok=True)
+                table.save(snapshot)
+            except Exception as e:
+                print(f"Could not write data snapshot {snapshot}: {e}")
+        return table
+
+    def department_tables(self, department):
+        """Tables for every source file of a department that exists"""
+        tables = []
+        for filename in DEPARTMENT_FILES.get(department, []):
+            filepath = find_data_file(filename)
+            if filepath is not None:
+                tables.append(self.get_table(filepath))
+        return tables
+
+    def department_records(self, department):
+        """
+        All rows of a department as dicts. The same list object is returned
+        until a source file changes, so search indexes built on it stay valid.
+        """
+        tables = self.department_tables(department)
+        versions = tuple((table.source, table.version) for table in tables)
+        with self._lock:
+            cached = self._departments.get(department)
+            if cached is not None and cached[0] == versions:
+                return cached[1]
+            records = [record for table in tables for record in table.records()]
+            self._departments[department] = (versions, records)
+            return records
+
+def load_department_data(department):
+    """
+    Load CSV and Excel data for the specified department.
+    Files are parsed once by the shared DataStore and re-read only when they change.
+    """
+    return data_store.department_records(department)
+
+# Columns that hold a person's name, for name matching
+NAME_COLUMNS = ('name_of_teacher', 'Nameof students')
+
+def tokenize(value):
+    """Lowercase alphanumeric words of a cell or query"""
+    return re.findall(r'[a-z0-9]+', str(value).lower())
+
+def is_missing(value):
+    return value is None or str(value).lower() == 'nan'
+
+class SearchIndex:
+    """
+    Inverted index over a loaded dataset, built once per load.
+
+    - tokens: word -> row ids, over every non-empty cell of the row
+    - names: 2-3 word name n-gram (and full name) -> row ids, over NAME_COLUMNS
+    - semesters: semester number -> row ids
+
+    With it, a search costs in proportion to the rows that match rather
+    than table size x query length.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.tokens = {}
+        self.names = {}
+        self.semesters = {}
+        for row_id, row in enumerate(data):
+            for value in row.values():
+                if is_missing(value):
+                    continue
+                for token in tokenize(value):
+                    ids = self.tokens.setdefault(token, [])
+                    if not ids or ids[-1] != row_id:
+                        ids.append(row_id)
+            for column in NAME_COLUMNS:
+                if column in row and not is_missing(row[column]):
+                    for gram in self._name_grams(tokenize(row[column])):
+                        self.names.setdefault(gram, set()).add(row_id)
+            semester = str(row.get('semester', '')).strip()
+            if semester.isdigit():
+                self.semesters.setdefault(int(semester), []).append(row_id)
+        self.vocabulary = sorted(self.tokens)
+
+    @staticmethod
+    def _name_grams(words):
+        grams = {' '.join(words)} if words else set()
+        for size in (2, 3):
+            for start in range(len(words) - size + 1):
+                grams.add(' '.join(words[start:start + size]))
+        return grams
+
+    def _prefix_rows(self, keyword):
+        """Rows with a token starting with keyword (so 'program' finds 'programming')"""
+        if keyword.isdigit() or len(keyword) < 3:
+            return set(self.tokens.get(keyword, ()))
+        rows = set()
+        start = bisect.bisect_left(self.vocabulary, keyword)
+        for token in self.vocabulary[start:]:
+            if not token.startswith(keyword):
+                break
+            rows.update(self.tokens[token])
+        return rows
+
+    def match_names(self, full_query):
+        """Row ids whose name matches a 2-3 word phrase of the query, best match first"""
+        words = tokenize(full_query)
+        scores = {}
+        for size in (3, 2):
+            for start in range(len(words) - size + 1):
+                for row_id in self.names.get(' '.join(words[start:start + size]), ()):
+                    scores[row_id] = max(scores.get(row_id, 0), size)
+        return sorted(scores, key=lambda row_id: (-scores[row_id], row_id))
+
+    def semester_rows(self, semesters):
+        return {row_id for semester in semesters for row_id in self.semesters.get(semester, [])}
+
+    def match_keywords(self, keywords):
+        """Row ids matching any keyword, ranked by how many keywords (and semester words) they match"""
+        scores = {}
+        for keyword in dict.fromkeys(k.lower() for k in keywords):
+            rows = set()
+            for word in tokenize(keyword):
+                rows |= self._prefix_rows(word)
+            semester = semester_from_word(keyword)
+            if semester is not None:
+                rows.update(self.semesters.get(semester, []))
+            for row_id in rows:
+                scores[row_id] = scores.get(row_id, 0) + 1
+        return sorted(scores, key=lambda row_id: (-scores[row_id], row_id))
+
+# Indexes of recently searched datasets, so repeated searches reuse them
+_index_cache = OrderedDict()
+_INDEX_CACHE_SIZE = 8
+
+def get_search_index(data):
+    """Return the SearchIndex for a loaded dataset, building it on first use"""
+    entry = _index_cache.get(id(data))
+    if entry is not None and entry.data is data:
+        _index_cache.move_to_end(id(data))
+        return entry
+    index = SearchIndex(data)
+    _index_cache[id(data)] = index
+    while len(_index_cache) > _INDEX_CACHE_SIZE:
+        _index_cache.popitem(last=False)
+    return index
+
+def _unique_rows(data, row_ids, limit):
+    """Rows for row_ids in order, dropping repeated teacher assignments"""
+    seen = set()
+    rows = []
+    for row_id in row_ids:
+        row = data[row_id]
+        if 'name_of_teacher' in row:
+            match_id = (row.get('name_of_teacher', ''), row.get('subject', ''), row.get('semester', ''))
+        else:
+            match_id = row_id
+        if match_id in seen:
+            continue
+        seen.add(match_id)
+        rows.append(row)
+        if len(rows) == limit:
+            break
+    return rows
+
+def search_data(data, keywords, full_query="", index=None, limit=5):
+    """
+    Search for rows in data that contain any of the keywords in any column.
+    Prioritizes exact name matches if full_query contains a potential full name.
+    Returns matching rows as a list of dicts, best matches first.
+    """
+    if not data:
+        return []
+    if index is None:
+        index = get_search_index(data)
+
+    # First, find exact name matches
+    name_matches = index.match_names(full_query)
+    if name_matches:
+        return _unique_rows(data, name_matches, limit)
+
+    # Fallback to keyword search, restricted to any semesters the question names
+    ranked = index.match_keywords(keywords)
+    semesters = QueryFilter.parse(' '.join(tokenize(full_query))).semesters
+    if semesters:
+        allowed = index.semester_rows(semesters)
+        ranked = [row_id for row_id in ranked if row_id in allowed]
+    return _unique_rows(data, ranked, limit)
+
+# Global instance
+data_store = DataStore()
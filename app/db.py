@@ -1,57 +1,237 @@
 import sqlite3
-import hashlib
 import os
+import threading
+import weakref
+from contextlib import contextmanager
+from types import MappingProxyType
+
+from app.cache import ResponseCache
+from app.config import (
+    SQLITE_BUSY_TIMEOUT, SQLITE_CACHE_SIZE_KB, SQLITE_MMAP_SIZE, SQLITE_STATEMENT_CACHE, USER_CACHE_SIZE, USER_CACHE_TTL,
+)
+from app.passwords import PasswordPoolBusy, hash_password, needs_rehash, password_pool
 
 DATABASE = os.path.join(os.path.dirname(__file__), '..', 'users.db')
 
-def get_connection():
-    return sqlite3.connect(DATABASE)
-
-def init_db():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            email TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            role TEXT NOT NULL,
-            department TEXT NOT NULL,
-            full_name TEXT
-        )
-    ''')
-    # Insert sample users
-    sample_users = [
-        ('student1@pkonnect.edu.np', 'password123', 'student', 'BSC CSIT'),
-        ('student2@pkonnect.edu.np', 'password123', 'student', 'BIT'),
-        ('teacher1@pkonnect.edu.np', 'password123', 'teacher', 'BSC CSIT'),
-        ('other1@pkonnect.edu.np', 'password123', 'others', 'BIT'),
-    ]
-    for email, password, role, dept in sample_users:
-        password_hash = hashlib.sha256(password.encode()).hexdigest()
+class _Connection(sqlite3.Connection):
+    """sqlite3.Connection that can be weakly referenced (for Database.close_all)"""
+
+class Database:
+    """
+    Shared SQLite access layer.
+
+    Each thread gets one long-lived connection to the file (opened on first
+    use), so requests don't pay for connection setup and the statements
+    they run stay prepared in that connection's statement cache. Every
+    connection uses WAL journaling, so readers never block the writer or
+    each other, and a busy timeout instead of failing on a locked database.
+    """
+
+    def __init__(self, path=DATABASE, busy_timeout=SQLITE_BUSY_TIMEOUT, cache_size_kb=SQLITE_CACHE_SIZE_KB,
+                 mmap_size=SQLITE_MMAP_SIZE, statement_cache=SQLITE_STATEMENT_CACHE):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.cache_size_kb = cache_size_kb
+        self.mmap_size = mmap_size
+        self.statement_cache = statement_cache
+        self._local = threading.local()
+        self._connections = weakref.WeakSet()  # Connections of finished threads close themselves
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        # Autocommit mode: transactions are started explicitly by transaction().
+        # Only the owning thread uses a connection; close_all() may close it from another.
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None,
+                               cached_statements=self.statement_cache, factory=_Connection,
+                               check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')  # Safe with WAL; fsync at checkpoints only
+        conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout * 1000)}')
+        conn.execute(f'PRAGMA cache_size=-{int(self.cache_size_kb)}')
+        conn.execute(f'PRAGMA mmap_size={int(self.mmap_size)}')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute('PRAGMA foreign_keys=ON')
+        return conn
+
+    def connection(self):
+        """This thread's connection (don't close it; it is reused by the next call)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+            with self._lock:
+                self._connections.add(conn)
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """
+        Write transaction on this thread's connection. BEGIN IMMEDIATE takes
+        the write lock up front, so concurrent writers wait on busy_timeout
+        instead of failing halfway through. Nested uses join the outer one.
+        """
+        conn = self.connection()
+        if conn.in_transaction:
+            yield conn
+            return
+        conn.execute('BEGIN IMMEDIATE')
         try:
-            cursor.execute('INSERT INTO users (email, password_hash, role, department) VALUES (?, ?, ?, ?)',
-                           (email, password_hash, role, dept))
-        except sqlite3.IntegrityError:
-            pass  # User already exists
-    conn.commit()
-    conn.close()
-
-def verify_user(email, password, role, department):
-    """Verify user credentials and return user data if valid"""
-    password_hash = hashlib.sha256(password.encode()).hexdigest()
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT id, email, role, department, full_name FROM users WHERE email = ? AND password_hash = ? AND role = ? AND department = ?',
-                   (email, password_hash, role, department))
-    user = cursor.fetchone()
-    conn.close()
-    if user:
-        return {
-            'id': user[0],
-            'email': user[1],
-            'role': user[2],
-            'department': user[3],
-            'full_name': user[4]
-        }
-    return None
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    def execute(self, sql, params=()):
+        return self.connection().execute(sql, params)
+
+    def executemany(self, sql, rows):
+        with self.transaction() as conn:
+            return conn.executemany(sql, rows)
+
+    def fetchone(self, sql, params=()):
+        return self.connection().execute(sql, params).fetchone()
+
+    def fetchall(self, sql, params=()):
+        return self.connection().execute(sql, params).fetchall()
+
+    def close_all(self):
+        """Close every thread's connection (e.g. before deleting the file in tests)"""
+        with self._lock:
+            connections = list(self._connections)
+            self._connections = weakref.WeakSet()
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+# Global instance for the users database
+db = Database()
+
+def get_connection():
+    """This thread's pooled connection to the users database (don't close it)"""
+    return db.connection()
+
+SAMPLE_USERS = [
+    ('student1@pkonnect.edu.np', 'password123', 'student', 'BSC CSIT'),
+    ('student2@pkonnect.edu.np', 'password123', 'student', 'BIT'),
+    ('teacher1@pkonnect.edu.np', 'password123', 'teacher', 'BSC CSIT'),
+    ('other1@pkonnect.edu.np', 'password123', 'others', 'BIT'),
+]
+
+def _seed_sample_users(conn):
+    existing = {row[0] for row in conn.execute('SELECT email FROM users')}
+    missing = [user for user in SAMPLE_USERS if user[0] not in existing]  # Don't hash passwords we won't store
+    conn.executemany(
+        'INSERT OR IGNORE INTO users (email, password_hash, role, department) VALUES (?, ?, ?, ?)',  # Skip existing users
+        [(email, hash_password(password), role, dept) for email, password, role, dept in missing])
+
+# Schema migrations (SQL statements, or functions of the connection), applied in
+# order by migrate(). PRAGMA user_version stores how many have run, so each one
+# runs exactly once per database file.
+# Append new steps to the end; never edit or reorder the ones already shipped.
+MIGRATIONS = [
+    # 1: users table
+    '''CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        email TEXT UNIQUE NOT NULL,
+        password_hash TEXT NOT NULL,
+        role TEXT NOT NULL,
+        department TEXT NOT NULL,
+        full_name TEXT
+    )''',
+    # 2: logins look emails up exactly, as the login forms send them (trimmed, lowercase)
+    'UPDATE OR IGNORE users SET email = lower(trim(email))',
+    # 3: listing users by department and role (utils/view_users.py, imports)
+    'CREATE INDEX IF NOT EXISTS idx_users_department_role ON users (department, role)',
+    # 4: sample accounts (a function, since their passwords are hashed)
+    _seed_sample_users,
+]
+
+def migrate(database=db):
+    """
+    Bring the database schema up to date; returns the schema version.
+
+    An up-to-date database (every start after the first) costs one read of
+    PRAGMA user_version: no write lock, so workers starting together don't
+    queue behind each other.
+    """
+    if database.fetchone('PRAGMA user_version')[0] >= len(MIGRATIONS):
+        return len(MIGRATIONS)
+    with database.transaction() as conn:
+        version = conn.execute('PRAGMA user_version').fetchone()[0]  # Another process may have just migrated
+        for number, step in enumerate(MIGRATIONS[version:], start=version + 1):
+            if callable(step):
+                step(conn)
+            else:
+                conn.execute(step)
+            conn.execute(f'PRAGMA user_version = {number}')
+    return len(MIGRATIONS)
+
+def init_db(database=db):
+    """Create or upgrade the users database (including the sample accounts)"""
+    return migrate(database)
+
+# ---------------- LOGIN ----------------
+# email -> (password_hash, read-only user record); see verify_user
+user_cache = ResponseCache(max_size=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+_dummy_hash = None
+
+def _unknown_user_hash():
+    """A hash to check passwords of unknown emails against, so they take as long as real ones"""
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = hash_password(os.urandom(16).hex())
+    return _dummy_hash
+
+def _load_user(email, database):
+    cached = user_cache.get(email)
+    if cached is not None:
+        return cached
+    row = database.fetchone(
+        'SELECT id, email, password_hash, role, department, full_name FROM users WHERE email = ?', (email,))
+    if row is None:
+        return None
+    user_id, email, password_hash, role, department, full_name = row
+    record = MappingProxyType({
+        'id': user_id,
+        'email': email,
+        'role': role,
+        'department': department,
+        'full_name': full_name
+    })
+    user_cache.set(email, (password_hash, record))
+    return password_hash, record
+
+def forget_user(email):
+    """Drop a user's cached login record (call after changing their row)"""
+    user_cache.pop(email.strip().lower())
+
+def verify_user(email, password, role, department, database=db):
+    """
+    Verify user credentials and return the user's record if valid.
+
+    One lookup through the email index (or none, while the user is cached);
+    role, department and password are then checked here, the password on
+    password_pool. The record is a read-only mapping shared by every login of
+    that user. Raises PasswordPoolBusy when too many logins are already waiting.
+    """
+    email = email.strip().lower()
+    user = _load_user(email, database)
+    password_hash, record = user if user is not None else (_unknown_user_hash(), None)
+    valid = password_pool.verify(password, password_hash)
+    if not valid or record is None or record['role'] != role or record['department'] != department:
+        return None
+    if needs_rehash(password_hash):
+        _rehash(email, password, password_hash, database)
+    return record
+
+def _rehash(email, password, old_hash, database):
+    """Store the password in the current hash format (it was just verified)"""
+    try:
+        new_hash = password_pool.hash(password)
+    except PasswordPoolBusy:
+        return  # Busy: upgrade on a later login
+    with database.transaction() as conn:
+        conn.execute('UPDATE users SET password_hash = ? WHERE email = ? AND password_hash = ?',
+                     (new_hash, email, old_hash))
+    forget_user(email)
@@ -0,0 +1,189 @@
+"""
+Photo gallery for the landing page.
+
+Each photo in GALLERY_DIR gets resized WebP copies (derivatives) at the
+srcset widths plus one for the lightbox. They are generated once with
+Pillow into GALLERY_CACHE_DIR and named after a hash of the original's
+content, so a photo is only processed again when it changes. The page
+fetches the manifest from /gallery.json instead of a hand-maintained list.
+Without Pillow the manifest points at the originals.
+"""
+import hashlib
+import json
+import os
+import threading
+
+from app.config import GALLERY_CACHE_DIR, GALLERY_DIR, GALLERY_FULL_WIDTH, GALLERY_WIDTHS, STATIC_DIR
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Optional: without Pillow the gallery serves the originals
+    Image = ImageOps = None
+
+IMAGE_EXTENSIONS = ('.webp', '.jpg', '.jpeg', '.png')
+
+# WebP quality per width: thumbnails are small on screen and tolerate more compression
+QUALITY_TIERS = [(320, 60), (640, 70), (1280, 78)]
+FULL_QUALITY = 82
+
+MANIFEST_FILE = 'manifest.json'
+
+
+def quality_for(width):
+    return next((quality for limit, quality in QUALITY_TIERS if width <= limit), FULL_QUALITY)
+
+
+def content_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+class Gallery:
+    """
+    Builds and caches the gallery manifest.
+
+    Photos are listed with static-relative file names (the route turns them
+    into URLs); each entry is a dict:
+        name, width, height  the original photo
+        thumb                smallest derivative, the grid's src
+        srcset               [(file, width), ...] for the grid
+        full                 what the lightbox loads
+    The manifest is rebuilt when a photo is added, removed or changed, and
+    also saved next to the derivatives so a new process can reuse it.
+    """
+
+    def __init__(self, source_dir=GALLERY_DIR, cache_dir=GALLERY_CACHE_DIR, widths=GALLERY_WIDTHS,
+                 full_width=GALLERY_FULL_WIDTH, static_dir=STATIC_DIR):
+        self.source_dir = source_dir
+        self.cache_dir = cache_dir
+        self.widths = sorted(widths)
+        self.full_width = full_width
+        self.static_dir = static_dir
+        self._manifest = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    # ---------------- SOURCES ----------------
+    def _sources(self):
+        try:
+            names = sorted(os.listdir(self.source_dir))
+        except FileNotFoundError:
+            return []
+        return [name for name in names if name.lower().endswith(IMAGE_EXTENSIONS)]
+
+    def version(self):
+        """(name, mtime_ns, size) of every photo plus the settings; changes whenever the manifest would"""
+        files = []
+        for name in self._sources():
+            stat = os.stat(os.path.join(self.source_dir, name))
+            files.append([name, stat.st_mtime_ns, stat.st_size])
+        return [files, self.widths, self.full_width, Image is not None]
+
+    @property
+    def etag(self):
+        return hashlib.sha256(json.dumps(self._version).encode()).hexdigest()[:32]
+
+    def _static_name(self, path):
+        return os.path.relpath(path, self.static_dir).replace(os.sep, '/')
+
+    # ---------------- MANIFEST ----------------
+    def manifest(self):
+        """The current manifest, rebuilt only if the photos changed"""
+        version = self.version()
+        with self._lock:
+            if self._manifest is None or self._version != version:
+                self._manifest = self._load(version) or self._build(version)
+                self._version = version
+            return self._manifest
+
+    def warm(self):
+        """Build the manifest (and any missing derivatives) in a background thread"""
+        thread = threading.Thread(target=self._warm, name='gallery-warm', daemon=True)
+        thread.start()
+        return thread
+
+    def _warm(self):
+        try:
+            self.manifest()
+        except Exception as e:
+            print(f"Gallery manifest not built: {e}")
+
+    def _manifest_path(self):
+        return os.path.join(self.cache_dir, MANIFEST_FILE)
+
+    def _load(self, version):
+        try:
+            with open(self._manifest_path()) as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if saved.get('version') != version:
+            return None
+        photos = saved.get('photos', [])
+        for photo in photos:
+            photo['srcset'] = [tuple(item) for item in photo['srcset']]
+        if not all(os.path.exists(os.path.join(self.static_dir, photo['full'])) for photo in photos):
+            return None  # Derivatives were deleted: build them again
+        return photos
+
+    def _build(self, version):
+        photos = [self._photo(name) for name in self._sources()]
+        if Image is not None:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                temporary = self._manifest_path() + '.tmp'
+                with open(temporary, 'w') as f:
+                    json.dump({'version': version, 'photos': photos}, f)
+                os.replace(temporary, self._manifest_path())
+            except OSError as e:
+                print(f"Could not save gallery manifest: {e}")
+        return photos
+
+    # ---------------- DERIVATIVES ----------------
+    def _photo(self, name):
+        path = os.path.join(self.source_dir, name)
+        original = self._static_name(path)
+        if Image is None:
+            return {'name': name, 'width': None, 'height': None, 'thumb': original, 'srcset': [], 'full': original}
+
+        digest = content_hash(path)
+        with Image.open(path) as opened:
+            image = ImageOps.exif_transpose(opened)
+            width, height = image.size
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+
+            # Largest first, each copy resized from the previous one rather than the (huge) original
+            full_width = min(width, self.full_width)
+            targets = [full_width] + [target for target in reversed(self.widths) if target < full_width]
+            srcset = []
+            for target in targets:
+                filename, image = self._derive(image, digest, target)
+                srcset.append((filename, target))
+        srcset.reverse()
+        return {'name': name, 'width': width, 'height': height, 'thumb': srcset[0][0], 'srcset': srcset,
+                'full': srcset[-1][0]}
+
+    def _derive(self, image, digest, width):
+        """
+        Static name of the WebP copy of image at width (written only if it doesn't
+        exist yet), and the image to resize smaller copies from.
+        """
+        quality = quality_for(width)
+        path = os.path.join(self.cache_dir, f"{digest}-{width}w-q{quality}.webp")
+        if os.path.exists(path):
+            return self._static_name(path), image
+        if width != image.width:
+            image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temporary = path + '.tmp'
+        image.save(temporary, 'WEBP', quality=quality)
+        os.replace(temporary, path)
+        return self._static_name(path), image
+
+
+# Global instance
+gallery = Gallery()
@@ -0,0 +1,220 @@
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque, namedtuple
+
+from app.db import Database
+from app.config import (
+    HISTORY_BATCH_SIZE, HISTORY_COMPACT_INTERVAL, HISTORY_DATABASE, HISTORY_HOT_SESSIONS, HISTORY_MAX_TURNS,
+    HISTORY_QUEUE_SIZE, HISTORY_RING_SIZE, HISTORY_TTL_DAYS,
+)
+
+HistoryEntry = namedtuple('HistoryEntry', 'session_id created_at question answer')
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        question TEXT NOT NULL,
+        answer TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_history_session ON history (session_id, created_at);
+    CREATE INDEX IF NOT EXISTS idx_history_created ON history (created_at);
+'''
+
+
+def entry_to_dict(entry):
+    return {'question': entry.question, 'answer': entry.answer, 'timestamp': entry.created_at}
+
+
+class HistoryStore:
+    """
+    Conversation turns per Bedrock session.
+
+    Turns are appended to an SQLite table in WAL mode by a single background
+    writer thread, so record() never waits on the disk. The latest turns of
+    recently active sessions are also kept in bounded in-memory ring buffers,
+    which serve the common "load the conversation" read without a query.
+    The writer also expires old turns and trims long conversations.
+    """
+
+    def __init__(self, path=HISTORY_DATABASE, ring_size=HISTORY_RING_SIZE, hot_sessions=HISTORY_HOT_SESSIONS,
+                 max_turns=HISTORY_MAX_TURNS, ttl_days=HISTORY_TTL_DAYS, compact_interval=HISTORY_COMPACT_INTERVAL,
+                 queue_size=HISTORY_QUEUE_SIZE, batch_size=HISTORY_BATCH_SIZE, clock=time.time):
+        self.path = path
+        self.ring_size = ring_size
+        self.hot_sessions = hot_sessions
+        self.max_turns = max_turns
+        self.ttl = ttl_days * 86400
+        self.compact_interval = compact_interval
+        self.batch_size = batch_size
+        self._clock = clock
+        self._hot = OrderedDict()  # session_id -> deque of recent HistoryEntry, least recently used first
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=queue_size)
+        self.db = Database(path)
+        self._schema_ready = False
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+
+    # ---------------- CONNECTIONS ----------------
+    def _connection(self):
+        """This thread's pooled connection, with the table created on first use"""
+        conn = self.db.connection()
+        if not self._schema_ready:
+            conn.executescript(SCHEMA)
+            self._schema_ready = True
+        return conn
+
+    # ---------------- WRITE ----------------
+    def record(self, session_id, question, answer):
+        """Remember one turn. Returns immediately; the disk write happens in the background."""
+        if not session_id:
+            return
+        entry = HistoryEntry(session_id, self._clock(), question, answer or '')
+        with self._lock:
+            ring = self._hot.get(session_id)
+            if ring is None:
+                ring = self._hot[session_id] = deque(maxlen=self.ring_size)
+                while len(self._hot) > self.hot_sessions:
+                    self._hot.popitem(last=False)
+            else:
+                self._hot.move_to_end(session_id)
+            ring.append(entry)
+
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1  # Disk can't keep up: keep serving chats, the turn stays in memory only
+
+    def _ensure_writer(self):
+        if self._writer is None or not self._writer.is_alive():
+            with self._writer_lock:
+                if self._writer is None or not self._writer.is_alive():
+                    self._writer = threading.Thread(target=self._run, name='history-writer', daemon=True)
+                    self._writer.start()
+
+    def _run(self):
+        conn = self._connection()
+        next_compaction = time.monotonic()
+        while True:
+            timeout = max(0.0, next_compaction - time.monotonic())
+            try:
+                batch = [self._queue.get(timeout=timeout)]
+            except queue.Empty:
+                batch = []
+            while batch and len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            if batch:
+                try:
+                    with self.db.transaction():
+                        conn.executemany(
+                            'INSERT INTO history (session_id, created_at, question, answer) VALUES (?, ?, ?, ?)',
+                            batch)
+                    self.written += len(batch)
+                except sqlite3.Error as e:
+                    print(f"History write failed ({len(batch)} turns): {e}")
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+
+            if time.monotonic() >= next_compaction:
+                try:
+                    self.compact()
+                except sqlite3.Error as e:
+                    print(f"History compaction failed: {e}")
+                next_compaction = time.monotonic() + self.compact_interval
+
+    def flush(self, timeout=10):
+        """Wait (up to timeout seconds) until every recorded turn is on disk; True if it is"""
+        deadline = time.monotonic() + timeout
+        done = self._queue.all_tasks_done
+        with done:
+            while self._queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._writer is None or not self._writer.is_alive():
+                    return False
+                done.wait(min(remaining, 0.1))
+        return True
+
+    # ---------------- COMPACTION ----------------
+    def compact(self):
+        """
+        Delete expired turns and keep only the newest max_turns of each session.
+        The writer runs this every compact_interval seconds.
+        """
+        self._connection()
+        with self.db.transaction() as conn:
+            if self.ttl > 0:
+                conn.execute('DELETE FROM history WHERE created_at < ?', (self._clock() - self.ttl,))
+            if self.max_turns > 0:
+                long_sessions = conn.execute(
+                    'SELECT session_id FROM history GROUP BY session_id HAVING COUNT(*) > ?',
+                    (self.max_turns,)).fetchall()
+                for (session_id,) in long_sessions:
+                    conn.execute(
+                        'DELETE FROM history WHERE id IN (SELECT id FROM history WHERE session_id = ? '
+                        'ORDER BY created_at DESC LIMIT -1 OFFSET ?)',
+                        (session_id, self.max_turns))
+
+    # ---------------- READ ----------------
+    def get(self, session_id, limit=50, before=None):
+        """
+        Up to `limit` turns of a session older than `before` (a timestamp, None
+        for the latest), oldest first. Returns (entries, next_before): pass
+        next_before to get the page before this one; it is None on the last page.
+        """
+        if not session_id or limit <= 0:
+            return [], None
+
+        with self._lock:
+            ring = self._hot.get(session_id)
+            recent = list(ring) if ring is not None else []
+            if ring is not None:
+                self._hot.move_to_end(session_id)
+
+        if before is None and len(recent) >= limit:
+            entries = recent[-limit:]
+            return entries, entries[0].created_at
+
+        rows = self._connection().execute(
+            'SELECT session_id, created_at, question, answer FROM history '
+            'WHERE session_id = ? AND created_at < ? ORDER BY created_at DESC LIMIT ?',
+            (session_id, before if before is not None else float('inf'), limit)).fetchall()
+
+        # Turns still waiting for the writer are only in the ring buffer
+        merged = {(row[1], row[2]): HistoryEntry(*row) for row in rows}
+        for entry in recent:
+            if before is None or entry.created_at < before:
+                merged.setdefault((entry.created_at, entry.question), entry)
+        entries = sorted(merged.values(), key=lambda entry: entry.created_at)[-limit:]
+
+        if before is None and ring is None and entries:
+            self._warm(session_id, entries)
+        next_before = entries[0].created_at if len(entries) == limit else None
+        return entries, next_before
+
+    def _warm(self, session_id, entries):
+        with self._lock:
+            if session_id not in self._hot:
+                self._hot[session_id] = deque(entries[-self.ring_size:], maxlen=self.ring_size)
+                while len(self._hot) > self.hot_sessions:
+                    self._hot.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            hot = len(self._hot)
+        return {'hot_sessions': hot, 'pending': self._queue.qsize(), 'written': self.written, 'dropped': self.dropped}
+
+
+# Global instance
+history_store = HistoryStore()
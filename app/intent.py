@@ -0,0 +1,161 @@
+"""
+Intent engine for chat messages.
+
+Every intent vocabulary (with stems, synonyms and the romanized Nepali our
+users type), the department and semester entities and the person-name
+patterns are compiled into one regular expression at import. classify()
+scans a message once with it and returns scored intents plus entities.
+"""
+import re
+import string
+from collections import namedtuple
+
+from app.query_filter import DEPARTMENT_ALIASES, SEMESTER_PATTERN, department_pattern, parse_semesters
+
+# Word stems and phrases per intent (lowercase regex fragments, matched on word boundaries)
+INTENT_VOCABULARY = {
+    'admission_info': [
+        r'admi(?:ssion|t)\w*', r'enrol\w*', r'entrance', r'intake', r'eligib\w*',
+        r'application\s+form\w*', r'apply(?:ing)?\s+(?:for|to)\b',
+        r'bh?arn[ae]\w*',                                  # bharna (admission)
+    ],
+    'exam_result': [
+        r'results?', r'grad(?:e|es|ing)', r'marks?', r'mark\s*sheets?', r'c?gpa', r'scores?', r'transcripts?',
+        r'natija', r'pariname?',                           # natija, parinam (result)
+    ],
+    'confidential_finance': [
+        r'salar(?:y|ies)', r'budgets?', r'financ\w*', r'payroll', r'expenditures?',
+        r'tala?b',                                         # talab (salary)
+    ],
+    'teacher_info': [
+        r'teach\w*', r'taught', r'facult(?:y|ies)', r'lecturers?', r'professors?', r'instructors?', r'tutors?',
+        r'sirs?', r'madams?', r"ma'?am",
+        r'guru\w*', r'sh?iksh?ak\w*',                      # guru, shikshak (teacher)
+    ],
+}
+
+# Words that only mean something together: student + contact -> student_contact
+SIGNAL_VOCABULARY = {
+    'student': [
+        r'students?', r'classmates?', r'batchmates?',
+        r'[bv]idh?yarthi\w*',                              # bidyarthi (student)
+    ],
+    'contact': [
+        r'contacts?', r'e-?mails?', r'gmail', r'phones?', r'mobiles?', r'whatsapp', r'cell\s*(?:phone|number)',
+    ],
+}
+
+# Ties are broken in this order (the order recognize_intent always checked them in)
+INTENT_PRIORITY = ['admission_info', 'exam_result', 'confidential_finance', 'teacher_info', 'student_contact']
+
+# A matched restricted intent wins however many other words match ("salary of teachers and
+# lecturers" is a salary question). Exam results still yield to admission, as they always
+# did: "marks for admission" asks about requirements (see app/policy.py).
+RESTRICTED_INTENTS = {'exam_result', 'confidential_finance', 'student_contact'}
+
+# Titles before a name, and honorifics after one ("Ram sir", "Sita miss")
+NAME_TITLES = r'(?:mr|mrs|ms|dr|prof|professor)'
+HONORIFICS = r"(?:sir|madam|ma'?am|miss)"
+TEACHER_TITLES = {'prof', 'professor', 'sir', 'madam', 'maam', "ma'am", 'miss'}
+_NAME = r"[A-Z][A-Za-z]*\.?(?:\s*[A-Z][A-Za-z]*\.?)*"
+
+# Capitalized words that start questions rather than names
+NOT_NAMES = {'who', 'what', 'when', 'where', 'which', 'why', 'how', 'is', 'are', 'was', 'were', 'does', 'do',
+             'did', 'can', 'could', 'will', 'would', 'should', 'has', 'have', 'tell', 'me', 'about', 'show',
+             'give', 'list', 'please', 'hi', 'hello', 'the', 'i', 'my', 'we', 'you', 'they', 'he', 'she', 'it'}
+
+ClassifiedMessage = namedtuple('ClassifiedMessage', 'intent scores entities')
+
+
+DEPARTMENTS = list(DEPARTMENT_ALIASES)
+
+
+def _build_engine():
+    groups = [
+        # Titles first: "Professor Sharma" is a person, not just the word "professor"
+        rf"(?P<p_title>\b{NAME_TITLES}\b\.?)(?=\s)",
+        rf"(?P<p_honorific>\b{HONORIFICS}\b)",
+        rf"(?P<e_semester>{SEMESTER_PATTERN.pattern})",
+    ]
+    for index, department in enumerate(DEPARTMENTS):
+        groups.append(rf"(?P<d{index}>{department_pattern(department)})")
+    for prefix, vocabulary in (('i', INTENT_VOCABULARY), ('s', SIGNAL_VOCABULARY)):
+        for name, words in vocabulary.items():
+            groups.append(rf"(?P<{prefix}_{name}>\b(?:{'|'.join(words)})\b)")
+    # Every alternative starts on a word boundary; checking it once up front skips mid-word positions
+    return re.compile(r'\b(?:' + '|'.join(groups) + ')')
+
+
+# The engine runs on lowercased text; names are then read from the original around a title
+ENGINE = _build_engine()
+NAME_AFTER = re.compile(rf"\s+({_NAME})")
+NAME_BEFORE = re.compile(rf"\b({_NAME})\s+$")
+# ASCII-only lowercasing keeps every offset valid in the original message
+_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def _clean_name(name):
+    words = name.rstrip('.').split()
+    while words and words[0].lower().rstrip('.') in NOT_NAMES:
+        words.pop(0)
+    return ' '.join(words)
+
+
+def classify(message):
+    """
+    Classify a message in one pass over it.
+
+    Returns ClassifiedMessage(intent, scores, entities):
+        intent    the best intent, 'general' if no vocabulary matched
+        scores    {intent: share of the matched intent words}, restricted intents
+                  first, then the highest share
+        entities  {'departments': [...], 'semesters': [...], 'people': [...]}
+    """
+    hits = {}
+    departments, semesters, people = [], set(), []
+    for match in ENGINE.finditer(message.translate(_LOWER)):
+        group = match.lastgroup
+        if group.startswith('p_'):
+            title = match.group().rstrip('.')
+            if group == 'p_title':
+                found = NAME_AFTER.match(message, match.end())
+            else:
+                found = NAME_BEFORE.search(message, max(0, match.start() - 60), match.start())
+            name = _clean_name(found.group(1)) if found else ''
+            if name and name not in people:
+                people.append(name)
+            if title in TEACHER_TITLES and (name or title != 'miss'):
+                hits['teacher_info'] = hits.get('teacher_info', 0) + 1  # "Ram sir", "which sir", not "did I miss"
+        elif group == 'e_semester':
+            semesters.update(parse_semesters(match.group()))
+        elif group[0] == 'd':
+            department = DEPARTMENTS[int(group[1:])]
+            if department not in departments:
+                departments.append(department)
+        else:
+            hits[group[2:]] = hits.get(group[2:], 0) + 1
+
+    student, contact = hits.pop('student', 0), hits.pop('contact', 0)
+    if student and contact:
+        hits['student_contact'] = min(student, contact)
+
+    total = sum(hits.values())
+    scores = {}
+    if total:
+        def rank(item):
+            intent, count = item
+            restricted = intent in RESTRICTED_INTENTS and not (intent == 'exam_result' and 'admission_info' in hits)
+            if restricted:
+                return (0, 0, INTENT_PRIORITY.index(intent))
+            return (1, -count, INTENT_PRIORITY.index(intent))
+        ranked = sorted(hits.items(), key=rank)
+        scores = {intent: count / total for intent, count in ranked}
+    intent = next(iter(scores), 'general')
+    entities = {'departments': departments, 'semesters': sorted(semesters), 'people': people}
+    return ClassifiedMessage(intent, scores, entities)
+
+
+def classify_many(messages):
+    """Classify a batch of messages (e.g. replaying chat logs); returns a list in the same order"""
+    classify_one = classify
+    return [classify_one(message) for message in messages]
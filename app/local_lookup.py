@@ -0,0 +1,225 @@
+import re
+import threading
+
+import numpy as np
+
+from app.dataloader import DEPARTMENT_FILES, load_department_data
+from app.intent import classify
+from app.query_filter import QueryFilter, semester_from_word
+
+# Results, routines and schedules mention subjects and semesters too, but aren't about who teaches what
+NOT_TEACHING_PATTERN = re.compile(
+    r'\b(results?|marks?|grades?|c?gpa|scores?|marksheets?|exams?|examinations?|routines?|schedules?|'
+    r'timetables?|time table|syllabus|notes?|assignments?|attendance)\b')
+
+# Anything beyond the public teaching assignments goes to the agent and its access rules
+PRIVATE_PATTERN = re.compile(r'\b(phone|mobile|number|contact|email|mail|address|salary|family|religion|caste)\b')
+
+NAME_TITLES = {'prof', 'dr', 'mr', 'mrs', 'ms', 'er'}
+
+# Words a teaching-assignment question may use besides the teachers, subjects, semesters,
+# departments and designations it is about. Any other word ("DBMS", "best", a name that
+# isn't in the tables) is something the index can't answer for, so the agent does.
+QUESTION_WORDS = frozenset('''
+    who whom whose which what is are was were do does did can could will would has have
+    the a an of in for to and or on at by from with this that these those all any each every
+    my our me i we you us please tell show list give know name names about currently now
+    teach teaches teaching taught teacher teachers faculty faculties lecturer lecturers
+    instructor instructors professor professors assistant associate subject subjects course
+    courses class classes sir sirs madam maam miss semester semesters sem sems department
+    departments dept bsc b sc csit bit
+'''.split())
+
+def normalize(text):
+    """Lowercase and reduce to space-separated alphanumeric words"""
+    return ' '.join(re.findall(r'[a-z0-9]+', str(text).lower()))
+
+class LocalLookup:
+    """
+    In-memory, column-oriented index over the department teacher tables.
+
+    Answers structured questions such as "who teaches Data Structure in 3rd
+    semester" or "what does Sagar K.C. teach" directly, without a Bedrock
+    Agent call. The question is parsed once into a QueryFilter, which is
+    applied as numpy boolean masks over the columns. answer() returns None
+    for anything it is not sure about, and the caller falls back to the agent.
+    """
+
+    MAX_PHRASE_WORDS = 6
+
+    def __init__(self):
+        self.rows = []
+        self.columns = {}           # column name -> numpy array, one entry per row
+        self.departments = set()
+        self._rank = None           # display position of each row
+        self._teacher_phrases = {}  # spoken form of a name -> teacher keys
+        self._subject_phrases = {}  # subject name or prefix -> subject keys
+        self._lock = threading.Lock()
+        self.loaded = False
+
+    # ---------------- BUILD ----------------
+    def load(self):
+        """Load every department's teacher table and build the indexes (once per process)"""
+        with self._lock:
+            if self.loaded:
+                return
+            seen = set()
+            for department in DEPARTMENT_FILES:
+                for record in load_department_data(department):
+                    if 'name_of_teacher' not in record:
+                        continue  # Student rosters stay with the agent and its access rules
+                    row = self._make_row(department, record)
+                    if row is None:
+                        continue
+                    identity = (row['department'], row['teacher_key'], row['subject_key'], row['semester'])
+                    if identity in seen:
+                        continue
+                    seen.add(identity)
+                    self._add_row(row)
+            self._build_columns()
+            self.loaded = True
+
+    def _make_row(self, department, record):
+        teacher = str(record.get('name_of_teacher') or '').strip()
+        subject = str(record.get('subject') or '').strip()
+        if not teacher or not subject or teacher.lower() == 'nan':
+            return None
+        try:
+            semester = int(record.get('semester'))
+        except (TypeError, ValueError):
+            semester = 0  # Unknown
+        designation = str(record.get('designation') or '').strip()
+        return {
+            'department': department,
+            'teacher': teacher,
+            'teacher_key': normalize(teacher),
+            'designation': '' if designation.lower() == 'nan' else designation,
+            'subject': subject,
+            'subject_key': normalize(subject),
+            'semester': semester,
+        }
+
+    def _add_row(self, row):
+        self.rows.append(row)
+        self.departments.add(row['department'])
+        for phrase in self._name_variants(row['teacher_key']):
+            self._teacher_phrases.setdefault(phrase, set()).add(row['teacher_key'])
+        for phrase in self._subject_variants(row['subject_key']):
+            self._subject_phrases.setdefault(phrase, set()).add(row['subject_key'])
+
+    def _build_columns(self):
+        for name in ('department', 'teacher_key', 'subject_key', 'designation'):
+            self.columns[name] = np.array([row[name] for row in self.rows], dtype=str)
+        self.columns['semester'] = np.array([row['semester'] for row in self.rows], dtype=np.int16)
+
+        # Answers list rows by department, semester, subject, teacher
+        display = [np.array([row[name] for row in self.rows], dtype=str) for name in ('teacher', 'subject')]
+        order = np.lexsort((display[0], display[1], self.columns['semester'], self.columns['department']))
+        self._rank = np.empty(len(order), dtype=np.int64)
+        self._rank[order] = np.arange(len(order))
+
+    @staticmethod
+    def _name_variants(teacher_key):
+        """'prof dr susmita talukdar' -> 'susmita talukdar'; 'sagar k c' -> 'sagar kc', ..."""
+        words = [w for w in teacher_key.split() if w not in NAME_TITLES]
+        variants = {' '.join(words)}
+        merged = re.sub(r'\b([a-z]) (?=[a-z]\b)', r'\1', ' '.join(words))  # "k c" -> "kc"
+        variants.add(merged)
+        if len(words) > 2:
+            variants.add(f"{words[0]} {words[-1]}")
+        return {v for v in variants if len(v.split()) >= 2}
+
+    @staticmethod
+    def _subject_variants(subject_key):
+        """The full subject name plus every leading phrase of two or more words"""
+        words = subject_key.split()
+        variants = {subject_key}
+        for end in range(2, len(words)):
+            if words[end - 1] not in ('and', 'of', 'to'):
+                variants.add(' '.join(words[:end]))
+        return variants
+
+    # ---------------- QUERY ----------------
+    def _match_phrases(self, words, phrases, covered):
+        """Longest-first scan of the query's word n-grams against a phrase index; marks matched words in `covered`"""
+        found = set()
+        used = [False] * len(words)
+        for size in range(min(self.MAX_PHRASE_WORDS, len(words)), 0, -1):
+            for start in range(len(words) - size + 1):
+                if any(used[start:start + size]):
+                    continue
+                keys = phrases.get(' '.join(words[start:start + size]))
+                if keys:
+                    found |= keys
+                    for i in range(start, start + size):
+                        used[i] = covered[i] = True
+        return found
+
+    def parse(self, text):
+        """
+        Turn a normalized question into a QueryFilter (semester, department,
+        designation, subject, teacher) plus the words none of those account for
+        """
+        words = text.split()
+        covered = [False] * len(words)
+        query_filter = QueryFilter.parse(text)
+        query_filter.teachers = sorted(self._match_phrases(words, self._teacher_phrases, covered))
+        query_filter.subjects = sorted(self._match_phrases(words, self._subject_phrases, covered))
+        if query_filter.teachers:
+            # "Professor Susmita Talukdar" names a person, it doesn't filter by designation
+            query_filter.designations = []
+        unknown = [word for word, known in zip(words, covered)
+                   if not known and word not in QUESTION_WORDS and semester_from_word(word) is None]
+        return query_filter, unknown
+
+    def lookup(self, query_filter):
+        """Rows matching every constraint, in display order"""
+        if not self.rows:
+            return []
+        mask = query_filter.mask(self.columns, len(self.rows))
+        row_ids = np.flatnonzero(mask)
+        row_ids = row_ids[np.argsort(self._rank[row_ids])]
+        return [self.rows[i] for i in row_ids]
+
+    def answer(self, prompt, user_type="guest", department=None):
+        """
+        Answer a teaching-assignment question from local data, or return None
+        to let the Bedrock Agent handle it.
+        """
+        if not self.loaded:
+            return None
+        text = normalize(prompt)
+        if NOT_TEACHING_PATTERN.search(text) or PRIVATE_PATTERN.search(text):
+            return None
+        # Only questions about who teaches what ("who teaches ...", "what subjects does ... teach")
+        if classify(prompt).intent != 'teacher_info':
+            return None
+        query_filter, unknown = self.parse(text)
+        if unknown or not (query_filter.teachers or query_filter.subjects or query_filter.semesters):
+            return None  # A subject, name or criterion the tables don't have
+
+        # Department named in the question wins; otherwise logged-in users see their own
+        if not query_filter.departments and user_type in ('student', 'teacher') and department in self.departments:
+            query_filter.departments = [department]
+
+        rows = self.lookup(query_filter)
+        if not rows:
+            return None
+        return self._format(rows)
+
+    def _format(self, rows):
+        lines = []
+        for dept in sorted({r['department'] for r in rows}):
+            if lines:
+                lines.append('')
+            lines.append(f"{dept}:")
+            for r in rows:
+                if r['department'] != dept:
+                    continue
+                semester = f"Semester {r['semester']}: " if r['semester'] else ''
+                designation = f" ({r['designation']})" if r['designation'] else ''
+                lines.append(f"- {semester}{r['subject']} - {r['teacher']}{designation}")
+        return '\n'.join(lines)
+
+# Global instance
+local_lookup = LocalLookup()
@@ -0,0 +1,209 @@
+"""
+In-process metrics for the chat pipeline, exposed in the Prometheus text
+format on /metrics.
+
+Recording is a dict lookup, a bisect and a few additions under a per-metric
+lock, so it is cheap enough to leave on for every request. Each worker
+process keeps its own numbers; scrape every worker (or run one process per
+scrape target) to see the whole deployment.
+"""
+import bisect
+import threading
+
+from app.dataloader import DEPARTMENT_FILES
+
+# Seconds: from fast local answers up to the Bedrock call deadline
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 90)
+REFERENCE_BUCKETS = (0, 1, 5, 10, 20, 30, 40, 50, 75, 100)
+SIZE_BUCKETS = (64, 256, 1024, 2048, 4096, 8192, 16384, 65536)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{value}"' for name, value in extra]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """The series for these label values (created on first use)"""
+        values = tuple(str(v) for v in values)
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            children = sorted(self._children.items())
+        for values, child in children:
+            lines.extend(self._render_child(values, child))
+        return lines
+
+
+class _CounterValue:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, e.g. cache hits or errors"""
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterValue()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def _render_child(self, values, child):
+        yield f"{self.name}_total{_format_labels(self.labelnames, values)} {_format_number(child.value)}"
+
+
+class _HistogramValue:
+    __slots__ = ('buckets', 'counts', 'sum', 'count', '_lock')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in fixed buckets, e.g. request latency"""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def _render_child(self, values, child):
+        counts, total, count = child.snapshot()
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += bucket_count
+            labels = _format_labels(self.labelnames, values, [('le', _format_number(bound))])
+            yield f"{self.name}_bucket{labels} {cumulative}"
+        labels = _format_labels(self.labelnames, values)
+        yield f"{self.name}_sum{labels} {_format_number(total)}"
+        yield f"{self.name}_count{labels} {count}"
+
+
+class Registry:
+    """The set of metrics rendered on /metrics"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+def access_labels(user_type, department):
+    """
+    (access_level, department) label values for a request.
+    Departments are limited to the known ones so a crafted request can't
+    create unbounded series.
+    """
+    if user_type not in ('student', 'teacher'):
+        return 'guest', 'none'
+    if department in DEPARTMENT_FILES:
+        return user_type, department
+    return user_type, 'other' if department else 'none'
+
+
+# Global registry and the pipeline's metrics
+registry = Registry()
+ACCESS = ('access_level', 'department')
+
+REQUEST_SECONDS = registry.histogram(
+    'pkonnect_chat_request_seconds',
+    'Time to answer a chat question, by where the answer came from (policy, local, cache, agent)',
+    ACCESS + ('source',))
+RESPONSE_BYTES = registry.histogram(
+    'pkonnect_chat_response_bytes', 'Size of chat answers in UTF-8 bytes',
+    ACCESS + ('source',), buckets=SIZE_BUCKETS)
+POLICY_SHORT_CIRCUITS = registry.counter(
+    'pkonnect_policy_short_circuits',
+    'Messages answered or refused by the policy stage without an agent call, by action and intent',
+    ACCESS + ('action', 'intent'))
+CACHE_LOOKUPS = registry.counter(
+    'pkonnect_response_cache_lookups', 'Response cache lookups by result (hit, miss)',
+    ACCESS + ('result',))
+# Agent call metrics are also labelled with the retrieval profile (see app/retrieval.py)
+AGENT = ACCESS + ('profile',)
+
+BEDROCK_FIRST_CHUNK_SECONDS = registry.histogram(
+    'pkonnect_bedrock_first_chunk_seconds', 'Time from invoke_agent to the first text chunk', AGENT)
+BEDROCK_STREAM_SECONDS = registry.histogram(
+    'pkonnect_bedrock_stream_seconds', 'Time from invoke_agent to the end of the event stream', AGENT)
+BEDROCK_RETRIEVED_REFERENCES = registry.histogram(
+    'pkonnect_bedrock_retrieved_references', 'Knowledge base references retrieved per lookup',
+    AGENT, buckets=REFERENCE_BUCKETS)
+BEDROCK_ERRORS = registry.counter(
+    'pkonnect_bedrock_errors', 'Failed agent calls by error code', AGENT + ('code',))
@@ -0,0 +1,79 @@
+"""
+Cache of rendered pages that are the same for every visitor.
+
+The landing, guest and chatbot pages only depend on their template (and the
+static URLs in it), so each is rendered and compressed once. Later hits
+send the stored bytes, or a 304 when the browser's If-None-Match matches
+the page's ETag. A page is rendered again when its template file changes.
+"""
+import hashlib
+import threading
+from collections import namedtuple
+
+from flask import Response, current_app, render_template, request
+
+from app.assets import ENCODINGS
+from app.config import ASSET_COMPRESS_MIN_SIZE
+
+# uptodate  the template loader's check that the file hasn't changed since rendering
+# etag      hash of the rendered HTML
+# bodies    Content-Encoding (None for identity) -> bytes
+RenderedPage = namedtuple('RenderedPage', 'uptodate etag bodies')
+
+
+class PageCache:
+    """Rendered templates with their compressed variants, keyed by template name and context"""
+
+    def __init__(self, min_size=ASSET_COMPRESS_MIN_SIZE):
+        self.min_size = min_size
+        self._pages = {}
+        self._lock = threading.Lock()
+        self.renders = 0
+
+    def _render(self, name, context, stale):
+        env = current_app.jinja_env
+        _, _, uptodate = env.loader.get_source(env, name)
+        if stale and env.cache is not None:
+            env.cache.clear()  # Jinja only reloads changed templates itself in debug mode
+        body = render_template(name, **context).encode()
+        bodies = {None: body}
+        if len(body) >= self.min_size:
+            for encoding, _, compress in ENCODINGS:
+                bodies[encoding] = compress(body)
+        self.renders += 1
+        return RenderedPage(uptodate or (lambda: True), hashlib.sha256(body).hexdigest()[:32], bodies)
+
+    def get(self, name, **context):
+        """The RenderedPage for a template, rendering it if needed"""
+        key = (name, request.script_root, tuple(sorted(context.items())))
+        page = self._pages.get(key)
+        if page is None or not page.uptodate():
+            with self._lock:
+                page = self._pages.get(key)
+                if page is None or not page.uptodate():
+                    page = self._pages[key] = self._render(name, context, stale=page is not None)
+        return page
+
+    def response(self, name, **context):
+        """Response for a cached page: 304 if the browser has it, else its best-compressed variant"""
+        page = self.get(name, **context)
+        encoding = next((encoding for encoding, _, _ in ENCODINGS
+                         if encoding in page.bodies and request.accept_encodings[encoding]), None)
+        etag = page.etag if encoding is None else f"{page.etag}-{encoding}"
+
+        # Any representation of the same HTML is still fresh
+        if any(tag in request.if_none_match for tag in [page.etag] + [f"{page.etag}-{e}" for e in page.bodies if e]):
+            response = Response(status=304)
+        else:
+            response = Response(page.bodies[encoding], mimetype='text/html')
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+        response.set_etag(etag)
+        if len(page.bodies) > 1:
+            response.vary.add('Accept-Encoding')
+        response.cache_control.no_cache = True  # Revalidate every time; it's a 304 while unchanged
+        return response
+
+
+# Global instance
+page_cache = PageCache()
@@ -0,0 +1,135 @@
+"""
+Password hashing and verification.
+
+Stored hashes carry their scheme and parameters, so the work factor can be
+raised without invalidating existing accounts:
+
+    scrypt$<n>$<r>$<p>$<salt>$<hash>          current format
+    pbkdf2_sha256$<iterations>$<salt>$<hash>  also accepted
+    <64 hex digits>                           unsalted SHA-256 (the original format)
+
+verify_user rehashes a password in the current format whenever its owner
+logs in with an older one. Hashing is deliberately slow, so it runs on
+password_pool, never directly on a request thread.
+"""
+import base64
+import hashlib
+import hmac
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from app.config import (
+    PASSWORD_QUEUE_LIMIT, PASSWORD_SCRYPT_N, PASSWORD_SCRYPT_P, PASSWORD_SCRYPT_R, PASSWORD_TIMEOUT,
+    PASSWORD_WORKERS,
+)
+
+SALT_BYTES = 16
+HASH_BYTES = 32
+
+
+class PasswordPoolBusy(Exception):
+    """Raised instead of queueing a hash when the password pool is full"""
+
+
+def _b64(data):
+    return base64.b64encode(data).decode('ascii')
+
+
+def _scrypt(password, salt, n, r, p):
+    # OpenSSL refuses to use more than maxmem; scrypt needs 128 * n * r * p bytes plus a little
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, dklen=HASH_BYTES,
+                          maxmem=256 * n * r * p + (1 << 20))
+
+
+def hash_password(password, n=PASSWORD_SCRYPT_N, r=PASSWORD_SCRYPT_R, p=PASSWORD_SCRYPT_P):
+    """Hash a password in the current format (salted scrypt)"""
+    salt = os.urandom(SALT_BYTES)
+    return f"scrypt${n}${r}${p}${_b64(salt)}${_b64(_scrypt(password, salt, n, r, p))}"
+
+
+def verify_password(password, stored):
+    """True if password matches a stored hash in any supported format"""
+    try:
+        if stored.startswith('scrypt$'):
+            _, n, r, p, salt, expected = stored.split('$')
+            actual = _scrypt(password, base64.b64decode(salt), int(n), int(r), int(p))
+            return hmac.compare_digest(actual, base64.b64decode(expected))
+        if stored.startswith('pbkdf2_sha256$'):
+            _, iterations, salt, expected = stored.split('$')
+            actual = hashlib.pbkdf2_hmac('sha256', password.encode(), base64.b64decode(salt), int(iterations),
+                                         dklen=len(base64.b64decode(expected)))
+            return hmac.compare_digest(actual, base64.b64decode(expected))
+        if len(stored) == 64:
+            return hmac.compare_digest(hashlib.sha256(password.encode()).hexdigest(), stored.lower())
+    except ValueError:
+        pass  # Malformed hash: never matches
+    return False
+
+
+def needs_rehash(stored, n=PASSWORD_SCRYPT_N, r=PASSWORD_SCRYPT_R, p=PASSWORD_SCRYPT_P):
+    """True if a stored hash isn't in the current format with the current parameters"""
+    return not stored.startswith(f"scrypt${n}${r}${p}$")
+
+
+class PasswordPool:
+    """
+    Bounded thread pool for password hashing.
+
+    hashlib releases the GIL while scrypt/PBKDF2 run, so `workers` threads
+    hash on as many cores at once. At most `queue_limit` more hashes may wait
+    for a worker; past that run() raises PasswordPoolBusy right away, and the
+    login routes answer 503 instead of piling up request threads behind it.
+    """
+
+    def __init__(self, workers=PASSWORD_WORKERS, queue_limit=PASSWORD_QUEUE_LIMIT, timeout=PASSWORD_TIMEOUT):
+        self.workers = max(1, workers)
+        self.queue_limit = max(0, queue_limit)
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_limit)
+        self._executor = None
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.rejected = 0
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password")
+        return self._executor
+
+    def _release(self, future):
+        self.completed += 1
+        self._slots.release()
+
+    def run(self, fn, *args):
+        """Run fn(*args) on the pool and return its result; PasswordPoolBusy if the pool is full"""
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise PasswordPoolBusy()
+        try:
+            future = self.executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(self._release)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise PasswordPoolBusy() from None  # The hash still finishes and frees its slot
+
+    def verify(self, password, stored):
+        return self.run(verify_password, password, stored)
+
+    def hash(self, password):
+        return self.run(hash_password, password)
+
+    def stats(self):
+        return {'workers': self.workers, 'queue_limit': self.queue_limit,
+                'completed': self.completed, 'rejected': self.rejected}
+
+
+# Global instance
+password_pool = PasswordPool()
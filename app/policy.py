@@ -0,0 +1,80 @@
+import re
+from collections import namedtuple
+
+from app.intent import classify
+from app.utils import is_allowed_for_user
+
+# What the policy stage decided for a message:
+#   action   'refuse' or 'answer' (handled here) - anything else goes on to the agent
+#   intent   the recognized intent, or the small-talk kind for canned answers
+#   response the text to send back
+PolicyDecision = namedtuple('PolicyDecision', 'action intent response')
+
+# Whole-message small talk that needs no knowledge base lookup
+SMALL_TALK = [
+    ('greeting', re.compile(
+        r"^(hi+|hello+|hey+|namaste|namaskar|good (morning|afternoon|evening)|hi there|hello there)( pkonnect)?$"),
+     "Hello! I'm PKonnect, the Padma Kanya Multiple Campus assistant. "
+     "Ask me about courses, admissions, teachers or anything else about the college."),
+    ('thanks', re.compile(r"^(thanks?( you)?( so much| a lot)?|thank u|thanku|ty|dhanyabad|dhanyawad)( pkonnect)?$"),
+     "You're welcome! Let me know if there is anything else you'd like to know."),
+    ('goodbye', re.compile(r"^(bye+|goodbye|good bye|see you|see ya)( pkonnect)?$"),
+     "Goodbye! Come back any time you have questions about the college."),
+]
+
+REFUSALS = {
+    'confidential_finance': "Sorry, I can't share salary, budget or other financial details.",
+    'exam_result': "Exam results are only available to logged-in students and teachers. "
+                   "Please log in with your college account to ask about results.",
+    'student_contact': "Sorry, I can't share students' contact details.",
+}
+DEFAULT_REFUSAL = "Sorry, I can't help with that at your access level."
+
+# Grades, marks and scores also come up in admission requirements ("what grade do I need
+# in +2 to apply?"), so results are only refused on wording that asks for someone's results
+RESULT_WORDING = re.compile(
+    r"\b(results?|mark\s*sheets?|transcripts?|natija|pariname?|"
+    r"(my|our|his|her|their)\s+(marks?|grades?|c?gpa|scores?)|(marks?|grades?|c?gpa|scores?)\s+of)\b")
+ELIGIBILITY_WORDING = re.compile(
+    r"\b(apply\w*|application|eligib\w*|qualif\w*|requir\w*|need\w*|minimum|cut\s*-?off|join\w*|admi\w*)\b")
+
+
+def _small_talk_text(message):
+    return ' '.join(re.findall(r"[a-z']+", message.lower())).replace("'", '')
+
+
+def check_policy(message, user_type="guest", role=None):
+    """
+    Decide locally whether a message needs the Bedrock Agent at all.
+
+    Returns a PolicyDecision for topics the user's access level doesn't allow
+    (see is_allowed_for_user) and for plain greetings/thanks, or None to let
+    the question through. Messages that only might be about a restricted
+    topic go through; the agent's access instructions still apply to them.
+    """
+    text = _small_talk_text(message)
+    for kind, pattern, answer in SMALL_TALK:
+        if pattern.match(text):
+            return PolicyDecision('answer', kind, answer)
+
+    if user_type not in ('student', 'teacher'):
+        user_type = 'guest'
+    classified = classify(message)
+    intent = classified.intent
+    if not is_allowed_for_user(intent, user_type, role) and _unambiguous(message, classified):
+        return PolicyDecision('refuse', intent, REFUSALS.get(intent, DEFAULT_REFUSAL))
+    return None
+
+
+def _unambiguous(message, classified):
+    """
+    Whether a refusal is safe. Finance and student-contact questions are
+    refused whatever else they mention; exam results only when they are
+    asked for as results, not as admission requirements.
+    """
+    if classified.intent != 'exam_result':
+        return True
+    if 'admission_info' in classified.scores:
+        return False  # e.g. admission and marks: the agent and its access rules decide
+    text = message.lower()
+    return bool(RESULT_WORDING.search(text)) and not ELIGIBILITY_WORDING.search(text)
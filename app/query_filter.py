@@ -0,0 +1,139 @@
+import re
+
+import numpy as np
+
+ORDINAL_WORDS = {
+    'first': 1, 'second': 2, 'third': 3, 'fourth': 4,
+    'fifth': 5, 'sixth': 6, 'seventh': 7, 'eighth': 8,
+}
+
+MAX_SEMESTER = 8
+
+_ORDINAL = r'(?:[1-8](?:st|nd|rd|th)?|' + '|'.join(ORDINAL_WORDS) + r')'
+_SEMESTER_WORD = r'sem(?:ester)?s?'
+_ORDINAL_LIST = rf'{_ORDINAL}(?:\s+(?:and|or|to|&)?\s*{_ORDINAL})*'
+
+# "3rd semester", "1st and 2nd semesters", "first to third sem", "semester 5", "sem 4 and 6"
+SEMESTER_PATTERN = re.compile(
+    rf'\b({_ORDINAL_LIST})\s*{_SEMESTER_WORD}\b|\b{_SEMESTER_WORD}\s*({_ORDINAL_LIST})\b'
+)
+_ORDINAL_TOKEN = re.compile(rf'\bto\b|{_ORDINAL}')
+
+# How users write each department
+DEPARTMENT_ALIASES = {
+    'BSC CSIT': ('bsc csit', 'b sc csit', 'csit'),
+    'BIT': ('bit',),
+}
+
+# Designation words -> text to look for in the designation column
+DESIGNATION_ALIASES = {
+    'assistant professor': ('assistant professor', 'assistant professors'),
+    'associate professor': ('associate professor', 'associate professors'),
+    'professor': ('professor', 'professors'),
+    'lecturer': ('lecturer', 'lecturers'),
+    'teaching assistant': ('teaching assistant', 'teaching assistants'),
+}
+
+def semester_from_word(word):
+    """1 for '1', '1st' or 'first'; None for anything that isn't a semester number"""
+    word = word.lower()
+    if word in ORDINAL_WORDS:
+        return ORDINAL_WORDS[word]
+    match = re.fullmatch(r'([1-8])(?:st|nd|rd|th)?', word)
+    return int(match.group(1)) if match else None
+
+def parse_semesters(text):
+    """All semesters a (normalized) question mentions, expanding ranges like '1st to 3rd'"""
+    semesters = set()
+    for match in SEMESTER_PATTERN.finditer(text):
+        previous = None
+        range_next = False
+        for token in _ORDINAL_TOKEN.findall(match.group(1) or match.group(2)):
+            if token == 'to':
+                range_next = previous is not None
+                continue
+            number = semester_from_word(token)
+            if range_next and number is not None and number >= previous:
+                semesters.update(range(previous, number + 1))
+            elif number is not None:
+                semesters.add(number)
+            previous = number
+            range_next = False
+    return sorted(semesters)
+
+def department_pattern(department):
+    """
+    Regex matching how users write a department: 'bsc csit' also matches
+    'B.Sc. CSIT', 'bsccsit' and 'b sc csit'. Shared with app/intent.py so
+    both parsers agree; "a bit of help" is not BIT.
+    """
+    aliases = '|'.join(r'[\s.]*'.join(re.escape(ch) for ch in alias.replace(' ', ''))
+                       for alias in DEPARTMENT_ALIASES[department])
+    return rf"(?<!\ba )\b(?:{aliases})\b"
+
+DEPARTMENT_PATTERNS = {name: re.compile(department_pattern(name)) for name in DEPARTMENT_ALIASES}
+
+def parse_departments(text):
+    return [name for name, pattern in DEPARTMENT_PATTERNS.items() if pattern.search(text)]
+
+def parse_designations(text):
+    padded = f" {text} "
+    found = []
+    for designation, aliases in DESIGNATION_ALIASES.items():
+        if any(f" {alias} " in padded for alias in aliases):
+            # "assistant professor" shouldn't also add the broader "professor"
+            if not any(designation in other for other in found):
+                found.append(designation)
+    return found
+
+class QueryFilter:
+    """
+    Constraints parsed once from a question and applied as numpy boolean
+    masks over column arrays. Every non-empty constraint must hold; each
+    one accepts any of its values.
+
+    Columns used: 'semester' (int), 'department', 'designation',
+    'subject_key' and 'teacher_key' (str).
+    """
+
+    def __init__(self, semesters=(), departments=(), designations=(), subjects=(), teachers=()):
+        self.semesters = list(semesters)
+        self.departments = list(departments)
+        self.designations = list(designations)
+        self.subjects = list(subjects)
+        self.teachers = list(teachers)
+
+    @classmethod
+    def parse(cls, text):
+        """Semester, department and designation constraints of a normalized question"""
+        return cls(
+            semesters=parse_semesters(text),
+            departments=parse_departments(text),
+            designations=parse_designations(text),
+        )
+
+    def has_constraints(self):
+        return bool(self.semesters or self.departments or self.designations or self.subjects or self.teachers)
+
+    def mask(self, columns, size):
+        """Boolean array: True for rows that satisfy every constraint"""
+        mask = np.ones(size, dtype=bool)
+        if self.semesters:
+            mask &= np.isin(columns['semester'], self.semesters)
+        if self.departments:
+            mask &= np.isin(columns['department'], self.departments)
+        if self.subjects:
+            mask &= np.isin(columns['subject_key'], self.subjects)
+        if self.teachers:
+            mask &= np.isin(columns['teacher_key'], self.teachers)
+        if self.designations:
+            lowered = np.char.lower(columns['designation'])
+            matches = np.zeros(size, dtype=bool)
+            for designation in self.designations:
+                matches |= np.char.find(lowered, designation) >= 0
+            mask &= matches
+        return mask
+
+    def __repr__(self):
+        return (f"QueryFilter(semesters={self.semesters}, departments={self.departments}, "
+                f"designations={self.designations}, subjects={self.subjects}, teachers={self.teachers})")
@@ -0,0 +1,136 @@
+import re
+from collections import namedtuple
+
+from app.utils import recognize_intent
+
+# How much the knowledge base search returns for a question.
+# mode is passed to the agent as the retrievalMode prompt session attribute.
+RetrievalProfile = namedtuple('RetrievalProfile', 'name number_of_results search_type mode')
+
+PROFILES = {
+    # Address, courses, facilities...: a handful of semantic matches is plenty
+    'general': RetrievalProfile('general', 8, 'SEMANTIC', 'focused'),
+    'admission': RetrievalProfile('admission', 10, 'SEMANTIC', 'focused'),
+    # Names, subjects and marks need keyword matching as well
+    'lookup': RetrievalProfile('lookup', 20, 'HYBRID', 'focused'),
+    # Lists of students ("all 3rd semester BIT students") need many records
+    'roster': RetrievalProfile('roster', 50, 'HYBRID', 'comprehensive'),
+}
+
+# The fixed behaviour before profiles: callers that don't pick one get this
+DEFAULT_PROFILE = PROFILES['roster']
+
+INTENT_PROFILES = {
+    'general': 'general',
+    'admission_info': 'admission',
+    'exam_result': 'lookup',
+    'teacher_info': 'lookup',
+    'student_contact': 'lookup',
+    'confidential_finance': 'lookup',
+}
+
+# Questions about many students at once
+ROSTER_PATTERN = re.compile(
+    r'\b(all|list|every|how many|number of|roster|names of|classmates|batch(?:mates)?)\b.*\bstudents?\b'
+    r'|\bstudents?\b.*\b(list|roster|in (?:the )?(?:\d|first|second|third|fourth|fifth|sixth|seventh|eighth))'
+)
+
+
+# Intents a guest gets no personal records for anyway (see is_allowed_for_user)
+GUEST_RESTRICTED_INTENTS = {'exam_result', 'student_contact', 'confidential_finance'}
+
+
+def select_profile(prompt, user_type="guest"):
+    """
+    Retrieval profile for a question, from its intent and the user's access level.
+    Guests never see student records, so they never get the large profiles for them.
+    """
+    message = prompt.lower()
+    logged_in = user_type in ('student', 'teacher')
+    if logged_in and ROSTER_PATTERN.search(message):
+        return PROFILES['roster']
+    intent = recognize_intent(message)
+    if not logged_in and intent in GUEST_RESTRICTED_INTENTS:
+        return PROFILES['general']
+    return PROFILES[INTENT_PROFILES.get(intent, 'general')]
+
+
+# ---------------- METADATA FILTERS ----------------
+# Knowledge base metadata keys, set in each document's .metadata.json. Filtering on them
+# is opt-in (KB_METADATA_FILTERS in app/config.py, which lists the required fields).
+DEPARTMENT_KEY = 'department'
+RECORD_TYPE_KEY = 'record_type'
+
+# Record types anyone may retrieve; student records are limited by access level
+PUBLIC_RECORD_TYPES = ['college', 'teacher']
+STUDENT_RECORD_TYPE = 'student'
+
+FILTER_OPERATORS = {'equals', 'notEquals', 'in', 'notIn', 'greaterThan', 'greaterThanOrEquals',
+                    'lessThan', 'lessThanOrEquals', 'startsWith', 'stringContains', 'listContains',
+                    'andAll', 'orAll'}
+
+
+def equals(key, value):
+    return {'equals': {'key': key, 'value': value}}
+
+
+def in_list(key, values):
+    values = list(dict.fromkeys(values))
+    return equals(key, values[0]) if len(values) == 1 else {'in': {'key': key, 'value': values}}
+
+
+def and_all(*filters):
+    """All of the filters must hold; Bedrock needs at least two in an andAll"""
+    filters = [f for f in filters if f]
+    if not filters:
+        return None
+    return filters[0] if len(filters) == 1 else {'andAll': filters}
+
+
+def or_all(*filters):
+    filters = [f for f in filters if f]
+    if not filters:
+        return None
+    return filters[0] if len(filters) == 1 else {'orAll': filters}
+
+
+def department_spellings(department):
+    """'BSC CSIT' plus the other ways documents spell it ('BSc CSIT', 'bsc csit', ...)"""
+    spellings = [department, department.upper(), department.lower(), department.title()]
+    if department.upper() == 'BSC CSIT':
+        spellings.append('BSc CSIT')
+    return spellings
+
+
+def to_kb_filter(metadata_filter):
+    """
+    Knowledge base retrieval filter for `metadata_filter`, which is either a
+    filter already in Bedrock's format or a plain mapping such as
+    {'department': 'BIT', 'record_type': ['college', 'teacher']}
+    (lists become `in`, everything else `equals`, all of them combined with andAll).
+    """
+    if not metadata_filter:
+        return None
+    if set(metadata_filter) <= FILTER_OPERATORS:
+        return metadata_filter
+    return and_all(*(
+        in_list(key, value) if isinstance(value, (list, tuple, set)) else equals(key, value)
+        for key, value in metadata_filter.items()
+    ))
+
+
+def access_filter(user_type="guest", department=None):
+    """
+    Retrieval filter that lets the vector search return only what this user may see:
+    guests get college and teacher documents, students additionally their own
+    department's student records, teachers everything (None).
+    """
+    if user_type == 'teacher':
+        return None
+    public = in_list(RECORD_TYPE_KEY, PUBLIC_RECORD_TYPES)
+    if user_type == 'student' and department:
+        return or_all(public, and_all(
+            equals(RECORD_TYPE_KEY, STUDENT_RECORD_TYPE),
+            in_list(DEPARTMENT_KEY, department_spellings(department)),
+        ))
+    return public
@@ -1,7 +1,13 @@
-from flask import Blueprint, request, jsonify, session, render_template, redirect, url_for
-from app.bedrock_proxy import query_bedrock
+from flask import Blueprint, request, jsonify, session, render_template, redirect, url_for, Response, stream_with_context
+from app.bedrock_proxy import query_bedrock, get_bedrock_session_id
+from app.history import history_store, entry_to_dict
 from app.db import verify_user
-import requests
+from app.gallery import gallery
+from app.pages import page_cache
+from app.passwords import PasswordPoolBusy
+from app.metrics import registry
+from app.config import CHAT_STREAMING
+import json
 import re
 
 chatbot_bp = Blueprint('chatbot_bp', __name__)
@@ -9,17 +15,17 @@ chatbot_bp = Blueprint('chatbot_bp', __name__)
 # Home page
 @chatbot_bp.route("/")
 def home():
-    return render_template("index.html")
+    return page_cache.response("index.html")
 
 # Guest page
 @chatbot_bp.route("/guest")
 def guest():
-    return render_template("guest.html")
+    return page_cache.response("guest.html")
 
 # Chatbot page
 @chatbot_bp.route("/chatbot")
 def chatbot():
-    return render_template("chatbot.html")
+    return page_cache.response("chatbot.html")
 
 # Select Department
 @chatbot_bp.route('/select-department', methods=['GET', 'POST'])
@@ -53,7 +59,11 @@ def institution_login():
         if not department or not role:
             error = "Session expired. Please start over."
         elif re.match(r'^[a-z0-9._%+-]+@pkonnect\.edu\.np$', email) and password:
-            user = verify_user(email, password, role, department)
+            try:
+                user = verify_user(email, password, role, department)
+            except PasswordPoolBusy:
+                error = "Too many people are logging in right now. Please try again in a moment."
+                return render_template('institution_login.html', error=error), 503, {'Retry-After': '2'}
             if user:
                 session['user_email'] = email
                 session['user_name'] = user.get('full_name')
@@ -81,7 +91,8 @@ def google_callback():
     if not token:
         return "Missing credential", 400
 
-    # Verify token with Google
+    # Verify token with Google (requests is only imported for this, as it is slow to import)
+    import requests
     google_resp = requests.get(f'https://oauth2.googleapis.com/tokeninfo?id_token={token}')
     if google_resp.status_code != 200:
         return "Invalid token", 400
@@ -93,6 +104,40 @@ def google_callback():
     # Redirect to chatbot or dashboard
     return redirect(url_for('chatbot_bp.chatbot'))
 
+def resolve_user_context(data, user_session=None):
+    """
+    Work out (user_type, department, role, user_name) for a chat request.
+    The frontend sends its view of the user, but the session is authoritative.
+    `user_session` defaults to the Flask session; the ASGI chat path passes its own.
+    """
+    if user_session is None:
+        user_session = session
+    # Get user type from request (sent from frontend)
+    user_type = data.get('user_type', 'guest')
+    department = data.get('department')
+    role = data.get('role')
+    user_name = None
+    
+    # Validate against session to prevent frontend manipulation
+    if user_type != 'guest':
+        if not user_session.get('is_student'):
+            # Not logged in on backend, force guest mode
+            user_type = 'guest'
+            department = None
+            role = None
+        else:
+            # Verify session matches
+            session_role = user_session.get('role', 'student')
+            session_dept = user_session.get('department')
+            user_name = user_session.get('user_name')
+            
+            # Use session data (don't trust frontend completely)
+            department = session_dept
+            role = session_role
+            user_type = 'teacher' if session_role == 'teacher' else 'student'
+
+    return user_type, department, role, user_name
+
 # Chat endpoint
 @chatbot_bp.route('/chat', methods=['POST'])
 def chat():
@@ -102,32 +147,11 @@ def chat():
         if not message:
             return jsonify({'response': 'No message provided.'}), 400
 
-        # Get user type from request (sent from frontend)
-        user_type = data.get('user_type', 'guest')
-        department = data.get('department')
-        role = data.get('role')
-        user_name = None
-        
-        # Validate against session to prevent frontend manipulation
-        if user_type != 'guest':
-            if not session.get('is_student'):
-                # Not logged in on backend, force guest mode
-                user_type = 'guest'
-                department = None
-                role = None
-            else:
-                # Verify session matches
-                session_role = session.get('role', 'student')
-                session_dept = session.get('department')
-                user_name = session.get('user_name')
-                
-                # Use session data (don't trust frontend completely)
-                department = session_dept
-                role = session_role
-                user_type = 'teacher' if session_role == 'teacher' else 'student'
+        user_type, department, role, user_name = resolve_user_context(data)
 
         from app.chatbot import get_response
         response = get_response(message, user_type, department, role, user_name)
+        history_store.record(get_bedrock_session_id(), message, response)
         
         return jsonify({'response': response})
 
@@ -135,6 +159,71 @@ def chat():
         print("❌ Chat route error:", e)
         return jsonify({'response': 'Internal server error occurred.'}), 500
 
+# Streaming chat endpoint (Server-Sent Events)
+@chatbot_bp.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """
+    Same as /chat, but forwards the answer as it is generated.
+    Each piece is sent as `data: {"delta": "..."}`, followed by an `event: done`.
+    """
+    try:
+        data = request.get_json()
+        message = data.get('message', '')
+        if not message:
+            return jsonify({'response': 'No message provided.'}), 400
+
+        user_type, department, role, user_name = resolve_user_context(data)
+
+        from app.chatbot import get_response_stream
+        pieces = get_response_stream(message, user_type, department, role, user_name)
+        # Resolved now: the session cookie can't change once streaming has started
+        history_session_id = get_bedrock_session_id()
+    except Exception as e:
+        print("❌ Chat stream route error:", e)
+        return jsonify({'response': 'Internal server error occurred.'}), 500
+
+    def generate():
+        answer = []
+        try:
+            for piece in pieces:
+                answer.append(piece)
+                yield f"data: {json.dumps({'delta': piece})}\n\n"
+        except Exception as e:
+            print("❌ Chat stream error:", e)
+            yield f"data: {json.dumps({'delta': 'Internal server error occurred.'})}\n\n"
+        history_store.record(history_session_id, message, "".join(answer))
+        yield "event: done\ndata: {}\n\n"
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',  # Stop nginx from buffering the stream
+    })
+
+# Metrics endpoint (Prometheus text format)
+@chatbot_bp.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+# Gallery manifest (thumbnails, srcset and lightbox images for the landing page)
+@chatbot_bp.route('/gallery.json', methods=['GET'])
+def gallery_manifest():
+    def static_url(filename):
+        return url_for('static', filename=filename)
+
+    photos = [{
+        'name': photo['name'],
+        'width': photo['width'],
+        'height': photo['height'],
+        'src': static_url(photo['thumb']),
+        'srcset': ', '.join(f"{static_url(filename)} {width}w" for filename, width in photo['srcset']),
+        'full': static_url(photo['full']),
+    } for photo in gallery.manifest()]
+    response = jsonify({'photos': photos})
+    response.set_etag(gallery.etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = 300
+    return response.make_conditional(request)
+
 # Login endpoint
 @chatbot_bp.route('/login', methods=['POST'])
 def login():
@@ -149,7 +238,11 @@ def login():
             return jsonify({'success': False, 'message': 'All fields are required'})
         
         # Verify with database
-        user = verify_user(email, password, role, department)
+        try:
+            user = verify_user(email, password, role, department)
+        except PasswordPoolBusy:
+            return jsonify({'success': False, 'message': 'Too many logins right now, please try again shortly',
+                            'retry_after': 2}), 503, {'Retry-After': '2'}
         if user:
             # Set session
             session['user_email'] = email
@@ -177,16 +270,18 @@ def login():
 # Check login status
 @chatbot_bp.route('/check-login-status', methods=['GET'])
 def check_login_status():
+    return jsonify(login_state())
+
+def login_state():
     if session.get('is_student'):
-        return jsonify({
+        return {
             'logged_in': True,
             'user_type': session.get('user_type', 'guest'),
             'role': session.get('role'),
             'department': session.get('department'),
             'full_name': session.get('user_name')
-        })
-    else:
-        return jsonify({'logged_in': False, 'user_type': 'guest'})
+        }
+    return {'logged_in': False, 'user_type': 'guest'}
 
 # Logout endpoint (clear session)
 @chatbot_bp.route('/logout', methods=['POST'])
@@ -202,11 +297,39 @@ def logout():
     session.pop('bedrock_session_id', None)
     return jsonify({'success': True, 'message': 'Logged out successfully'})
 
-# History endpoint (no DB, returns empty)
-@chatbot_bp.route('/history', methods=['GET'])
+# History endpoint: the current conversation, oldest turn first
 @chatbot_bp.route('/history', methods=['GET'])
 def history():
-    return jsonify({'history': []})
+    """
+    Optional query parameters: `limit` (turns per page, max 200) and `before`
+    (the `next_before` of the previous response, for older turns).
+    """
+    session_id = session.get('bedrock_session_id')
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
+    before = request.args.get('before', type=float)
+    entries, next_before = history_store.get(session_id, limit, before)
+    return jsonify({'history': [entry_to_dict(e) for e in entries], 'next_before': next_before})
+
+# Everything the chat page needs on load, in one round trip
+@chatbot_bp.route('/bootstrap', methods=['GET'])
+def bootstrap():
+    """
+    Login state, the latest conversation turns and feature flags. Optional
+    `limit` as for /history. Answers 304 while the browser's copy is current.
+    """
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
+    entries, next_before = history_store.get(session.get('bedrock_session_id'), limit)
+    response = jsonify({
+        **login_state(),
+        'history': [entry_to_dict(e) for e in entries],
+        'next_before': next_before,
+        'features': {'streaming': CHAT_STREAMING},
+    })
+    response.add_etag()
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.vary.add('Cookie')
+    return response.make_conditional(request)
 
 # Clear conversation endpoint - starts a new session
 @chatbot_bp.route('/clear-conversation', methods=['POST'])
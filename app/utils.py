@@ -1,31 +1,40 @@
 import re
 
+from app.intent import classify
+
+# Common stop words left out of keywords
+STOP_WORDS = frozenset({'is', 'are', 'the', 'of', 'in', 'at', 'to', 'for', 'on', 'with', 'by', 'about', 'tell', 'me'})
+WORD_PATTERN = re.compile(r'\w+')
+
 def extract_keywords(query):
     """Extract keywords from user query for searching"""
     # Remove common stop words and extract meaningful terms
-    stop_words = {'is', 'are', 'the', 'of', 'in', 'at', 'to', 'for', 'on', 'with', 'by', 'about', 'tell', 'me'}
-    words = re.findall(r'\w+', query.lower())
-    keywords = [word for word in words if word not in stop_words and len(word) > 2]
+    words = WORD_PATTERN.findall(query.lower())
+    keywords = [word for word in words if word not in STOP_WORDS and len(word) > 2]
     return keywords
 
+def normalized_words(query):
+    """Every word of a query except stop words, however short ('semester 1' and 'semester 2' differ)"""
+    return [word for word in WORD_PATTERN.findall(query.lower()) if word not in STOP_WORDS]
+
+# Words that only make sense relative to earlier turns of the conversation
+FOLLOW_UP_PATTERN = re.compile(
+    r"\b(he|she|him|her|his|hers|they|them|their|it|its|this|that|these|those|"
+    r"above|previous|same|more|else|again|also|another)\b"
+    r"|^\s*(and|but|so|what about|how about)\b"
+)
+
+def is_follow_up(query):
+    """Check whether a message refers back to earlier turns of the conversation"""
+    return bool(FOLLOW_UP_PATTERN.search(query.lower()))
+
 def recognize_intent(message):
     """
     Simple intent recognition for access control.
     All actual responses come from AWS Bedrock.
+    Returns the best intent from app/intent.py's classifier ('general' if none).
     """
-    message = message.lower()
-    if "admission" in message or "enroll" in message:
-        return "admission_info"
-    elif "result" in message or "grade" in message or "marks" in message:
-        return "exam_result"
-    elif "salary" in message or "budget" in message or "finance" in message:
-        return "confidential_finance"
-    elif "teacher" in message or "faculty" in message or "lecturer" in message:
-        return "teacher_info"
-    elif "student" in message and ("contact" in message or "email" in message or "phone" in message):
-        return "student_contact"
-    else:
-        return "general"
+    return classify(message).intent
 
 def is_allowed_for_user(intent, user_type, role=None):
     """
@@ -0,0 +1,5 @@
+from app import create_app
+from app.asgi import ChatASGIApp
+
+# ASGI entry point: uvicorn asgi:app
+app = ChatASGIApp(create_app())
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Benchmark / load test for the /chat pipeline against a local fake Bedrock agent
+
+Drives the Flask app from create_app() with concurrent clients and reports
+throughput, p50/p95/p99 latency, time to first byte and a per-stage
+breakdown (session handling, local lookup, cache, prompt building, agent call,
+formatting). No AWS access is needed.
+
+Examples:
+    python scripts/bench_chat.py --requests 500 --concurrency 32
+    python scripts/bench_chat.py --endpoint /chat/stream --first-chunk-delay 1.5 --chunk-delay 0.2
+    python scripts/bench_chat.py --throttle-rate 0.2 --unique
+    python scripts/bench_chat.py --replay recorded_stream.json --json results.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from app import bedrock_proxy
+from app.bedrock_client import bedrock_client
+from app.cache import response_cache
+from app.local_lookup import local_lookup
+from scripts.fake_bedrock import FakeBedrockAgentRuntime, install
+
+QUESTIONS = [
+    "Tell me about Padma Kanya College",
+    "What courses are offered?",
+    "What is the address of the college?",
+    "How do I apply for admission?",
+    "Who teaches Data Structure in 3rd semester?",
+    "teachers of 1st semester bsc csit",
+]
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+class StageTimer:
+    """
+    Times pipeline stages by wrapping the functions that implement them.
+    Timings are collected per thread, so each request's breakdown is separate.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._restore = []
+
+    def reset(self):
+        self._local.stages = defaultdict(float)
+
+    def collect(self):
+        return dict(getattr(self._local, 'stages', {}))
+
+    def _record(self, stage, elapsed):
+        stages = getattr(self._local, 'stages', None)
+        if stages is not None:
+            stages[stage] += elapsed
+
+    def wrap(self, owner, name, stage):
+        original = getattr(owner, name)
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self._record(stage, time.perf_counter() - start)
+
+        setattr(owner, name, timed)
+        self._restore.append((owner, name, original))
+
+    def wrap_generator(self, owner, name, stage):
+        """Like wrap(), but counts the time spent producing every item of a generator"""
+        original = getattr(owner, name)
+
+        def timed(*args, **kwargs):
+            iterator = iter(original(*args, **kwargs))
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    self._record(stage, time.perf_counter() - start)
+                yield item
+
+        setattr(owner, name, timed)
+        self._restore.append((owner, name, original))
+
+    def restore(self):
+        for owner, name, original in reversed(self._restore):
+            if isinstance(owner, type) or not hasattr(type(owner), name):
+                setattr(owner, name, original)
+            else:
+                # Instance override of a method: drop it to fall back to the class
+                delattr(owner, name)
+        self._restore = []
+
+def instrument(timer):
+    timer.wrap(bedrock_proxy, 'get_bedrock_session_id', 'session')
+    timer.wrap(bedrock_proxy, 'response_cache_key', 'cache')
+    timer.wrap(local_lookup, 'answer', 'local_lookup')
+    timer.wrap(bedrock_proxy, 'build_prompt', 'prompt')
+    timer.wrap_generator(bedrock_client, '_iter_chunks', 'agent_call')
+    timer.wrap(bedrock_client, '_format_response', 'format')
+
+def run_request(client, endpoint, question, timer):
+    """Send one chat request; returns (ok, latency, ttfb, stages)"""
+    timer.reset()
+    start = time.perf_counter()
+    response = client.post(endpoint, json={'message': question}, buffered=False)
+    ttfb = None
+    body = b''
+    for piece in response.response:
+        if ttfb is None and piece:
+            ttfb = time.perf_counter() - start
+        body += piece if isinstance(piece, bytes) else piece.encode()
+    response.close()
+    latency = time.perf_counter() - start
+    return response.status_code == 200, latency, ttfb if ttfb is not None else latency, timer.collect()
+
+def run_benchmark(requests=200, concurrency=16, endpoint='/chat', unique=False, cache=True,
+                  runtime=None, questions=QUESTIONS):
+    """Run the load test and return a results dict"""
+    app = create_app()
+    runtime = runtime or FakeBedrockAgentRuntime()
+    previous_runtime = install(runtime)
+    previous_cache_size = response_cache.max_size
+    if not cache:
+        response_cache.max_size = 0
+    response_cache.clear()
+
+    timer = StageTimer()
+    instrument(timer)
+    local = threading.local()
+
+    def worker(i):
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+        question = questions[i % len(questions)]
+        if unique:
+            question = f"{question} ref{i:06d}"  # extra keyword defeats the cache
+        return run_request(local.client, endpoint, question, timer)
+
+    try:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(worker, range(requests)))
+        elapsed = time.perf_counter() - started
+    finally:
+        timer.restore()
+        install(previous_runtime)
+        response_cache.max_size = previous_cache_size
+        response_cache.clear()
+
+    latencies = [r[1] for r in results]
+    ttfbs = [r[2] for r in results]
+    stages = defaultdict(list)
+    for _, _, _, request_stages in results:
+        for stage, seconds in request_stages.items():
+            stages[stage].append(seconds)
+
+    return {
+        'requests': requests,
+        'concurrency': concurrency,
+        'endpoint': endpoint,
+        'errors': sum(1 for r in results if not r[0]),
+        'elapsed_s': elapsed,
+        'throughput_rps': requests / elapsed if elapsed else 0.0,
+        'latency_ms': {p: percentile(latencies, p) * 1000 for p in (50, 95, 99)},
+        'ttfb_ms': {p: percentile(ttfbs, p) * 1000 for p in (50, 95, 99)},
+        'stages_ms': {
+            stage: {
+                'mean': sum(values) / requests * 1000,
+                'p95': percentile(values, 95) * 1000,
+                'requests': len(values),
+            }
+            for stage, values in stages.items()
+        },
+        'agent_calls': runtime.calls,
+        'agent_throttled': runtime.throttled,
+        'cache': response_cache.stats(),
+    }
+
+def print_report(results):
+    print(f"\n📊 {results['requests']} requests to {results['endpoint']} "
+          f"at concurrency {results['concurrency']}")
+    print("=" * 60)
+    print(f"Throughput:   {results['throughput_rps']:.1f} req/s   "
+          f"(errors: {results['errors']}, agent calls: {results['agent_calls']}, "
+          f"throttled: {results['agent_throttled']})")
+    lat, ttfb = results['latency_ms'], results['ttfb_ms']
+    print(f"Latency ms:   p50 {lat[50]:8.1f}   p95 {lat[95]:8.1f}   p99 {lat[99]:8.1f}")
+    print(f"TTFB ms:      p50 {ttfb[50]:8.1f}   p95 {ttfb[95]:8.1f}   p99 {ttfb[99]:8.1f}")
+    print("\nPer-stage (mean over all requests / p95 of requests that hit the stage):")
+    for stage, numbers in sorted(results['stages_ms'].items()):
+        print(f"  {stage:<13} mean {numbers['mean']:8.2f} ms   p95 {numbers['p95']:8.2f} ms   "
+              f"({numbers['requests']} requests)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--endpoint', default='/chat', choices=['/chat', '/chat/stream'])
+    parser.add_argument('--unique', action='store_true', help='make every question unique (no cache hits)')
+    parser.add_argument('--no-cache', action='store_true', help='disable the response cache')
+    parser.add_argument('--first-chunk-delay', type=float, default=0.3, help='seconds before the first chunk')
+    parser.add_argument('--chunk-delay', type=float, default=0.05, help='seconds between chunks')
+    parser.add_argument('--chunks', type=int, default=4)
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='share of invoke_agent calls throttled')
+    parser.add_argument('--stream-throttle-rate', type=float, default=0.0,
+                        help='share of event streams that fail with throttlingException')
+    parser.add_argument('--replay', help='JSON file with a recorded event stream to replay')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    options = dict(
+        first_chunk_delay=args.first_chunk_delay, chunk_delay=args.chunk_delay, chunks=args.chunks,
+        throttle_rate=args.throttle_rate, stream_throttle_rate=args.stream_throttle_rate, seed=args.seed,
+    )
+    runtime = (FakeBedrockAgentRuntime.from_file(args.replay, **options) if args.replay
+               else FakeBedrockAgentRuntime(**options))
+
+    results = run_benchmark(args.requests, args.concurrency, args.endpoint,
+                            unique=args.unique, cache=not args.no_cache, runtime=runtime)
+    print_report(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark for password verification and logins
+
+Measures how many password verifications one core does per second with the
+configured scrypt parameters, then drives verify_user() against a throwaway
+users database with concurrent clients and reports logins/second overall and
+per password worker, latency percentiles and how many logins the pool turned
+away with PasswordPoolBusy.
+
+Examples:
+    python scripts/bench_login.py
+    python scripts/bench_login.py --logins 400 --concurrency 64 --workers 4 --queue-limit 16
+    PASSWORD_SCRYPT_N=32768 python scripts/bench_login.py --json results.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import db as db_module
+from app.config import PASSWORD_QUEUE_LIMIT, PASSWORD_SCRYPT_N, PASSWORD_WORKERS
+from app.db import Database, migrate, user_cache, verify_user
+from app.passwords import PasswordPool, PasswordPoolBusy, hash_password, verify_password
+from scripts.bench_chat import percentile
+
+def single_core_rate(stored, seconds=1.0):
+    """Password verifications per second on this thread alone"""
+    count, started = 0, time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        verify_password('password123', stored)
+        count += 1
+    return count / (time.perf_counter() - started)
+
+def run_benchmark(logins=200, concurrency=32, workers=PASSWORD_WORKERS, queue_limit=PASSWORD_QUEUE_LIMIT,
+                  users=50):
+    """Run the benchmark and return the results as a dict"""
+    stored = hash_password('password123')
+    pool = PasswordPool(workers=workers, queue_limit=queue_limit)
+    previous_pool, db_module.password_pool = db_module.password_pool, pool
+    previous_cache_size, user_cache.max_size = user_cache.max_size, 0
+
+    with tempfile.TemporaryDirectory() as directory:
+        database = Database(os.path.join(directory, 'bench.db'))
+        migrate(database)
+        database.executemany(
+            'INSERT INTO users (email, password_hash, role, department) VALUES (?, ?, ?, ?)',
+            [(f'user{i}@pkonnect.edu.np', stored, 'student', 'BIT') for i in range(users)])
+
+        def login(i):
+            started = time.perf_counter()
+            try:
+                user = verify_user(f'user{i % users}@pkonnect.edu.np', 'password123', 'student', 'BIT',
+                                   database=database)
+                outcome = 'ok' if user else 'failed'
+            except PasswordPoolBusy:
+                outcome = 'busy'
+            return outcome, time.perf_counter() - started
+
+        try:
+            per_core = single_core_rate(stored)
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as clients:
+                results = list(clients.map(login, range(logins)))
+            elapsed = time.perf_counter() - started
+        finally:
+            db_module.password_pool = previous_pool
+            user_cache.max_size = previous_cache_size
+            user_cache.clear()
+            database.close_all()
+
+    accepted = [seconds for outcome, seconds in results if outcome != 'busy']
+    ok = sum(1 for outcome, _ in results if outcome == 'ok')
+    return {
+        'logins': logins,
+        'concurrency': concurrency,
+        'workers': pool.workers,
+        'queue_limit': pool.queue_limit,
+        'scrypt_n': PASSWORD_SCRYPT_N,
+        'cpu_count': os.cpu_count(),
+        'single_core_verifications_per_s': per_core,
+        'elapsed_s': elapsed,
+        'ok': ok,
+        'failed': sum(1 for outcome, _ in results if outcome == 'failed'),
+        'rejected': len(results) - len(accepted),
+        'logins_per_s': ok / elapsed if elapsed else 0.0,
+        'logins_per_s_per_worker': ok / elapsed / pool.workers if elapsed else 0.0,
+        'latency_ms': {p: percentile(accepted, p) * 1000 for p in (50, 95, 99)},
+    }
+
+def print_report(results):
+    print(f"\n🔐 {results['logins']} logins at concurrency {results['concurrency']}, "
+          f"{results['workers']} password workers (queue limit {results['queue_limit']}), "
+          f"scrypt N={results['scrypt_n']}, {results['cpu_count']} CPUs")
+    print("=" * 60)
+    print(f"One core:     {results['single_core_verifications_per_s']:.1f} verifications/s")
+    print(f"Throughput:   {results['logins_per_s']:.1f} logins/s   "
+          f"({results['logins_per_s_per_worker']:.1f} per worker)")
+    print(f"Outcomes:     ok {results['ok']}   failed {results['failed']}   rejected (503) {results['rejected']}")
+    lat = results['latency_ms']
+    print(f"Latency ms:   p50 {lat[50]:8.1f}   p95 {lat[95]:8.1f}   p99 {lat[99]:8.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--workers', type=int, default=PASSWORD_WORKERS)
+    parser.add_argument('--queue-limit', type=int, default=PASSWORD_QUEUE_LIMIT)
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    results = run_benchmark(logins=args.logins, concurrency=args.concurrency, workers=args.workers,
+                            queue_limit=args.queue_limit)
+    print_report(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
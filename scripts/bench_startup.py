@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark for cold starts
+
+Starts fresh interpreters that import the app and call create_app(), as a
+new worker does, and reports how long each step took along with which slow
+dependencies (boto3, pandas, openpyxl, ...) were imported on the way. These
+are meant to load on first use only, so a change that imports one at
+startup again shows up here.
+
+Examples:
+    python scripts/bench_startup.py
+    python scripts/bench_startup.py --runs 10 --json results.json
+    python scripts/bench_startup.py --budget-ms 1500   # exit 1 if the median start is slower
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from scripts.bench_chat import percentile
+
+# Slow to import and not needed until a request uses them
+HEAVY_MODULES = ('boto3', 'botocore.client', 'pandas', 'openpyxl', 'requests')
+
+# Runs in the child interpreter; prints one JSON line
+PROBE = '''
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.create_app()
+created = time.perf_counter()
+print(json.dumps({
+    'import_s': imported - started,
+    'create_app_s': created - imported,
+    'heavy_modules': [name for name in %r if name in sys.modules],
+}))
+'''
+
+def measure_once(env=None):
+    """One cold start in a fresh interpreter: import/create_app seconds and the heavy modules it loaded"""
+    environment = dict(os.environ, BEDROCK_WARM_CLIENT='0')  # The warm-up thread would import boto3 on purpose
+    environment.update(env or {})
+    output = subprocess.run([sys.executable, '-c', PROBE % (HEAVY_MODULES,)], cwd=ROOT, env=environment,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def run_benchmark(runs=5, env=None):
+    """Run the benchmark and return the results as a dict"""
+    samples = [measure_once(env) for _ in range(runs)]
+    imports = [s['import_s'] for s in samples]
+    totals = [s['import_s'] + s['create_app_s'] for s in samples]
+    return {
+        'runs': runs,
+        'import_ms': {p: percentile(imports, p) * 1000 for p in (50, 95)},
+        'create_app_ms': {p: percentile([s['create_app_s'] for s in samples], p) * 1000 for p in (50, 95)},
+        'total_ms': {p: percentile(totals, p) * 1000 for p in (50, 95)},
+        'heavy_modules': sorted({name for s in samples for name in s['heavy_modules']}),
+    }
+
+def print_report(results):
+    print(f"\n🚀 {results['runs']} cold starts")
+    print("=" * 60)
+    for label, key in (('Import app:', 'import_ms'), ('create_app():', 'create_app_ms'), ('Total:', 'total_ms')):
+        print(f"{label:<14}p50 {results[key][50]:8.1f} ms   p95 {results[key][95]:8.1f} ms")
+    print(f"Heavy modules loaded at startup: {', '.join(results['heavy_modules']) or 'none'}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, help='fail if the median total start time is above this')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    results = run_benchmark(runs=args.runs)
+    print_report(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    failed = bool(results['heavy_modules'])
+    if args.budget_ms is not None and results['total_ms'][50] > args.budget_ms:
+        print(f"Median start {results['total_ms'][50]:.1f} ms is over the {args.budget_ms:.0f} ms budget")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
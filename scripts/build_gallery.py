@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Generate the gallery's resized photos and manifest ahead of time
+
+The app also does this in the background on startup; running it as a
+deployment step means the first visitors never wait for it. Only photos
+added or changed since the last run are processed.
+"""
+
+import os
+import sys
+import time
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.gallery import Image, gallery
+
+def main():
+    if Image is None:
+        print("⚠️ Pillow is not installed: the gallery will serve the original photos")
+    started = time.perf_counter()
+    photos = gallery.manifest()
+    elapsed = time.perf_counter() - started
+
+    original = derived = 0
+    for photo in photos:
+        original += os.path.getsize(os.path.join(gallery.source_dir, photo['name']))
+        derived += os.path.getsize(os.path.join(gallery.static_dir, photo['thumb']))
+    print(f"✅ {len(photos)} photos in {elapsed:.1f}s")
+    print(f"Grid thumbnails: {derived / 1024:.0f} KB (originals: {original / 1024 / 1024:.1f} MB)")
+
+if __name__ == "__main__":
+    main()
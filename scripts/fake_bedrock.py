@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the bedrock-agent-runtime client, for benchmarks and tests.
+
+It replays event streams shaped like invoke_agent's: an optional knowledge
+base trace, then text chunks. You control the time to the first chunk, the
+delay between chunks and how often calls are throttled. A recorded stream
+can also be replayed from a JSON file: a list of
+{"delay": seconds, "chunk": "text"} or {"delay": seconds, "trace_refs": n} items.
+"""
+
+import json
+import random
+import threading
+import time
+
+from botocore.exceptions import ClientError, EventStreamError
+
+DEFAULT_ANSWER = (
+    "Padma Kanya Multiple Campus is a constituent campus of Tribhuvan University "
+    "located in Bagbazar, Kathmandu.\\n\\nIt offers BSc CSIT, BIT and other programs "
+    "for women students."
+)
+
+def _throttling_error(stream):
+    error = {'Error': {'Code': 'throttlingException' if stream else 'ThrottlingException',
+                       'Message': 'Rate exceeded'}}
+    return EventStreamError(error, 'InvokeAgent') if stream else ClientError(error, 'InvokeAgent')
+
+class FakeBedrockAgentRuntime:
+    """Replays invoke_agent event streams with controllable timing and throttling"""
+
+    def __init__(self, answer=DEFAULT_ANSWER, chunks=4, first_chunk_delay=0.3, chunk_delay=0.05,
+                 throttle_rate=0.0, stream_throttle_rate=0.0, retrieved_refs=50, script=None, seed=None):
+        self.answer = answer
+        self.chunks = chunks
+        self.first_chunk_delay = first_chunk_delay
+        self.chunk_delay = chunk_delay
+        self.throttle_rate = throttle_rate
+        self.stream_throttle_rate = stream_throttle_rate
+        self.retrieved_refs = retrieved_refs
+        self.script = script
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.throttled = 0
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        """Replay a recorded event stream from a JSON file"""
+        with open(path) as f:
+            return cls(script=json.load(f), **kwargs)
+
+    def _roll(self, rate):
+        with self._lock:
+            return rate > 0 and self._random.random() < rate
+
+    def invoke_agent(self, **params):
+        with self._lock:
+            self.calls += 1
+        if self._roll(self.throttle_rate):
+            with self._lock:
+                self.throttled += 1
+            raise _throttling_error(stream=False)
+        return {
+            'completion': self._events(),
+            'sessionId': params.get('sessionId'),
+            'contentType': 'application/json',
+        }
+
+    def _script(self):
+        if self.script is not None:
+            return self.script
+        size = max(1, len(self.answer) // self.chunks + 1)
+        pieces = [self.answer[i:i + size] for i in range(0, len(self.answer), size)]
+        script = [{'delay': self.first_chunk_delay, 'trace_refs': self.retrieved_refs}]
+        script += [{'delay': self.chunk_delay if i else 0, 'chunk': piece} for i, piece in enumerate(pieces)]
+        return script
+
+    def _events(self):
+        if self._roll(self.stream_throttle_rate):
+            with self._lock:
+                self.throttled += 1
+            time.sleep(self.first_chunk_delay)
+            raise _throttling_error(stream=True)
+
+        for item in self._script():
+            if item.get('delay'):
+                time.sleep(item['delay'])
+            if 'chunk' in item:
+                yield {'chunk': {'bytes': item['chunk'].encode('utf-8')}}
+            elif 'trace_refs' in item:
+                yield {'trace': {'trace': {'orchestrationTrace': {'observation': {
+                    'knowledgeBaseLookupOutput': {
+                        'retrievedReferences': [{'content': {'text': ''}}] * item['trace_refs']
+                    }
+                }}}}}
+
+def install(runtime, client=None):
+    """Point the app's BedrockClient at the fake; returns the previous runtime"""
+    if client is None:
+        from app.bedrock_client import bedrock_client as client
+    previous = client.bedrock_agent
+    client.bedrock_agent = runtime
+    return previous
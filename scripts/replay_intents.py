@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Replay chat messages through the intent classifier
+
+Reads messages from a file, one per line (or JSON lines with a "message" or
+"question" field), classifies them in one batch and prints the intent
+distribution, the most common entities and the classification throughput.
+
+Examples:
+    python scripts/replay_intents.py chat_messages.txt
+    python scripts/replay_intents.py chat_log.jsonl --show 20
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.intent import classify_many
+
+def read_messages(path):
+    messages = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith('{'):
+                record = json.loads(line)
+                line = record.get('message') or record.get('question') or ''
+            messages.append(line)
+    return messages
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path', help='file with one message per line, or JSON lines')
+    parser.add_argument('--show', type=int, default=0, help='also print the first N classifications')
+    args = parser.parse_args()
+
+    messages = read_messages(args.path)
+    started = time.perf_counter()
+    results = classify_many(messages)
+    elapsed = time.perf_counter() - started
+
+    intents = Counter(result.intent for result in results)
+    departments = Counter(d for result in results for d in result.entities['departments'])
+    semesters = Counter(s for result in results for s in result.entities['semesters'])
+
+    print(f"\n🔍 {len(messages)} messages classified in {elapsed * 1000:.1f} ms "
+          f"({elapsed / max(len(messages), 1) * 1e6:.1f} µs each)")
+    print("=" * 60)
+    for intent, count in intents.most_common():
+        print(f"  {intent:<22} {count:6d}  ({count / len(messages):.1%})")
+    if departments:
+        print(f"\nDepartments: {dict(departments.most_common())}")
+    if semesters:
+        print(f"Semesters:   {dict(sorted(semesters.items()))}")
+
+    for message, result in list(zip(messages, results))[:args.show]:
+        print(f"\n{message}\n  -> {result.intent} {result.scores} {result.entities}")
+
+if __name__ == "__main__":
+    main()
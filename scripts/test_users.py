@@ -9,7 +9,7 @@ import os
 # Add the parent directory to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.db import init_db, verify_user, get_connection
+from app.db import db, init_db, verify_user
 
 def test_user_database():
     """Test user database functionality"""
@@ -34,13 +34,9 @@ def test_user_database():
     
     # List all users
     print("\n📋 All users in database:")
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT email, role, department FROM users')
-    users = cursor.fetchall()
+    users = db.fetchall('SELECT email, role, department FROM users')
     for user in users:
         print(f"- {user[0]} | {user[1]} | {user[2]}")
-    conn.close()
 
 if __name__ == "__main__":
     test_user_database()
\ No newline at end of file
@@ -59,29 +59,48 @@ window.addEventListener('click', function(event) {
 });
 
 /* Gallery functionality -------------------------------------------------- */
-function populateGallery() {
+// Photos come from the generated manifest (/gallery.json), fetched the first time the gallery opens.
+// The grid loads small resized copies; the large image is only requested when the lightbox opens.
+let galleryPhotos = null;
+
+async function loadGalleryPhotos(grid) {
+  if (galleryPhotos) return galleryPhotos;
+  try {
+    const res = await fetch(grid.dataset.manifest || '/gallery.json');
+    const data = await res.json();
+    galleryPhotos = data.photos || [];
+  } catch (err) {
+    console.error('Gallery manifest failed to load:', err);
+    return [];
+  }
+  return galleryPhotos;
+}
+
+async function populateGallery() {
   const grid = document.getElementById('galleryGrid');
-  if (!grid || !window.PK_GALLERY_IMAGES) return;
-  grid.innerHTML = '';
-  window.PK_GALLERY_IMAGES.forEach((entry, idx) => {
+  if (!grid || grid.childElementCount) return;
+  const photos = await loadGalleryPhotos(grid);
+  photos.forEach((photo, idx) => {
     const item = document.createElement('div');
     item.className = 'gallery-item animated-pop';
     item.style.animationDelay = (idx * 40) + 'ms';
 
-    // Build a safe, encoded URL for the image. If the entry already looks like a URL/path, use as-is.
-    let src = entry;
-    if (!entry.startsWith('/') && !entry.startsWith('http')) {
-      // static folder path for gallery images
-      src = '/static/img/PKonnect_gallery/' + encodeURIComponent(entry);
-    }
-
     const img = document.createElement('img');
-    img.src = src;
+    img.src = photo.src;
+    if (photo.srcset) {
+      img.srcset = photo.srcset;
+      img.sizes = '(max-width: 600px) 50vw, 200px';
+    }
+    if (photo.width && photo.height) {
+      img.width = photo.width;
+      img.height = photo.height;
+    }
     img.alt = 'Photo ' + (idx + 1);
     img.loading = 'lazy';
+    img.decoding = 'async';
     item.appendChild(img);
 
-    item.addEventListener('click', () => openLightbox(src));
+    item.addEventListener('click', () => openLightbox(photo.full));
     grid.appendChild(item);
   });
 }
@@ -119,7 +138,7 @@ function closeLightbox() {
   if (!lb || !img) return;
   lb.classList.remove('visible');
   lb.setAttribute('aria-hidden', 'true');
-  img.src = '';
+  img.removeAttribute('src');
 }
 
 document.addEventListener('DOMContentLoaded', function(){
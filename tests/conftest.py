@@ -0,0 +1,13 @@
+"""
+Pytest setup shared by every test module
+"""
+import atexit
+import os
+import shutil
+import tempfile
+
+# Conversation history goes to a throwaway database, not history.db in the repo root.
+# Set before any test module imports app.config, which reads it once.
+_history_directory = tempfile.mkdtemp(prefix='history-test-')
+os.environ['HISTORY_DATABASE'] = os.path.join(_history_directory, 'history.db')
+atexit.register(shutil.rmtree, _history_directory, ignore_errors=True)
@@ -0,0 +1,89 @@
+"""
+Test Asset Pipeline - Verify fingerprinted URLs, precompressed variants and immutable caching
+"""
+import sys
+import os
+import gzip
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask, url_for
+
+from app.assets import AssetPipeline, fingerprint
+
+CSS = "body { color: #123456; }\n" * 40
+
+def _make_app(static_dir):
+    os.makedirs(os.path.join(static_dir, 'css'))
+    with open(os.path.join(static_dir, 'css', 'site.css'), 'w') as f:
+        f.write(CSS)
+    with open(os.path.join(static_dir, 'tiny.js'), 'w') as f:
+        f.write("let a = 1;\n")
+    app = Flask(__name__, static_folder=static_dir, static_url_path='/static')
+    pipeline = AssetPipeline(build_dir=os.path.join(static_dir, '.build'))
+    pipeline.init_app(app)
+    return app, pipeline
+
+def test_fingerprinted_urls():
+    """url_for('static') returns content-hashed names that change with the content"""
+    print("\n" + "="*60)
+    print("TEST 1: FINGERPRINTED URLS")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as static_dir:
+        app, pipeline = _make_app(static_dir)
+        with app.test_request_context():
+            url = url_for('static', filename='css/site.css')
+            print(url)
+            assert url.startswith('/static/css/site.') and url.endswith('.css') and url != '/static/css/site.css'
+            assert url_for('static', filename='missing.png') == '/static/missing.png'
+
+        with open(os.path.join(static_dir, 'css', 'site.css'), 'a') as f:
+            f.write("p { margin: 0; }\n")
+        pipeline.build()
+        with app.test_request_context():
+            assert url_for('static', filename='css/site.css') != url
+        assert fingerprint('a/b.min.js', 'abcdef0123456789') == 'a/b.min.abcdef0123.js'
+
+def test_precompressed_and_immutable():
+    """Fingerprinted files are served precompressed, immutable, with per-encoding ETags"""
+    print("\n" + "="*60)
+    print("TEST 2: PRECOMPRESSED, IMMUTABLE RESPONSES")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as static_dir:
+        app, pipeline = _make_app(static_dir)
+        client = app.test_client()
+        with app.test_request_context():
+            url = url_for('static', filename='css/site.css')
+            tiny = url_for('static', filename='tiny.js')
+
+        response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+        print(dict(response.headers))
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(response.data).decode() == CSS
+        assert 'immutable' in response.headers['Cache-Control']
+        assert 'max-age=31536000' in response.headers['Cache-Control']
+        assert 'Accept-Encoding' in response.headers['Vary']
+        assert response.headers['Content-Type'].startswith('text/css')
+
+        again = client.get(url, headers={'Accept-Encoding': 'gzip', 'If-None-Match': response.headers['ETag']})
+        assert again.status_code == 304
+
+        plain = client.get(url)
+        assert 'Content-Encoding' not in plain.headers
+        assert plain.data.decode() == CSS
+        assert plain.headers['ETag'] != response.headers['ETag']
+
+        # Too small to compress, but still fingerprinted and immutable
+        small = client.get(tiny, headers={'Accept-Encoding': 'gzip'})
+        assert 'Content-Encoding' not in small.headers and 'immutable' in small.headers['Cache-Control']
+
+        # Plain names still work through Flask's static handler
+        fallback = client.get('/static/css/site.css')
+        assert fallback.status_code == 200 and 'immutable' not in fallback.headers.get('Cache-Control', '')
+        assert client.get('/static/css/site.0000000000.css').status_code == 404
+
+if __name__ == "__main__":
+    test_fingerprinted_urls()
+    test_precompressed_and_immutable()
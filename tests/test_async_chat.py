@@ -0,0 +1,185 @@
+"""
+Test Async Chat - Verify the ASGI /chat path multiplexes concurrent agent calls
+"""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app import create_app
+from app.asgi import ChatASGIApp
+from app.bedrock_client import bedrock_client
+from app.cache import response_cache
+
+async def post(asgi_app, path, payload, cookie=None):
+    """Drive one POST through the ASGI app and return every message it sent"""
+    headers = [(b'content-type', b'application/json')]
+    if cookie:
+        headers.append((b'cookie', cookie.encode()))
+    scope = {'type': 'http', 'method': 'POST', 'path': path, 'headers': headers}
+    body = json.dumps(payload).encode()
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        sent.append(message)
+
+    await asgi_app(scope, receive, send)
+    return sent
+
+async def call_chat(asgi_app, payload, cookie=None):
+    """Drive one POST /chat through the ASGI app and return (status, headers, json)"""
+    sent = await post(asgi_app, '/chat', payload, cookie)
+    start = sent[0]
+    return start['status'], dict(start['headers']), json.loads(sent[1]['body'])
+
+def test_concurrent_async_chat():
+    """50 slow agent calls finish in about the time of one"""
+    print("\n" + "="*60)
+    print("TEST 1: CONCURRENT ASYNC CHAT")
+    print("="*60)
+
+    def slow_chat(user_message, session_id=None, metadata_filter=None, **kwargs):
+        time.sleep(0.2)
+        return f"answer for {session_id}"
+
+    original_chat = bedrock_client.chat
+    bedrock_client.chat = slow_chat
+    response_cache.clear()
+    asgi_app = ChatASGIApp(create_app())
+    try:
+        async def run():
+            return await asyncio.gather(*[
+                call_chat(asgi_app, {'message': f'question number {i}'}) for i in range(50)
+            ])
+        started = time.perf_counter()
+        results = asyncio.run(run())
+        elapsed = time.perf_counter() - started
+        print(f"50 requests in {elapsed:.2f}s")
+
+        assert all(status == 200 for status, _, _ in results)
+        assert elapsed < 2.0
+    finally:
+        bedrock_client.chat = original_chat
+        response_cache.clear()
+
+def test_async_chat_keeps_bedrock_session():
+    """The Bedrock session id is stored in the Flask session cookie and reused"""
+    print("\n" + "="*60)
+    print("TEST 2: SESSION COOKIE")
+    print("="*60)
+
+    seen_sessions = []
+    def fake_chat(user_message, session_id=None, metadata_filter=None, **kwargs):
+        seen_sessions.append(session_id)
+        return "ok"
+
+    original_chat = bedrock_client.chat
+    bedrock_client.chat = fake_chat
+    asgi_app = ChatASGIApp(create_app())
+    try:
+        status, headers, _ = asyncio.run(call_chat(asgi_app, {'message': 'Tell me more about it'}))
+        cookie = headers[b'set-cookie'].decode().split(';')[0]
+        print(f"Cookie: {cookie}")
+        asyncio.run(call_chat(asgi_app, {'message': 'And what about the fees then?'}, cookie))
+
+        assert status == 200
+        assert len(seen_sessions) == 2
+        assert seen_sessions[0] == seen_sessions[1]
+    finally:
+        bedrock_client.chat = original_chat
+
+def test_async_chat_stream():
+    """/chat/stream is served on the event loop, one body event per piece"""
+    print("\n" + "="*60)
+    print("TEST 3: ASYNC CHAT STREAM")
+    print("="*60)
+
+    def slow_stream(user_message, session_id=None, metadata_filter=None, **kwargs):
+        for piece in ("Admissions ", "open ", "in Shrawan."):
+            time.sleep(0.1)
+            yield piece
+
+    original_stream = bedrock_client.chat_stream
+    bedrock_client.chat_stream = slow_stream
+    response_cache.clear()
+    asgi_app = ChatASGIApp(create_app())
+    try:
+        async def run():
+            return await asyncio.gather(*[
+                post(asgi_app, '/chat/stream', {'message': f'stream question number {i}'}) for i in range(30)
+            ])
+        started = time.perf_counter()
+        results = asyncio.run(run())
+        elapsed = time.perf_counter() - started
+        print(f"30 streams in {elapsed:.2f}s")
+        assert elapsed < 2.0
+
+        start, *bodies = results[0]
+        headers = dict(start['headers'])
+        assert start['status'] == 200 and headers[b'content-type'] == b'text/event-stream'
+        assert b'set-cookie' in headers
+        deltas = [json.loads(b['body'].decode()[len('data: '):])['delta'] for b in bodies[:-1]]
+        print(deltas)
+        assert deltas == ["Admissions ", "open ", "in Shrawan."]
+        assert all(b['more_body'] for b in bodies[:-1])
+        assert bodies[-1]['body'].startswith(b'event: done') and not bodies[-1].get('more_body')
+
+        # Missing message: same 400 as the Flask route
+        assert asyncio.run(post(asgi_app, '/chat/stream', {}))[0]['status'] == 400
+    finally:
+        bedrock_client.chat_stream = original_stream
+        response_cache.clear()
+
+def test_identical_streams_share_one_answer():
+    """Identical streamed questions wait on the event loop, not in the executor threads the leader needs"""
+    print("\n" + "="*60)
+    print("TEST 4: IDENTICAL STREAMS")
+    print("="*60)
+
+    calls = []
+    def slow_stream(user_message, session_id=None, metadata_filter=None, **kwargs):
+        calls.append(user_message)
+        for piece in ("Admissions ", "open ", "in Shrawan."):
+            time.sleep(0.1)
+            yield piece
+
+    original_stream = bedrock_client.chat_stream
+    original_executor = bedrock_client._async_executor
+    bedrock_client.chat_stream = slow_stream
+    bedrock_client._async_executor = ThreadPoolExecutor(max_workers=4)  # Far fewer threads than requests
+    response_cache.clear()
+    asgi_app = ChatASGIApp(create_app())
+    try:
+        async def run():
+            return await asyncio.wait_for(asyncio.gather(*[
+                post(asgi_app, '/chat/stream', {'message': 'When do admissions open for the next intake?'})
+                for _ in range(40)
+            ]), 10)
+        started = time.perf_counter()
+        results = asyncio.run(run())
+        elapsed = time.perf_counter() - started
+        print(f"40 identical streams in {elapsed:.2f}s, {len(calls)} agent call(s)")
+
+        assert len(calls) == 1
+        assert elapsed < 2.0
+        for start, *bodies in results:
+            answer = "".join(json.loads(b['body'].decode()[len('data: '):])['delta'] for b in bodies[:-1])
+            assert start['status'] == 200 and answer == "Admissions open in Shrawan."
+        assert asgi_app._streams == {}
+    finally:
+        bedrock_client._async_executor.shutdown(wait=False)
+        bedrock_client._async_executor = original_executor
+        bedrock_client.chat_stream = original_stream
+        response_cache.clear()
+
+if __name__ == "__main__":
+    test_concurrent_async_chat()
+    test_async_chat_keeps_bedrock_session()
+    test_async_chat_stream()
+    test_identical_streams_share_one_answer()
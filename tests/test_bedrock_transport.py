@@ -0,0 +1,130 @@
+"""
+Test Bedrock Transport - Verify retries, throttling messages and the circuit breaker
+"""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from botocore.exceptions import EventStreamError
+from app.bedrock_client import BedrockClient, is_error_response
+from app.bedrock_transport import CircuitBreaker, build_client_config
+
+def throttled_stream():
+    raise EventStreamError({'Error': {'Code': 'throttlingException', 'Message': 'Rate exceeded'}}, 'InvokeAgent')
+    yield  # pragma: no cover - makes this a generator
+
+class FlakyAgentRuntime:
+    """Throttles the first `failures` event streams, then answers"""
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    def invoke_agent(self, **params):
+        self.calls += 1
+        if self.calls <= self.failures:
+            return {'completion': throttled_stream()}
+        return {'completion': [{'chunk': {'bytes': b'Hello from PKonnect'}}]}
+
+class ChunkedAgentRuntime:
+    """Answers with the given chunks"""
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def invoke_agent(self, **params):
+        return {'completion': iter([{'chunk': {'bytes': chunk}} for chunk in self.chunks])}
+
+def make_client(agent):
+    client = BedrockClient()
+    client.bedrock_agent = agent
+    client.retry_base_delay = 0
+    client.max_attempts = 3
+    client.breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    return client
+
+def test_client_config():
+    """The boto3 client gets an explicit pool, timeouts and adaptive retries"""
+    config = build_client_config()
+    print(f"Config: pool={config.max_pool_connections} retries={config.retries}")
+    assert config.max_pool_connections >= 10
+    assert config.retries['mode'] == 'adaptive'
+    assert config.read_timeout and config.connect_timeout
+
+def test_stream_throttling_is_retried():
+    """A throttled event stream is retried before any text is sent"""
+    print("\n" + "="*60)
+    print("TEST 1: THROTTLING RETRY")
+    print("="*60)
+
+    agent = FlakyAgentRuntime(failures=2)
+    client = make_client(agent)
+    response = client.chat("hello")
+    print(f"Response after {agent.calls} calls: {response}")
+    assert response == "Hello from PKonnect"
+    assert agent.calls == 3
+
+def test_persistent_throttling_message():
+    """Throttling that outlasts the retries gets its own message, not the generic error"""
+    client = make_client(FlakyAgentRuntime(failures=10))
+    response = client.chat("hello")
+    print(f"Response: {response}")
+    assert response.startswith("PKonnect is busy")
+    assert is_error_response(response)
+
+def test_circuit_breaker_fails_fast():
+    """After repeated failures the breaker opens and calls stop reaching Bedrock"""
+    print("\n" + "="*60)
+    print("TEST 2: CIRCUIT BREAKER")
+    print("="*60)
+
+    agent = FlakyAgentRuntime(failures=100)
+    client = make_client(agent)
+    client.chat("hello")  # 3 throttled attempts -> breaker opens
+    calls = agent.calls
+    response = client.chat("hello")
+    print(f"Breaker state: {client.breaker.state}, response: {response}")
+    assert client.breaker.state == CircuitBreaker.OPEN
+    assert agent.calls == calls
+    assert response.startswith("PKonnect is temporarily unavailable")
+
+def test_breaker_half_open_recovery():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=lambda: now[0])
+    breaker.record_failure()
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    now[0] = 11
+    assert breaker.allow()       # one trial call
+    assert not breaker.allow()   # ...and only one
+    breaker.release()            # abandoned without an outcome: the next call is the trial
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+def test_abandoned_half_open_stream():
+    """A half-open trial stream closed by a disconnecting client frees the trial slot"""
+    print("\n" + "="*60)
+    print("TEST 4: ABANDONED HALF-OPEN STREAM")
+    print("="*60)
+
+    now = [0.0]
+    client = make_client(ChunkedAgentRuntime([b'Hello ', b'again']))
+    client.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+    client.breaker.record_failure()
+    now[0] = 11.0
+    stream = client.chat_stream("hello")
+    assert 'Hello again'.startswith(next(stream))
+    stream.close()  # The /chat/stream client disconnected during the trial call
+    print(f"Breaker after the abandoned trial: {client.breaker.state}")
+    assert client.breaker.state == CircuitBreaker.CLOSED
+    assert client.chat("hello") == "Hello again"
+
+if __name__ == "__main__":
+    test_client_config()
+    test_stream_throttling_is_retried()
+    test_persistent_throttling_message()
+    test_circuit_breaker_fails_fast()
+    test_breaker_half_open_recovery()
+    test_abandoned_half_open_stream()
@@ -0,0 +1,31 @@
+"""
+Test Benchmark Harness - Keep scripts/bench_chat.py working against the fake Bedrock agent
+"""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.bedrock_client import bedrock_client
+from scripts.bench_chat import run_benchmark
+from scripts.fake_bedrock import FakeBedrockAgentRuntime
+
+def test_benchmark_reports_latency_and_stages():
+    """A small run reports percentiles and a per-stage breakdown"""
+    print("\n" + "="*60)
+    print("TEST 1: BENCHMARK HARNESS")
+    print("="*60)
+
+    original_agent = bedrock_client.bedrock_agent
+    runtime = FakeBedrockAgentRuntime(first_chunk_delay=0.01, chunk_delay=0.001, seed=1)
+    results = run_benchmark(requests=24, concurrency=4, endpoint='/chat/stream', unique=True, runtime=runtime)
+    print(results)
+
+    assert bedrock_client.bedrock_agent is original_agent  # fake removed again
+    assert results['errors'] == 0
+    assert results['latency_ms'][50] <= results['latency_ms'][99]
+    assert results['agent_calls'] > 0
+    for stage in ('session', 'prompt', 'agent_call', 'format', 'local_lookup'):
+        assert stage in results['stages_ms'], stage
+
+if __name__ == "__main__":
+    test_benchmark_reports_latency_and_stages()
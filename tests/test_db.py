@@ -0,0 +1,114 @@
+"""
+Test Database Layer - Verify pooled per-thread WAL connections and transactions
+"""
+import sys
+import os
+import sqlite3
+import tempfile
+import threading
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.db import MIGRATIONS, Database, init_db, migrate, user_cache, verify_user
+
+def test_connections_are_pooled_per_thread():
+    """A thread reuses its connection; other threads get their own"""
+    print("\n" + "="*60)
+    print("TEST 1: PER-THREAD POOL")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        db = Database(os.path.join(directory, 'test.db'))
+        conn = db.connection()
+        assert db.connection() is conn
+        assert db.fetchone('PRAGMA journal_mode')[0] == 'wal'
+        assert db.fetchone('PRAGMA busy_timeout')[0] == int(db.busy_timeout * 1000)
+
+        others = []
+        thread = threading.Thread(target=lambda: others.append(db.connection()))
+        thread.start()
+        thread.join()
+        assert others[0] is not conn
+        db.close_all()
+
+def test_transactions():
+    """transaction() commits on success, rolls back on error, and nests"""
+    with tempfile.TemporaryDirectory() as directory:
+        db = Database(os.path.join(directory, 'test.db'))
+        with db.transaction() as conn:
+            conn.execute('CREATE TABLE items (name TEXT UNIQUE)')
+            conn.execute("INSERT INTO items VALUES ('a')")
+
+        try:
+            with db.transaction() as conn:
+                conn.execute("INSERT INTO items VALUES ('b')")
+                with db.transaction() as inner:
+                    inner.execute("INSERT INTO items VALUES ('a')")  # UNIQUE violation
+        except sqlite3.IntegrityError:
+            pass
+        assert db.fetchall('SELECT name FROM items') == [('a',)]
+
+        db.executemany('INSERT INTO items VALUES (?)', [('c',), ('d',)])
+        assert db.fetchone('SELECT COUNT(*) FROM items')[0] == 3
+        db.close_all()
+
+def test_migrations():
+    """migrate() runs each step once and records the version"""
+    print("\n" + "="*60)
+    print("TEST 2: SCHEMA MIGRATIONS")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        db = Database(os.path.join(directory, 'test.db'))
+        assert db.fetchone('PRAGMA user_version')[0] == 0
+        assert migrate(db) == len(MIGRATIONS)
+        assert db.fetchone('PRAGMA user_version')[0] == len(MIGRATIONS)
+        indexes = {row[1] for row in db.fetchall('PRAGMA index_list(users)')}
+        assert 'idx_users_department_role' in indexes
+
+        assert db.fetchone("SELECT COUNT(*) FROM users WHERE email LIKE '%@pkonnect.edu.np'")[0] == 4
+
+        # A second run is a no-op
+        db.execute("INSERT INTO users (email, password_hash, role, department) VALUES ('A@x.np', 'h', 'student', 'BIT')")
+        db.execute("DELETE FROM users WHERE email = 'student1@pkonnect.edu.np'")
+        migrate(db)
+        assert db.fetchone("SELECT email FROM users WHERE lower(email) = 'a@x.np'")[0] == 'A@x.np'
+        assert db.fetchone("SELECT COUNT(*) FROM users WHERE email = 'student1@pkonnect.edu.np'")[0] == 0
+        db.close_all()
+
+def test_verify_user():
+    """Logins look the user up by email and check role, department and password"""
+    print("\n" + "="*60)
+    print("TEST 3: VERIFY USER")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        db = Database(os.path.join(directory, 'test.db'))
+        init_db(db)
+        user_cache.clear()
+        email = 'student1@pkonnect.edu.np'
+
+        user = verify_user(email, 'password123', 'student', 'BSC CSIT', database=db)
+        assert user['email'] == email and user['role'] == 'student'
+        assert user.get('full_name') is None
+        try:
+            user['role'] = 'teacher'
+            assert False, "user records are read-only"
+        except TypeError:
+            pass
+
+        # Cached: the same record comes back without another query
+        db.close_all()
+        assert verify_user(' Student1@PKonnect.edu.np', 'password123', 'student', 'BSC CSIT', database=db) is user
+
+        assert verify_user(email, 'wrong', 'student', 'BSC CSIT', database=db) is None
+        assert verify_user(email, 'password123', 'teacher', 'BSC CSIT', database=db) is None
+        assert verify_user(email, 'password123', 'student', 'BIT', database=db) is None
+        assert verify_user('nobody@pkonnect.edu.np', 'password123', 'student', 'BIT', database=db) is None
+        user_cache.clear()
+        db.close_all()
+
+if __name__ == "__main__":
+    test_connections_are_pooled_per_thread()
+    test_transactions()
+    test_migrations()
+    test_verify_user()
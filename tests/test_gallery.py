@@ -0,0 +1,111 @@
+"""
+Test Gallery - Verify resized photo generation, the cached manifest and /gallery.json
+"""
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app
+from app import gallery as gallery_module
+from app.gallery import Gallery, Image
+
+def _make_photos(static_dir, sizes):
+    source = os.path.join(static_dir, 'img', 'photos')
+    os.makedirs(source)
+    for index, size in enumerate(sizes):
+        Image.new('RGB', size, (200, 40 * index, 40)).save(os.path.join(source, f'photo{index}.jpg'))
+    return source
+
+def test_derivatives_and_manifest():
+    """Photos get srcset copies (never upscaled), and a rebuild reuses what is on disk"""
+    print("\n" + "="*60)
+    print("TEST 1: DERIVATIVES AND MANIFEST")
+    print("="*60)
+
+    if Image is None:
+        print("Pillow not installed, skipping")
+        return
+
+    with tempfile.TemporaryDirectory() as static_dir:
+        source = _make_photos(static_dir, [(2000, 1500), (500, 400)])
+        cache = os.path.join(static_dir, 'img', '.gallery')
+        gallery = Gallery(source, cache, widths=[320, 640, 1280], full_width=1600, static_dir=static_dir)
+
+        photos = gallery.manifest()
+        print(photos)
+        big, small = photos
+        assert [width for _, width in big['srcset']] == [320, 640, 1280, 1600]
+        assert big['thumb'].startswith('img/.gallery/') and big['thumb'].endswith('-320w-q60.webp')
+        assert big['full'].endswith('-1600w-q82.webp')
+        assert (big['width'], big['height']) == (2000, 1500)
+        assert [width for _, width in small['srcset']] == [320, 500]
+        with Image.open(os.path.join(static_dir, small['full'])) as full:
+            assert full.size == (500, 400)
+
+        # A new process loads the saved manifest instead of processing the photos again
+        generated = sorted(os.listdir(cache))
+        again = Gallery(source, cache, widths=[320, 640, 1280], full_width=1600, static_dir=static_dir)
+        assert again.manifest() == photos
+        assert sorted(os.listdir(cache)) == generated
+        etag = again.etag
+
+        # Adding a photo rebuilds the manifest (and changes the ETag)
+        Image.new('RGB', (800, 600)).save(os.path.join(source, 'photo9.png'))
+        assert len(again.manifest()) == 3
+        assert again.etag != etag
+
+def test_without_pillow():
+    """Without Pillow the manifest lists the originals"""
+    print("\n" + "="*60)
+    print("TEST 2: NO PILLOW")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as static_dir:
+        source = os.path.join(static_dir, 'img', 'photos')
+        os.makedirs(source)
+        open(os.path.join(source, 'a.webp'), 'wb').close()
+        open(os.path.join(source, 'notes.txt'), 'w').close()
+
+        original = gallery_module.Image
+        gallery_module.Image = None
+        try:
+            photos = Gallery(source, os.path.join(static_dir, 'cache'), static_dir=static_dir).manifest()
+        finally:
+            gallery_module.Image = original
+        assert photos == [{'name': 'a.webp', 'width': None, 'height': None, 'thumb': 'img/photos/a.webp',
+                           'srcset': [], 'full': 'img/photos/a.webp'}]
+
+def test_gallery_endpoint():
+    """/gallery.json serves static URLs with an ETag"""
+    print("\n" + "="*60)
+    print("TEST 3: GALLERY ENDPOINT")
+    print("="*60)
+
+    if Image is None:
+        print("Pillow not installed, skipping")
+        return
+
+    with tempfile.TemporaryDirectory() as static_dir:
+        source = _make_photos(static_dir, [(900, 600)])
+        test_gallery = Gallery(source, os.path.join(static_dir, 'img', '.gallery'), widths=[320],
+                               full_width=800, static_dir=static_dir)
+        client = create_app().test_client()
+        from app import routes
+        original = routes.gallery
+        routes.gallery = test_gallery
+        try:
+            response = client.get('/gallery.json')
+            photo = response.get_json()['photos'][0]
+            print(photo)
+            assert photo['src'].startswith('/static/img/.gallery/')
+            assert photo['srcset'].endswith(' 800w') and ' 320w, ' in photo['srcset']
+            assert response.headers['ETag']
+            assert client.get('/gallery.json', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+        finally:
+            routes.gallery = original
+
+if __name__ == "__main__":
+    test_derivatives_and_manifest()
+    test_without_pillow()
+    test_gallery_endpoint()
@@ -0,0 +1,140 @@
+"""
+Test Conversation History - Verify turns are stored off the request path and paged back
+"""
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app
+from app.bedrock_client import bedrock_client
+from app.history import HistoryStore, history_store
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+    def __call__(self):
+        self.now += 1
+        return self.now
+
+def make_store(directory, **kwargs):
+    return HistoryStore(path=os.path.join(directory, 'history.db'), clock=FakeClock(), **kwargs)
+
+def test_ring_buffer_and_disk():
+    """Recent turns come from memory; a fresh store reads the same turns from disk"""
+    print("\n" + "="*60)
+    print("TEST 1: RING BUFFER + WAL STORE")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = make_store(directory, ring_size=3)
+        for i in range(5):
+            store.record('session-a', f'question {i}', f'answer {i}')
+        store.record('session-b', 'other', 'other answer')
+
+        entries, _ = store.get('session-a', limit=3)
+        assert [e.question for e in entries] == ['question 2', 'question 3', 'question 4']
+
+        store.flush()
+        print(f"Stats: {store.stats()}")
+        assert store.stats()['written'] == 6
+
+        cold = make_store(directory)
+        entries, next_before = cold.get('session-a', limit=4)
+        assert [e.question for e in entries] == ['question 1', 'question 2', 'question 3', 'question 4']
+        older, next_before = cold.get('session-a', limit=4, before=next_before)
+        assert [e.question for e in older] == ['question 0']
+        assert next_before is None
+
+def test_compaction():
+    """Compaction trims long conversations and expires old turns"""
+    with tempfile.TemporaryDirectory() as directory:
+        store = make_store(directory, max_turns=2, ttl_days=0)
+        for i in range(4):
+            store.record('session-a', f'question {i}', 'answer')
+        store.flush()
+        store.compact()
+
+        cold = make_store(directory)
+        entries, _ = cold.get('session-a', limit=10)
+        assert [e.question for e in entries] == ['question 2', 'question 3']
+
+        store.ttl = 1
+        store._clock.now += 10  # Every turn is now older than the TTL
+        store.compact()
+        assert make_store(directory).get('session-a', limit=10) == ([], None)
+
+def test_history_endpoint():
+    """/chat records the turn and /history returns it for the same session"""
+    print("\n" + "="*60)
+    print("TEST 3: /history")
+    print("="*60)
+
+    app = create_app()
+    client = app.test_client()
+    original_chat = bedrock_client.chat
+    bedrock_client.chat = lambda *args, **kwargs: "Padma Kanya is in Bagbazar."
+    try:
+        client.post('/chat', json={'message': 'Where exactly is the campus located?'})
+    finally:
+        bedrock_client.chat = original_chat
+
+    data = client.get('/history').get_json()
+    print(data)
+    assert data['history'][-1] == {
+        'question': 'Where exactly is the campus located?',
+        'answer': 'Padma Kanya is in Bagbazar.',
+        'timestamp': data['history'][-1]['timestamp'],
+    }
+    history_store.flush()
+
+    # A different browser session sees nothing
+    assert app.test_client().get('/history').get_json()['history'] == []
+
+def test_bootstrap_endpoint():
+    """/bootstrap returns login state, history and feature flags in one response"""
+    print("\n" + "="*60)
+    print("TEST 4: /bootstrap")
+    print("="*60)
+
+    app = create_app()
+    client = app.test_client()
+    guest = client.get('/bootstrap')
+    data = guest.get_json()
+    print(data)
+    assert data['logged_in'] is False and data['user_type'] == 'guest'
+    assert data['history'] == [] and 'streaming' in data['features']
+    assert 'private' in guest.headers['Cache-Control']
+
+    with client.session_transaction() as session:
+        session.update({'is_student': True, 'user_type': 'student', 'role': 'student',
+                        'department': 'BIT', 'user_name': 'Asha', 'bedrock_session_id': 'bootstrap-test'})
+    history_store.record('bootstrap-test', 'Who teaches DBMS?', 'Ram Sir teaches DBMS.')
+
+    response = client.get('/bootstrap')
+    data = response.get_json()
+    assert data['logged_in'] is True and data['department'] == 'BIT' and data['full_name'] == 'Asha'
+    assert data['history'][-1]['answer'] == 'Ram Sir teaches DBMS.'
+    assert client.get('/check-login-status').get_json()['full_name'] == 'Asha'
+
+    # Unchanged state: 304; a new turn changes the ETag
+    assert client.get('/bootstrap', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+    history_store.record('bootstrap-test', 'And Java?', 'Sita Miss teaches Java.')
+    assert client.get('/bootstrap', headers={'If-None-Match': response.headers['ETag']}).status_code == 200
+    history_store.flush()
+
+def test_tests_use_temporary_history():
+    """Under pytest, history is recorded in a temporary database (tests/conftest.py), not the repo's history.db"""
+    print("\n" + "="*60)
+    print("TEST 5: TEMPORARY HISTORY DATABASE")
+    print("="*60)
+
+    repo = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    print(history_store.path)
+    assert not os.path.abspath(history_store.path).startswith(repo + os.sep)
+
+if __name__ == "__main__":
+    test_ring_buffer_and_disk()
+    test_compaction()
+    test_history_endpoint()
+    test_bootstrap_endpoint()
@@ -0,0 +1,85 @@
+"""
+Test User Import - Verify bulk CSV/XLSX import with upserts and skipped rows
+"""
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.db import Database, user_cache, verify_user
+from utils.import_users import import_users
+
+CSV = """Email,Password,Role,Department,Name
+a1@pkonnect.edu.np,pass-a1,student,BIT,Asha One
+a2@pkonnect.edu.np,pass-a2,,BIT,
+not-an-email,pass,student,BIT,
+T1@PKonnect.edu.np,pass-t1,teacher,BSC CSIT,Tara Teacher
+a3@pkonnect.edu.np,,student,BIT,
+"""
+
+def _login(db, email, password, role, department):
+    user_cache.clear()
+    return verify_user(email, password, role, department, database=db)
+
+def test_csv_import_and_upsert():
+    """Rows are inserted in chunks, invalid ones skipped, re-imports update"""
+    print("\n" + "="*60)
+    print("TEST 1: CSV IMPORT")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        db = Database(os.path.join(directory, 'test.db'))
+        path = os.path.join(directory, 'users.csv')
+        with open(path, 'w') as f:
+            f.write(CSV)
+
+        messages = []
+        stats = import_users(path, database=db, chunk_size=2, workers=2, role='student', progress=messages.append)
+        print(stats)
+        print('\n'.join(messages))
+        assert (stats['inserted'], stats['updated'], stats['skipped']) == (3, 0, 2)
+        assert any('not-an-email' in message for message in messages)
+        assert _login(db, 'a2@pkonnect.edu.np', 'pass-a2', 'student', 'BIT')
+        teacher = _login(db, 't1@pkonnect.edu.np', 'pass-t1', 'teacher', 'BSC CSIT')
+        assert teacher['full_name'] == 'Tara Teacher'
+
+        # Re-import: existing users are updated, --keep-passwords leaves their passwords alone
+        with open(path, 'w') as f:
+            f.write("email,department,password\na1@pkonnect.edu.np,BSC CSIT,new-a1\na4@pkonnect.edu.np,BIT,\n")
+        stats = import_users(path, database=db, role='student', default_password='welcome',
+                             keep_passwords=True, progress=messages.append)
+        assert (stats['inserted'], stats['updated'], stats['skipped']) == (1, 1, 0)
+        user = _login(db, 'a1@pkonnect.edu.np', 'pass-a1', 'student', 'BSC CSIT')
+        assert user and user['full_name'] == 'Asha One'
+        assert _login(db, 'a4@pkonnect.edu.np', 'welcome', 'student', 'BIT')
+        user_cache.clear()
+        db.close_all()
+
+def test_xlsx_import():
+    """Spreadsheets are read the same way"""
+    print("\n" + "="*60)
+    print("TEST 2: XLSX IMPORT")
+    print("="*60)
+
+    from openpyxl import Workbook
+
+    with tempfile.TemporaryDirectory() as directory:
+        db = Database(os.path.join(directory, 'test.db'))
+        path = os.path.join(directory, 'batch.xlsx')
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(['Email', 'Student Name'])
+        sheet.append(['x1@pkonnect.edu.np', 'Xenia'])
+        sheet.append(['x2@pkonnect.edu.np', None])
+        workbook.save(path)
+
+        stats = import_users(path, database=db, role='student', department='BSC CSIT',
+                             default_password='welcome', progress=lambda message: None)
+        assert stats['inserted'] == 2
+        assert _login(db, 'x1@pkonnect.edu.np', 'welcome', 'student', 'BSC CSIT')['full_name'] == 'Xenia'
+        user_cache.clear()
+        db.close_all()
+
+if __name__ == "__main__":
+    test_csv_import_and_upsert()
+    test_xlsx_import()
@@ -0,0 +1,73 @@
+"""
+Test Intent Engine - Verify scored intents and entities from the compiled classifier
+"""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.intent import classify, classify_many
+
+def test_intents_and_synonyms():
+    """Stems, synonyms and romanized Nepali map to the same intents"""
+    print("\n" + "="*60)
+    print("TEST 1: INTENTS")
+    print("="*60)
+
+    cases = {
+        "Who teaches Data Structure?": "teacher_info",
+        "Which guru takes DBMS?": "teacher_info",
+        "shikshak ko naam": "teacher_info",
+        "BIT ko bharna kahile khulcha?": "admission_info",
+        "Am I eligible to apply for BSc CSIT?": "admission_info",
+        "3rd semester ko natija": "exam_result",
+        "What is my CGPA?": "exam_result",
+        "teachers ko talab kati ho?": "confidential_finance",
+        "bidyarthi ko phone number": "student_contact",
+        "Give me classmates' emails": "student_contact",
+        "Did I miss the deadline?": "general",
+        "Where is the library?": "general",
+        "Please upgrade the wifi": "general",       # "grade" only counts as a word
+    }
+    for message, intent in cases.items():
+        result = classify(message)
+        print(f"{message!r:<45} -> {result.intent} {result.scores}")
+        assert result.intent == intent, message
+
+def test_scores_rank_intents():
+    """Scores are shares of the matched words; ties keep the old precedence"""
+    result = classify("What is the teacher salary?")
+    assert result.intent == "confidential_finance"
+    assert result.scores == {"confidential_finance": 0.5, "teacher_info": 0.5}
+
+    result = classify("marks, grades and results for admission")
+    assert result.intent == "exam_result"
+    assert list(result.scores) == ["exam_result", "admission_info"]
+    assert result.scores["exam_result"] == 0.75
+
+def test_entities():
+    """Departments, semesters and people are extracted in the same pass"""
+    print("\n" + "="*60)
+    print("TEST 3: ENTITIES")
+    print("="*60)
+
+    result = classify("Who teaches DBMS in 3rd semester B.Sc. CSIT?")
+    print(result.entities)
+    assert result.entities == {'departments': ['BSC CSIT'], 'semesters': [3], 'people': []}
+
+    assert classify("1st to 3rd sem students of BIT").entities['semesters'] == [1, 2, 3]
+    assert classify("I know a bit about it").entities['departments'] == []
+
+    assert classify("Email of Prof. Susmita Talukdar").entities['people'] == ['Susmita Talukdar']
+    result = classify("What does Ram Sharma sir teach?")
+    assert result.entities['people'] == ['Ram Sharma']
+    assert result.intent == 'teacher_info'
+
+def test_batch_classification():
+    messages = ["Hello", "Who teaches DBMS?", "When is admission?"]
+    assert [r.intent for r in classify_many(messages)] == ['general', 'teacher_info', 'admission_info']
+
+if __name__ == "__main__":
+    test_intents_and_synonyms()
+    test_scores_rank_intents()
+    test_entities()
+    test_batch_classification()
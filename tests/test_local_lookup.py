@@ -0,0 +1,161 @@
+"""
+Test Local Lookup - Verify teaching-assignment questions are answered from local data
+"""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app
+from app.bedrock_client import bedrock_client
+from app.bedrock_proxy import query_bedrock
+from app.dataloader import DataStore, SearchIndex, load_department_data, search_data
+import shutil
+import tempfile
+from app.local_lookup import LocalLookup
+from app.query_filter import QueryFilter, parse_semesters
+
+lookup = LocalLookup()
+lookup.load()
+
+def test_structured_questions():
+    """Subject, semester and teacher questions are answered without Bedrock"""
+    print("\n" + "="*60)
+    print("TEST 1: STRUCTURED QUESTIONS")
+    print("="*60)
+
+    answer = lookup.answer("Who teaches Data Structure in 3rd semester?", "student", "BSC CSIT")
+    print(answer)
+    assert "Ramesh Singh Saud" in answer
+    assert "Semester 3" in answer
+
+    answer = lookup.answer("teachers of first semester BIT")
+    print(answer)
+    assert answer.startswith("BIT:")
+    assert "Digital Logic - Sudip Raj Khadka" in answer
+    assert "Semester 2" not in answer
+
+    answer = lookup.answer("What does Sagar KC teach?")
+    print(answer)
+    assert "Web Technology" in answer and "BIT:" in answer and "BSC CSIT:" in answer
+
+def test_falls_back_to_agent():
+    """General, private or unknown questions return None so Bedrock answers them"""
+    print("\n" + "="*60)
+    print("TEST 2: FALLBACK")
+    print("="*60)
+
+    for query in [
+        "Tell me about Padma Kanya College",
+        "Give me the phone number of teacher Ramesh Singh Saud",
+        "Who teaches cooking?",
+        "Who teaches Physics in 8th semester?",
+        # They name a subject or semester, but aren't about who teaches it
+        "What are my marks in the subject Data Structure?",
+        "What is the exam routine for 2nd semester subjects?",
+        "Which subject has the most marks in 3rd semester?",
+        "What subjects are in the 3rd semester syllabus?",
+        "Who teaches in the 2nd semester exam schedule?",
+        # A subject, name or criterion the tables don't have isn't dropped
+        "Who teaches DBMS in 3rd semester?",
+        "Does Hari Bahadur teach in 3rd semester?",
+        "Which teacher is best in 3rd semester?",
+    ]:
+        print(f"📝 {query}")
+        assert lookup.answer(query) is None
+
+def test_query_bedrock_skips_agent():
+    """query_bedrock returns the local answer without calling the agent"""
+    calls = []
+    original_chat = bedrock_client.chat
+    bedrock_client.chat = lambda *args, **kwargs: calls.append(args) or "agent answer"
+    app = create_app()
+    try:
+        with app.test_request_context():
+            response = query_bedrock("Who teaches C Programming?", "student", "BSC CSIT")
+    finally:
+        bedrock_client.chat = original_chat
+    print(response)
+    assert calls == []
+    assert "Anuj Shrestha" in response
+
+def test_query_filter():
+    """Semester, department and designation constraints are parsed once and combined"""
+    print("\n" + "="*60)
+    print("TEST 3: QUERY FILTER")
+    print("="*60)
+
+    assert parse_semesters("teachers of 8th semester") == [8]
+    assert parse_semesters("1st and 2nd semester") == [1, 2]
+    assert parse_semesters("first to third sem") == [1, 2, 3]
+    assert parse_semesters("semester 5") == [5]
+    assert parse_semesters("who is the first teacher") == []
+
+    query_filter = QueryFilter.parse("lecturers of seventh semester bit")
+    print(query_filter)
+    assert query_filter.semesters == [7]
+    assert query_filter.departments == ['BIT']
+    assert query_filter.designations == ['lecturer']
+    assert QueryFilter.parse("b sc csit and bit teachers").departments == ['BSC CSIT', 'BIT']
+    assert QueryFilter.parse("can a bit of help who teaches in 2nd semester").departments == []
+
+    answer = lookup.answer("Which lecturers teach in the 7th and 8th semester of BIT?")
+    print(answer)
+    assert "Semester 7" in answer and "Semester 8" in answer and "Semester 5" not in answer
+
+def test_search_data_index():
+    """search_data ranks name matches first and de-duplicates deterministically"""
+    print("\n" + "="*60)
+    print("TEST 4: SEARCH_DATA INDEX")
+    print("="*60)
+
+    data = load_department_data('BSC CSIT')
+    index = SearchIndex(data)
+
+    rows = search_data(data, ['saud'], "Who is Ramesh Singh Saud?", index=index)
+    print([(r['name_of_teacher'], r['subject']) for r in rows])
+    assert rows and all(r['name_of_teacher'] == 'Ramesh Singh Saud' for r in rows)
+
+    rows = search_data(data, ['program', 'java'], "program java", index=index)
+    print([(r['name_of_teacher'], r['subject']) for r in rows])
+    assert rows[0]['subject'] == 'Advanced Java Programming'  # matches both keywords
+    assert search_data(data, ['program', 'java'], "program java") == rows
+
+    rows = search_data(data, ['2nd', 'semester'], "", index=index, limit=50)
+    assert rows and all(r['semester'] == 2 for r in rows)
+    assert len(rows) == len({(r['name_of_teacher'], r['subject']) for r in rows})
+
+def test_data_store_snapshot_and_reload():
+    """Files are parsed once, snapshotted, and re-read when they change"""
+    print("\n" + "="*60)
+    print("TEST 5: DATA STORE")
+    print("="*60)
+
+    workdir = tempfile.mkdtemp()
+    try:
+        source = os.path.join(workdir, 'teachers.csv')
+        with open(source, 'w') as f:
+            f.write("name_of_teacher,subject,semester\nAnuj Shrestha,C Programming,1\n")
+
+        store = DataStore(snapshot_dir=os.path.join(workdir, 'cache'))
+        table = store.get_table(source)
+        assert store.get_table(source) is table
+        assert table.records() == [{'name_of_teacher': 'Anuj Shrestha', 'subject': 'C Programming', 'semester': 1}]
+        print(f"Snapshots: {os.listdir(os.path.join(workdir, 'cache'))}")
+
+        # A fresh store (new process) reads the snapshot and gets the same rows
+        assert DataStore(snapshot_dir=os.path.join(workdir, 'cache')).get_table(source).records() == table.records()
+
+        with open(source, 'a') as f:
+            f.write("Bimal Acharya,Statistics I,1\n")
+        os.utime(source, ns=(1, 1))
+        assert len(store.get_table(source)) == 2
+    finally:
+        shutil.rmtree(workdir)
+
+if __name__ == "__main__":
+    test_structured_questions()
+    test_falls_back_to_agent()
+    test_query_bedrock_skips_agent()
+    test_query_filter()
+    test_search_data_index()
+    test_data_store_snapshot_and_reload()
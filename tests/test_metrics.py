@@ -0,0 +1,84 @@
+"""
+Test Metrics - Verify chat timings are recorded and exposed on /metrics
+"""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app
+from app.bedrock_client import retrieved_reference_count
+from app.cache import response_cache
+from app.metrics import Registry, access_labels
+from scripts.fake_bedrock import FakeBedrockAgentRuntime, install
+
+def test_histogram_and_counter_rendering():
+    """Buckets are cumulative and labels are rendered in the Prometheus text format"""
+    print("\n" + "="*60)
+    print("TEST 1: EXPOSITION FORMAT")
+    print("="*60)
+
+    registry = Registry()
+    latency = registry.histogram('test_seconds', 'Latency', ('access_level',), buckets=(0.1, 1))
+    errors = registry.counter('test_errors', 'Errors', ('code',))
+    latency.labels('guest').observe(0.05)
+    latency.labels('guest').observe(0.5)
+    latency.labels('guest').observe(5)
+    errors.labels('Throttling"Exception').inc()
+
+    text = registry.render()
+    print(text)
+    assert '# TYPE test_seconds histogram' in text
+    assert 'test_seconds_bucket{access_level="guest",le="0.1"} 1' in text
+    assert 'test_seconds_bucket{access_level="guest",le="1"} 2' in text
+    assert 'test_seconds_bucket{access_level="guest",le="+Inf"} 3' in text
+    assert 'test_seconds_count{access_level="guest"} 3' in text
+    assert 'test_errors_total{code="Throttling\\"Exception"} 1' in text
+
+def test_access_labels_are_bounded():
+    """Guests share one series and unknown departments collapse to 'other'"""
+    assert access_labels('guest', 'BIT') == ('guest', 'none')
+    assert access_labels(None, None) == ('guest', 'none')
+    assert access_labels('student', 'BIT') == ('student', 'BIT')
+    assert access_labels('teacher', 'made up dept') == ('teacher', 'other')
+
+def test_trace_events_use_nested_shape():
+    """Retrieved references are read from the real trace.trace payload"""
+    event = {'trace': {'orchestrationTrace': {'observation': {
+        'knowledgeBaseLookupOutput': {'retrievedReferences': [{}, {}, {}]}}}}}
+    assert retrieved_reference_count(event) == 3
+    assert retrieved_reference_count({'trace': {'orchestrationTrace': {'rationale': {}}}}) is None
+
+def test_chat_records_stage_metrics():
+    """An agent answer records request time, first chunk, stream time and references"""
+    print("\n" + "="*60)
+    print("TEST 4: /metrics AFTER A CHAT")
+    print("="*60)
+
+    app = create_app()
+    response_cache.clear()
+    previous = install(FakeBedrockAgentRuntime(first_chunk_delay=0.01, chunk_delay=0, retrieved_refs=7))
+    try:
+        client = app.test_client()
+        reply = client.post('/chat', json={'message': 'What clubs does the college have?'})
+        assert reply.status_code == 200
+        client.post('/chat', json={'message': 'What clubs does the college have?'})
+    finally:
+        install(previous)
+        response_cache.clear()
+
+    text = client.get('/metrics').get_data(as_text=True)
+    lines = [line for line in text.splitlines() if 'access_level="guest"' in line]
+    print('\n'.join(lines[:5]))
+    assert any(line.startswith('pkonnect_chat_request_seconds_count') and 'source="agent"' in line for line in lines)
+    assert any(line.startswith('pkonnect_chat_request_seconds_count') and 'source="cache"' in line for line in lines)
+    assert any(line.startswith('pkonnect_response_cache_lookups_total') and 'result="hit"' in line for line in lines)
+    assert any(line.startswith('pkonnect_bedrock_first_chunk_seconds_count') for line in lines)
+    assert any(line.startswith('pkonnect_bedrock_stream_seconds_count') for line in lines)
+    assert any(line.startswith('pkonnect_bedrock_retrieved_references_bucket') and 'le="10"' in line
+               and not line.endswith(' 0') for line in lines)
+
+if __name__ == "__main__":
+    test_histogram_and_counter_rendering()
+    test_access_labels_are_bounded()
+    test_trace_events_use_nested_shape()
+    test_chat_records_stage_metrics()
@@ -0,0 +1,71 @@
+"""
+Test Page Cache - Verify anonymous pages are rendered once, revalidated with ETags and re-rendered on change
+"""
+import sys
+import os
+import gzip
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask
+
+from app import create_app
+from app.pages import PageCache
+
+def test_rendered_once_and_304():
+    """Repeat hits reuse the rendered bytes; a matching If-None-Match gets a 304"""
+    print("\n" + "="*60)
+    print("TEST 1: RENDER ONCE, 304 ON REVALIDATION")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        template = os.path.join(directory, 'page.html')
+        with open(template, 'w') as f:
+            f.write("<html>" + "<p>{{ 'hello' }}</p>" * 50 + "</html>")
+
+        app = Flask(__name__, template_folder=directory)
+        cache = PageCache()
+        app.add_url_rule('/', 'page', lambda: cache.response('page.html'))
+        client = app.test_client()
+
+        first = client.get('/', headers={'Accept-Encoding': 'gzip'})
+        print(dict(first.headers))
+        assert first.headers['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(first.data).decode().count('hello') == 50
+        assert first.headers['Cache-Control'] == 'no-cache'
+        assert 'Accept-Encoding' in first.headers['Vary']
+
+        plain = client.get('/')
+        assert b'hello' in plain.data and 'Content-Encoding' not in plain.headers
+        assert cache.renders == 1
+
+        # The gzip ETag also validates the plain representation
+        assert client.get('/', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+        assert client.get('/', headers={'If-None-Match': '"something-else"'}).status_code == 200
+
+        # Editing the template renders it again, with a new ETag
+        with open(template, 'w') as f:
+            f.write("<html><p>changed</p></html>")
+        stat = os.stat(template)
+        os.utime(template, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        changed = client.get('/', headers={'If-None-Match': plain.headers['ETag']})
+        assert changed.status_code == 200 and b'changed' in changed.data
+        assert changed.headers['ETag'] != plain.headers['ETag']
+        assert cache.renders == 2
+
+def test_app_pages():
+    """The landing, guest and chatbot pages come from the page cache"""
+    print("\n" + "="*60)
+    print("TEST 2: APP PAGES")
+    print("="*60)
+
+    client = create_app().test_client()
+    for url in ('/', '/guest', '/chatbot'):
+        response = client.get(url)
+        assert response.status_code == 200 and response.headers['ETag'], url
+        assert 'Set-Cookie' not in response.headers
+        assert client.get(url, headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+if __name__ == "__main__":
+    test_rendered_once_and_304()
+    test_app_pages()
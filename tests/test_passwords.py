@@ -0,0 +1,124 @@
+"""
+Test Password Hashing - Verify hash formats, rehash-on-login and the bounded password pool
+"""
+import sys
+import os
+import base64
+import hashlib
+import tempfile
+import threading
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app
+from app import routes
+from app.db import Database, migrate, user_cache, verify_user
+from app.passwords import PasswordPool, PasswordPoolBusy, hash_password, needs_rehash, verify_password
+
+def test_hash_formats():
+    """Current, PBKDF2 and legacy SHA-256 hashes all verify; only the current one is up to date"""
+    print("\n" + "="*60)
+    print("TEST 1: HASH FORMATS")
+    print("="*60)
+
+    current = hash_password('secret')
+    assert current.startswith('scrypt$')
+    assert current != hash_password('secret')  # Salted
+    assert verify_password('secret', current)
+    assert not verify_password('Secret', current)
+    assert not needs_rehash(current)
+
+    weak = hash_password('secret', n=2 ** 10)
+    assert verify_password('secret', weak)
+    assert needs_rehash(weak)
+
+    salt = b'0123456789abcdef'
+    derived = hashlib.pbkdf2_hmac('sha256', b'secret', salt, 1000)
+    pbkdf2 = f"pbkdf2_sha256$1000${base64.b64encode(salt).decode()}${base64.b64encode(derived).decode()}"
+    assert verify_password('secret', pbkdf2)
+    assert needs_rehash(pbkdf2)
+
+    legacy = hashlib.sha256(b'secret').hexdigest()
+    assert verify_password('secret', legacy)
+    assert not verify_password('wrong', legacy)
+    assert needs_rehash(legacy)
+
+    assert not verify_password('secret', 'scrypt$not$a$hash')
+    assert not verify_password('secret', '')
+
+def test_rehash_on_login():
+    """A legacy hash is replaced by the current format when its owner logs in"""
+    print("\n" + "="*60)
+    print("TEST 2: REHASH ON LOGIN")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        db = Database(os.path.join(directory, 'test.db'))
+        migrate(db)
+        db.execute('INSERT INTO users (email, password_hash, role, department) VALUES (?, ?, ?, ?)',
+                   ('old@pkonnect.edu.np', hashlib.sha256(b'password123').hexdigest(), 'student', 'BIT'))
+        user_cache.clear()
+
+        assert verify_user('old@pkonnect.edu.np', 'password123', 'student', 'BIT', database=db)
+        stored = db.fetchone("SELECT password_hash FROM users WHERE email = 'old@pkonnect.edu.np'")[0]
+        print(f"Stored hash: {stored[:40]}...")
+        assert stored.startswith('scrypt$') and not needs_rehash(stored)
+
+        assert verify_user('old@pkonnect.edu.np', 'password123', 'student', 'BIT', database=db)
+        assert not verify_user('old@pkonnect.edu.np', 'wrong', 'student', 'BIT', database=db)
+        user_cache.clear()
+        db.close_all()
+
+def test_pool_backpressure():
+    """Once every worker and queue slot is taken, the pool rejects instead of queueing"""
+    print("\n" + "="*60)
+    print("TEST 3: POOL BACKPRESSURE")
+    print("="*60)
+
+    pool = PasswordPool(workers=1, queue_limit=1, timeout=5)
+    release = threading.Event()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(pool.run(release.wait))) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    while pool._slots._value:  # Wait until both calls hold a slot
+        pass
+
+    try:
+        pool.run(len, 'x')
+        assert False, "expected PasswordPoolBusy"
+    except PasswordPoolBusy:
+        pass
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert results == [True, True]
+    assert pool.run(len, 'x') == 1
+    print(pool.stats())
+    assert pool.stats()['rejected'] == 1
+
+def test_login_returns_503_when_busy():
+    """/login answers 503 with Retry-After while the password pool is full"""
+    print("\n" + "="*60)
+    print("TEST 4: LOGIN BACKPRESSURE RESPONSE")
+    print("="*60)
+
+    def busy(*args, **kwargs):
+        raise PasswordPoolBusy()
+
+    original = routes.verify_user
+    routes.verify_user = busy
+    try:
+        response = create_app().test_client().post('/login', json={
+            'email': 'student1@pkonnect.edu.np', 'password': 'password123',
+            'role': 'student', 'department': 'BSC CSIT'})
+    finally:
+        routes.verify_user = original
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '2'
+    assert response.get_json()['success'] is False
+
+if __name__ == "__main__":
+    test_hash_formats()
+    test_rehash_on_login()
+    test_pool_backpressure()
+    test_login_returns_503_when_busy()
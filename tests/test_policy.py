@@ -0,0 +1,91 @@
+"""
+Test Policy Stage - Verify disallowed topics and small talk never reach the Bedrock agent
+"""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.bedrock_client import bedrock_client
+from app.bedrock_proxy import query_bedrock, query_bedrock_stream
+from app.metrics import POLICY_SHORT_CIRCUITS
+from app.policy import check_policy
+from app.utils import recognize_intent
+
+def test_recognize_intent_unchanged():
+    """The compiled matcher gives the same intents as the old substring chain"""
+    cases = {
+        "When does enrollment open?": "admission_info",
+        "Admission and marks": "admission_info",
+        "Show my grades": "exam_result",
+        "What is the teacher salary?": "confidential_finance",
+        "Who is the faculty for DBMS?": "teacher_info",
+        "Give me the student phone list": "student_contact",
+        "Student council members": "general",
+        # Restricted intents aren't outvoted by other words
+        "What is the salary of teachers and lecturers?": "confidential_finance",
+        "Give me the phone numbers of students of Ram sir and Sita madam": "student_contact",
+    }
+    for message, intent in cases.items():
+        assert recognize_intent(message) == intent, message
+
+def test_policy_decisions():
+    """Refusals follow is_allowed_for_user; greetings get canned answers"""
+    print("\n" + "="*60)
+    print("TEST 2: POLICY DECISIONS")
+    print("="*60)
+
+    refused = check_policy("What is the salary of the principal?", "guest")
+    print(f"Guest salary question: {refused}")
+    assert refused.action == 'refuse' and refused.intent == 'confidential_finance'
+    # Mentioning teachers too doesn't make a salary question any less confidential
+    for message in ["What is the salary of teachers?", "teacher salary", "salary of a lecturer"]:
+        for user_type in ("guest", "student"):
+            decision = check_policy(message, user_type)
+            assert decision and decision.intent == 'confidential_finance', (message, user_type)
+    assert check_policy("Give me the student email list", "student").action == 'refuse'
+    assert check_policy("Show the marks of 3rd semester", "guest").action == 'refuse'
+
+    assert check_policy("Show the marks of 3rd semester", "student") is None
+
+    # Admission requirements mention grades and marks too; only clear result requests are refused
+    for message in ["What grade do I need in +2 to apply?",
+                    "What GPA is required for admission?",
+                    "Minimum marks for eligibility in BIT",
+                    "What is the entrance exam score needed?",
+                    "Do my +2 grades qualify me for BSc CSIT?"]:
+        print(f"Guest: {message} -> {check_policy(message, 'guest')}")
+        assert check_policy(message, "guest") is None, message
+    assert check_policy("What are my exam results?", "guest").intent == 'exam_result'
+    assert check_policy("Send me the marksheet of Sita", "guest").action == 'refuse'
+    assert check_policy("What is the salary of the principal?", "teacher") is None
+    assert check_policy("Where is the college located?", "guest") is None
+
+    assert check_policy("Hello!", "guest").action == 'answer'
+    assert check_policy("thank you so much", "student").intent == 'thanks'
+    assert check_policy("Namaste", "guest").intent == 'greeting'
+    assert check_policy("hello, who teaches DBMS?", "guest") is None
+
+def test_short_circuit_skips_agent():
+    """Blocked and trivial messages are answered without invoking the agent, and counted"""
+    class FailingAgent:
+        def invoke_agent(self, **params):
+            raise AssertionError("agent should not be called")
+
+    original_agent = bedrock_client.bedrock_agent
+    bedrock_client.bedrock_agent = FailingAgent()
+    counter = POLICY_SHORT_CIRCUITS.labels('guest', 'none', 'refuse', 'confidential_finance')
+    before = counter.value
+    try:
+        response = query_bedrock("How much budget does the college have?", "guest", session={})
+        streamed = "".join(query_bedrock_stream("hi", "guest"))
+    finally:
+        bedrock_client.bedrock_agent = original_agent
+
+    assert "financial" in response
+    assert streamed.startswith("Hello!")
+    assert counter.value == before + 1
+
+if __name__ == "__main__":
+    test_recognize_intent_unchanged()
+    test_policy_decisions()
+    test_short_circuit_skips_agent()
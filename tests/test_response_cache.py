@@ -0,0 +1,162 @@
+"""
+Test Response Cache - Verify repeated guest/general questions skip the Bedrock agent
+"""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app
+from app.bedrock_client import bedrock_client
+from app.bedrock_proxy import query_bedrock
+from app.cache import ResponseCache, SingleFlight, response_cache
+import threading
+import time
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    def __call__(self):
+        return self.now
+
+def test_lru_and_ttl():
+    """Entries expire after the TTL and the least recently used entry is evicted"""
+    print("\n" + "="*60)
+    print("TEST 1: LRU + TTL")
+    print("="*60)
+
+    clock = FakeClock()
+    cache = ResponseCache(max_size=2, ttl=10, clock=clock)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1       # 'a' is now most recently used
+    cache.set('c', 3)                # evicts 'b'
+    assert cache.get('b') is None
+    assert cache.get('c') == 3
+
+    clock.now = 11
+    assert cache.get('a') is None    # expired
+    print(f"Stats: {cache.stats()}")
+    assert cache.stats()['hits'] == 2
+    assert cache.stats()['misses'] == 2
+    assert cache.stats()['evictions'] == 1
+
+def test_query_bedrock_uses_cache():
+    """Same guest question twice = one agent call; follow-ups and personal intents bypass"""
+    print("\n" + "="*60)
+    print("TEST 2: QUERY_BEDROCK CACHING")
+    print("="*60)
+
+    calls = []
+    def fake_chat(user_message, session_id=None, metadata_filter=None, **kwargs):
+        calls.append(user_message)
+        return f"answer #{len(calls)}"
+
+    original_chat = bedrock_client.chat
+    bedrock_client.chat = fake_chat
+    response_cache.clear()
+    app = create_app()
+    try:
+        with app.test_request_context():
+            first = query_bedrock("Tell me about Padma Kanya College")
+            second = query_bedrock("tell me about padma kanya college?")
+            assert first == second
+            assert len(calls) == 1
+
+            # Questions that differ only in a short word or number are different questions
+            query_bedrock("What is the fee for semester 1")
+            query_bedrock("What is the fee for semester 2")
+            query_bedrock("What is the fee for semester 2?")
+            assert len(calls) == 3
+
+            # A follow-up in an ongoing conversation must reach the agent
+            query_bedrock("Tell me more about it")
+            query_bedrock("Tell me more about it")
+            assert len(calls) == 5
+
+            # Logged-in users only share answers to general questions
+            query_bedrock("What are my exam results?", "student", "BSC CSIT")
+            query_bedrock("What are my exam results?", "student", "BSC CSIT")
+            assert len(calls) == 7
+    finally:
+        bedrock_client.chat = original_chat
+        response_cache.clear()
+
+def test_shared_answers_are_not_personalised():
+    """Students sharing a cached answer don't get one addressed to another student"""
+    print("\n" + "="*60)
+    print("TEST 3: NO NAMES IN SHARED ANSWERS")
+    print("="*60)
+
+    calls = []
+    def fake_chat(user_message, session_id=None, metadata_filter=None, **kwargs):
+        calls.append(user_message)
+        return "Hello Asha! The library opens at 7 AM." if "Asha" in user_message else "The library opens at 7 AM."
+
+    original_chat = bedrock_client.chat
+    bedrock_client.chat = fake_chat
+    response_cache.clear()
+    try:
+        first = query_bedrock("When does the library open", "student", "BIT", user_name="Asha", session={})
+        second = query_bedrock("When does the library open", "student", "BIT", user_name="Bina", session={})
+        print(f"Asha: {first} / Bina: {second}")
+        assert len(calls) == 1
+        assert "Asha" not in calls[0] and "Asha" not in second
+        assert first == second == "The library opens at 7 AM."
+
+        # Personal questions aren't cached, so they keep the name
+        query_bedrock("What are my exam results?", "student", "BIT", user_name="Asha", session={})
+        assert "User: Asha" in calls[-1]
+    finally:
+        bedrock_client.chat = original_chat
+        response_cache.clear()
+
+def test_single_flight_coalesces_concurrent_questions():
+    """20 guests asking the same thing at once cause one agent call"""
+    print("\n" + "="*60)
+    print("TEST 4: SINGLE-FLIGHT")
+    print("="*60)
+
+    calls = []
+    def slow_chat(user_message, session_id=None, metadata_filter=None, **kwargs):
+        calls.append(session_id)
+        time.sleep(0.3)
+        return "Admissions open in Shrawan."
+
+    original_chat = bedrock_client.chat
+    bedrock_client.chat = slow_chat
+    response_cache.clear()
+    results = []
+    try:
+        threads = [
+            threading.Thread(target=lambda: results.append(query_bedrock("When do admissions open?", session={})))
+            for _ in range(20)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        bedrock_client.chat = original_chat
+        response_cache.clear()
+
+    print(f"Agent calls: {len(calls)}, answers: {len(results)}")
+    assert len(calls) == 1
+    assert results == ["Admissions open in Shrawan."] * 20
+
+def test_single_flight_leader_failure():
+    """Followers make their own call when the leader fails"""
+    flight = SingleFlight(timeout=5)
+    leader, is_leader = flight.begin('k')
+    follower, is_follower_leader = flight.begin('k')
+    assert is_leader and not is_follower_leader and leader is follower
+
+    flight.finish('k', leader, failed=True)
+    assert flight.wait(follower) is None
+    assert flight.do('k', lambda: 'fresh') == 'fresh'
+
+if __name__ == "__main__":
+    test_lru_and_ttl()
+    test_query_bedrock_uses_cache()
+    test_shared_answers_are_not_personalised()
+    test_single_flight_coalesces_concurrent_questions()
+    test_single_flight_leader_failure()
@@ -0,0 +1,115 @@
+"""
+Test Retrieval Profiles - Verify knowledge base search depth follows the question
+"""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import bedrock_proxy
+from app.bedrock_client import bedrock_client
+from app.bedrock_proxy import query_bedrock
+from app.cache import response_cache
+from app.retrieval import DEFAULT_PROFILE, PROFILES, access_filter, select_profile, to_kb_filter
+
+def test_profile_selection():
+    """Small K for general questions, the large roster profile only for logged-in student lists"""
+    print("\n" + "="*60)
+    print("TEST 1: PROFILE SELECTION")
+    print("="*60)
+
+    cases = [
+        ("What is the address of the college?", "guest", "general"),
+        ("How do I apply for admission?", "guest", "admission"),
+        ("Who is the teacher for DBMS?", "guest", "lookup"),
+        ("Show the result of Sita", "guest", "general"),         # guests get no marks anyway
+        ("Show the result of Sita", "student", "lookup"),
+        ("List all students in 3rd semester", "student", "roster"),
+        ("List all students in 3rd semester", "guest", "general"),
+        ("How many students are in BIT?", "teacher", "roster"),
+    ]
+    for prompt, user_type, expected in cases:
+        profile = select_profile(prompt, user_type)
+        print(f"{user_type:<8} {prompt!r:<45} -> {profile.name} (K={profile.number_of_results})")
+        assert profile.name == expected, (prompt, user_type, profile)
+
+def test_request_uses_profile():
+    """The invoke_agent request carries the profile's depth, search type and mode"""
+    general = bedrock_client._build_request("hi", "session-x", retrieval=PROFILES['general'])
+    kb = general['sessionState']['knowledgeBaseConfigurations'][0]
+    search = kb['retrievalConfiguration']['vectorSearchConfiguration']
+    assert search['numberOfResults'] == PROFILES['general'].number_of_results
+    assert search['overrideSearchType'] == 'SEMANTIC'
+    assert general['sessionState']['promptSessionAttributes']['includeAllResults'] == 'false'
+
+    # Callers that don't choose a profile keep the previous comprehensive retrieval
+    default = bedrock_client._build_request("hi", "session-x")
+    search = default['sessionState']['knowledgeBaseConfigurations'][0]['retrievalConfiguration']
+    assert search['vectorSearchConfiguration']['numberOfResults'] == DEFAULT_PROFILE.number_of_results == 50
+
+def test_access_filters():
+    """Guests get public records, students also their own department's students, teachers everything"""
+    print("\n" + "="*60)
+    print("TEST 3: METADATA FILTERS")
+    print("="*60)
+
+    guest = access_filter('guest')
+    assert guest == {'in': {'key': 'record_type', 'value': ['college', 'teacher']}}
+
+    student = access_filter('student', 'BIT')
+    print(f"Student filter: {student}")
+    public, own_department = student['orAll']
+    assert public == guest
+    assert {'equals': {'key': 'record_type', 'value': 'student'}} in own_department['andAll']
+    department = own_department['andAll'][1]['in']
+    assert department['key'] == 'department' and 'BIT' in department['value']
+
+    spelled = access_filter('student', 'BSC CSIT')['orAll'][1]['andAll'][1]
+    assert 'BSc CSIT' in spelled['in']['value']
+
+    assert access_filter('teacher', 'BIT') is None
+
+def test_plain_mapping_filters():
+    """{'department': ...} mappings become equals / in / andAll filters"""
+    assert to_kb_filter(None) is None
+    assert to_kb_filter({'department': 'BIT'}) == {'equals': {'key': 'department', 'value': 'BIT'}}
+    assert to_kb_filter({'department': 'BIT', 'record_type': ['college', 'student']}) == {'andAll': [
+        {'equals': {'key': 'department', 'value': 'BIT'}},
+        {'in': {'key': 'record_type', 'value': ['college', 'student']}},
+    ]}
+    already = {'equals': {'key': 'record_type', 'value': 'college'}}
+    assert to_kb_filter(already) is already
+
+def test_query_sends_access_filter():
+    """With KB_METADATA_FILTERS on, query_bedrock passes the user's filter into the knowledge base configuration"""
+    sent = []
+    original_agent = bedrock_client.bedrock_agent
+    original_flag = bedrock_proxy.KB_METADATA_FILTERS
+
+    class RecordingAgent:
+        def invoke_agent(self, **params):
+            sent.append(params)
+            return {'completion': [{'chunk': {'bytes': b'Only BIT students.'}}]}
+
+    bedrock_client.bedrock_agent = RecordingAgent()
+    response_cache.clear()
+    try:
+        # Off by default: the knowledge base may not have the metadata
+        bedrock_proxy.KB_METADATA_FILTERS = False
+        query_bedrock("Show the marks of Sita", "student", "BIT", "student", session={})
+        bedrock_proxy.KB_METADATA_FILTERS = True
+        query_bedrock("Show the marks of Sita", "student", "BIT", "student", session={})
+    finally:
+        bedrock_client.bedrock_agent = original_agent
+        bedrock_proxy.KB_METADATA_FILTERS = original_flag
+
+    unfiltered, filtered = [params['sessionState']['knowledgeBaseConfigurations'][0]['retrievalConfiguration']
+                            for params in sent]
+    assert 'filter' not in unfiltered['vectorSearchConfiguration']
+    assert filtered['vectorSearchConfiguration']['filter'] == access_filter('student', 'BIT')
+
+if __name__ == "__main__":
+    test_profile_selection()
+    test_request_uses_profile()
+    test_access_filters()
+    test_plain_mapping_filters()
+    test_query_sends_access_filter()
@@ -0,0 +1,72 @@
+"""
+Test Startup - Guard cold starts against slow imports and per-worker setup creeping back in
+"""
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import bedrock_client as bedrock_module
+from app.db import MIGRATIONS, Database, migrate
+from scripts.bench_startup import measure_once
+
+def test_no_heavy_imports_at_startup():
+    """Importing the app and calling create_app() leaves boto3, pandas and openpyxl unloaded"""
+    print("\n" + "="*60)
+    print("TEST 1: NO HEAVY IMPORTS AT STARTUP")
+    print("="*60)
+
+    measure_once()  # The first start after a data change parses the spreadsheets (with pandas) and snapshots them
+    result = measure_once()
+    print(result)
+    assert result['heavy_modules'] == []
+
+def test_bedrock_client_built_on_first_use():
+    """The boto3 client is only created when first used (or by warm()), and can be replaced"""
+    print("\n" + "="*60)
+    print("TEST 2: LAZY BEDROCK CLIENT")
+    print("="*60)
+
+    client = bedrock_module.BedrockClient()
+    assert not client._agent_built
+    fake = object()
+    client.bedrock_agent = fake
+    assert client.bedrock_agent is fake and client.warm() is None
+
+    built = []
+    client = bedrock_module.BedrockClient()
+    original = bedrock_module.BedrockClient._build_agent
+    bedrock_module.BedrockClient._build_agent = lambda self: built.append(self) or fake
+    try:
+        thread = client.warm()
+        if thread is not None:  # BEDROCK_WARM_CLIENT may be off in this environment
+            thread.join(5)
+            assert built == [client]
+        assert client.bedrock_agent is fake and client.bedrock_agent is fake
+        assert built == [client]
+    finally:
+        bedrock_module.BedrockClient._build_agent = original
+
+def test_migrate_fast_path():
+    """An up-to-date database is checked without taking the write lock"""
+    print("\n" + "="*60)
+    print("TEST 3: MIGRATION FAST PATH")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        db = Database(os.path.join(directory, 'test.db'))
+        migrate(db)
+        calls = []
+        original = db.transaction
+        db.transaction = lambda: calls.append(1) or original()
+        try:
+            assert migrate(db) == len(MIGRATIONS)
+        finally:
+            db.transaction = original
+        assert calls == []
+        db.close_all()
+
+if __name__ == "__main__":
+    test_no_heavy_imports_at_startup()
+    test_bedrock_client_built_on_first_use()
+    test_migrate_fast_path()
@@ -0,0 +1,89 @@
+"""
+Test Streaming - Verify the chunk-by-chunk /chat/stream path against a fake agent
+"""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import json
+from app import create_app
+from app.bedrock_client import StreamFormatter, bedrock_client
+
+CHUNKS = [
+    "Padma Kanya \\",
+    "nCampus is in  ",
+    "\\n\\n\\n\\nBagbazar, \\",
+    "tKathmandu.  \\n",
+]
+
+class FakeAgentRuntime:
+    """Stands in for the bedrock-agent-runtime client"""
+    def invoke_agent(self, **params):
+        return {'completion': [{'chunk': {'bytes': c.encode('utf-8')}} for c in CHUNKS]}
+
+def with_fake_agent(func):
+    def wrapper():
+        original = bedrock_client.bedrock_agent
+        bedrock_client.bedrock_agent = FakeAgentRuntime()
+        try:
+            func()
+        finally:
+            bedrock_client.bedrock_agent = original
+    wrapper.__name__ = func.__name__
+    return wrapper
+
+@with_fake_agent
+def test_stream_matches_chat():
+    """Joined stream pieces must equal the buffered chat() answer"""
+    print("\n" + "="*60)
+    print("TEST 1: STREAM == CHAT")
+    print("="*60)
+
+    full = bedrock_client.chat("hello", session_id="test-stream")
+    pieces = list(bedrock_client.chat_stream("hello", session_id="test-stream"))
+    print(f"Pieces: {pieces}")
+
+    assert "".join(pieces) == full
+    assert len(pieces) > 1, "answer should arrive in more than one piece"
+
+@with_fake_agent
+def test_stream_endpoint():
+    """The SSE endpoint forwards every delta and ends with a done event"""
+    print("\n" + "="*60)
+    print("TEST 2: /chat/stream ENDPOINT")
+    print("="*60)
+
+    app = create_app()
+    with app.test_client() as client:
+        response = client.post('/chat/stream', json={'message': 'Where is the college?'})
+        body = response.get_data(as_text=True)
+        print(body)
+
+        assert response.mimetype == 'text/event-stream'
+        deltas = [json.loads(line[6:])['delta'] for line in body.split('\n') if line.startswith('data: {"delta"')]
+        assert "".join(deltas) == bedrock_client.chat("hello")
+        assert body.rstrip().endswith("event: done\ndata: {}")
+
+def test_formatter_is_incremental():
+    """Each chunk is formatted once, not the whole answer so far, and the result matches chat()"""
+    print("\n" + "="*60)
+    print("TEST 3: INCREMENTAL FORMATTING")
+    print("="*60)
+
+    formatted_chars = []
+    def counting_format(text):
+        formatted_chars.append(len(text))
+        return bedrock_client._format_response(text)
+
+    chunks = ["Line %d of a long answer\\n\\n  " % i for i in range(2000)] + CHUNKS
+    formatter = StreamFormatter(counting_format)
+    streamed = "".join(formatter.feed(chunk) for chunk in chunks) + formatter.flush()
+    raw = "".join(chunks)
+    print(f"Raw: {len(raw)} chars, formatted: {sum(formatted_chars)} chars in {len(formatted_chars)} calls")
+    assert streamed == bedrock_client._format_response(raw)
+    assert sum(formatted_chars) <= len(raw)
+
+if __name__ == "__main__":
+    test_stream_matches_chat()
+    test_stream_endpoint()
+    test_formatter_is_incremental()
@@ -1,21 +1,24 @@
 import sqlite3
-import hashlib
 import os
+import sys
 
-DATABASE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'users.db')
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db import db, migrate
+from app.passwords import hash_password
 
 def add_user(email, password, role, department):
-    password_hash = hashlib.sha256(password.encode()).hexdigest()
-    conn = sqlite3.connect(DATABASE)
-    cursor = conn.cursor()
+    email = email.strip().lower()
+    password_hash = hash_password(password)
+    migrate()
     try:
-        cursor.execute('INSERT INTO users (email, password_hash, role, department) VALUES (?, ?, ?, ?)',
-                       (email, password_hash, role, department))
-        conn.commit()
+        with db.transaction() as conn:
+            conn.execute('INSERT INTO users (email, password_hash, role, department) VALUES (?, ?, ?, ?)',
+                         (email, password_hash, role, department))
         print(f"User {email} added successfully.")
     except sqlite3.IntegrityError:
         print(f"User {email} already exists.")
-    conn.close()
 
 if __name__ == "__main__":
     # Example: Add a new user
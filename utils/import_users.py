@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Bulk import of user accounts from a CSV or XLSX file
+
+The first row names the columns: email (required), password, role,
+department and full_name (or name). Missing values fall back to --role,
+--department and --default-password. Rows are streamed from the file, their
+passwords hashed in parallel (hashlib releases the GIL, so each worker
+thread gets its own core) and written with executemany, one transaction per
+chunk. Existing emails are updated rather than rejected.
+
+Examples:
+    python utils/import_users.py students.csv --role student --department BIT --default-password changeme
+    python utils/import_users.py batch2078.xlsx --department "BSC CSIT" --keep-passwords
+"""
+
+import argparse
+import csv
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import PASSWORD_WORKERS
+from app.db import db, migrate, user_cache
+from app.passwords import hash_password
+
+ROLES = {'student', 'teacher', 'others'}
+EMAIL_PATTERN = re.compile(r'^[a-z0-9._%+-]+@[a-z0-9.-]+\.[a-z]{2,}$')
+
+# Header spellings accepted for each field (compared lowercased, spaces as underscores)
+COLUMN_ALIASES = {
+    'email': {'email', 'email_address', 'e-mail', 'mail'},
+    'password': {'password', 'initial_password'},
+    'role': {'role', 'user_type'},
+    'department': {'department', 'dept', 'program', 'programme'},
+    'full_name': {'full_name', 'name', 'student_name', 'teacher_name'},
+}
+
+# Empty password_hash keeps the stored one (--keep-passwords); new users always get a hash
+UPSERT = '''
+    INSERT INTO users (email, password_hash, role, department, full_name) VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (email) DO UPDATE SET
+        password_hash = CASE WHEN excluded.password_hash = '' THEN users.password_hash
+                             ELSE excluded.password_hash END,
+        role = excluded.role,
+        department = excluded.department,
+        full_name = COALESCE(excluded.full_name, users.full_name)
+'''
+
+def _field(header):
+    key = str(header or '').strip().lower().replace(' ', '_')
+    return next((field for field, aliases in COLUMN_ALIASES.items() if key in aliases), None)
+
+def read_rows(path):
+    """Yield (line number, {field: value}) for each data row of a CSV or XLSX file"""
+    if path.lower().endswith(('.xlsx', '.xlsm')):
+        from openpyxl import load_workbook  # Only needed for spreadsheets
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            fields = [_field(header) for header in next(rows, ())]
+            for line, values in enumerate(rows, start=2):
+                yield line, {field: value for field, value in zip(fields, values) if field}
+        finally:
+            workbook.close()
+    else:
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            rows = csv.reader(f)
+            fields = [_field(header) for header in next(rows, [])]
+            for line, values in enumerate(rows, start=2):
+                yield line, {field: value for field, value in zip(fields, values) if field}
+
+def _text(value):
+    if value is None:
+        return ''
+    return str(value).strip()
+
+def prepare(line, row, role=None, department=None, default_password=None):
+    """(email, password, role, department, full_name) for a row, or raise ValueError saying what's wrong"""
+    email = _text(row.get('email')).lower()
+    if not EMAIL_PATTERN.match(email):
+        raise ValueError(f"line {line}: invalid email {email!r}")
+    user_role = (_text(row.get('role')) or role or '').lower()
+    if user_role not in ROLES:
+        raise ValueError(f"line {line}: invalid role {user_role!r} for {email}")
+    user_department = _text(row.get('department')) or department
+    if not user_department:
+        raise ValueError(f"line {line}: no department for {email}")
+    password = _text(row.get('password')) or default_password
+    return email, password, user_role, user_department, _text(row.get('full_name')) or None
+
+def import_users(path, database=db, chunk_size=500, workers=PASSWORD_WORKERS, role=None, department=None,
+                 default_password=None, keep_passwords=False, progress=print):
+    """
+    Import every row of `path`; returns counts of inserted, updated and
+    skipped rows plus the elapsed time. Invalid rows are skipped and reported
+    through `progress`; each chunk is committed on its own.
+    """
+    migrate(database)
+    stats = {'inserted': 0, 'updated': 0, 'skipped': 0, 'elapsed_s': 0.0}
+    started = time.perf_counter()
+    rows = read_rows(path)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="import-hash") as pool:
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+
+            users = {}
+            for line, row in chunk:
+                try:
+                    user = prepare(line, row, role, department, default_password)
+                except ValueError as e:
+                    stats['skipped'] += 1
+                    progress(f"  skipped {e}")
+                    continue
+                users[user[0]] = user  # A repeated email: the last row wins
+
+            emails = list(users)
+            existing = set()
+            for start in range(0, len(emails), 500):  # Stay under SQLite's bound-parameter limit
+                batch = emails[start:start + 500]
+                existing.update(row[0] for row in database.fetchall(
+                    f"SELECT email FROM users WHERE email IN ({','.join('?' * len(batch))})", batch))
+
+            # Only hash the passwords that will be stored
+            to_hash = [email for email in emails
+                       if users[email][1] and not (keep_passwords and email in existing)]
+            missing = [email for email in emails if not users[email][1] and email not in existing]
+            for email in missing:
+                stats['skipped'] += 1
+                progress(f"  skipped {email}: no password (use --default-password)")
+                del users[email]
+            hashes = dict(zip(to_hash, pool.map(hash_password, (users[email][1] for email in to_hash))))
+
+            database.executemany(UPSERT, [
+                (email, hashes.get(email, ''), user_role, user_department, full_name)
+                for email, (_, _, user_role, user_department, full_name) in users.items()
+            ])
+            for email in users:
+                user_cache.pop(email)
+            updated = sum(1 for email in users if email in existing)
+            stats['updated'] += updated
+            stats['inserted'] += len(users) - updated
+
+            elapsed = time.perf_counter() - started
+            done = stats['inserted'] + stats['updated']
+            progress(f"  {done} users imported ({done / elapsed:.1f} users/s), {stats['skipped']} skipped")
+
+    stats['elapsed_s'] = time.perf_counter() - started
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path', help='CSV or XLSX file')
+    parser.add_argument('--role', choices=sorted(ROLES), help='role for rows without one')
+    parser.add_argument('--department', help='department for rows without one')
+    parser.add_argument('--default-password', help='password for rows without one')
+    parser.add_argument('--keep-passwords', action='store_true', help="don't change existing users' passwords")
+    parser.add_argument('--chunk-size', type=int, default=500, help='rows per transaction')
+    parser.add_argument('--workers', type=int, default=PASSWORD_WORKERS, help='password hashing threads')
+    args = parser.parse_args()
+
+    print(f"📥 Importing users from {args.path}")
+    stats = import_users(args.path, chunk_size=args.chunk_size, workers=args.workers, role=args.role,
+                         department=args.department, default_password=args.default_password,
+                         keep_passwords=args.keep_passwords)
+    total = stats['inserted'] + stats['updated']
+    rate = total / stats['elapsed_s'] if stats['elapsed_s'] else 0.0
+    print(f"✅ {stats['inserted']} added, {stats['updated']} updated, {stats['skipped']} skipped "
+          f"in {stats['elapsed_s']:.1f}s ({rate:.1f} users/s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+import os
+import sys
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db import db, migrate
+
+def migrate_db():
+    """Create or upgrade the users database; run once per deployment, before the workers start"""
+    before = db.fetchone('PRAGMA user_version')[0]
+    version = migrate()
+    if before == version:
+        print(f"Users database is up to date (version {version}).")
+    else:
+        print(f"Users database migrated from version {before} to {version}.")
+
+if __name__ == "__main__":
+    migrate_db()
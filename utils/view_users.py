@@ -1,14 +1,13 @@
-import sqlite3
 import os
+import sys
 
-DATABASE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'users.db')
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db import db
 
 def view_users():
-    conn = sqlite3.connect(DATABASE)
-    cursor = conn.cursor()
-    cursor.execute('SELECT id, email, full_name, role, department FROM users')
-    users = cursor.fetchall()
-    conn.close()
+    users = db.fetchall('SELECT id, email, full_name, role, department FROM users')
     print("Users in database:")
     for user in users:
         print(f"ID: {user[0]}, Email: {user[1]}, Name: {user[2]}, Role: {user[3]}, Department: {user[4]}")